@@ -1,15 +1,416 @@
+import heapq
 import json
+import math
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for batch_query
+    np = None
+
+from factors import (Factor, ZeroProbabilityEvidence, elimination_order, evidence_probability, logsumexp,
+                     variable_elimination)
+from compiled_net import load_compiled, save_compiled
+from junction_tree import JunctionTree
+from posterior_cache import PosteriorCache
+from sampling import gibbs_sampling, likelihood_weighting
+
+# Marks an unobserved variable in an evidence matrix (see BayesNet.batch_query)
+UNOBSERVED = -1
+
+# Largest joint distribution joint_array will materialize
+MAX_JOINT_SIZE = 1 << 22
+
+# Entries batch_query sizes one block of evidence patterns for (block size x largest CPT)
+BATCH_BLOCK_ENTRIES = 1 << 22
+
+# np.einsum labels axes with 52 letters, one of them is the pattern axis
+MAX_BATCH_NODES = 51
+
+# Approximate inference methods of infer, see sampling.py
+SAMPLERS = {"lw": likelihood_weighting, "gibbs": gibbs_sampling}
+
+# How far the probabilities of a CPT row may sum away from 1 before the net is rejected
+ROW_SUM_TOLERANCE = 1e-4
+
+
+def _entropy(probabilities):
+    """
+    Shannon entropy in bits of a distribution.
+    """
+    return -sum(p * math.log2(p) for p in probabilities if p > 0.0)
+
+
+class InvalidNetError(ValueError):
+    """
+    Raised when a net definition is structurally broken: unknown or cyclic parents, CPT rows
+    with the wrong arity or values, missing or duplicate rows, or rows that do not sum to 1.
+    """
+
 
 class BayesNet:
-    def __init__(self, json_file_path=None):
+    def __init__(self, json_file_path=None, cache_size=1024, log_space=False, batch_dtype="float64",
+                 inference=None):
+        """
+        Args:
+            json_file_path (String) : Net definition to load, or None for an empty net.
+            cache_size (int) : Capacity of the posterior cache used by cached_infer.
+            log_space (Boolean) : Default for infer(log_space=...), see infer.
+            batch_dtype (String) : Default float type of batch_query, "float64" or "float32".
+            inference (Dict) : Default inference method of the net, e.g. {"method": "lw", "samples": 20000,
+                               "target_se": 0.005, "seed": 0}. The other keys are passed to the sampler
+                               (see approximate_ask). Defaults to the optional "inference" entry of the
+                               net definition, then to {"method": "ve"}.
+        """
+        # posteriors served by cached_infer, cleared whenever the tables are recompiled
+        self.cache = PosteriorCache(cache_size)
+        self.log_space = log_space
+        self.batch_dtype = batch_dtype
+        self.inference = inference
+
         if json_file_path:
             with open(json_file_path, 'r') as file:
                 data = json.load(file)
 
-            self.data = data
-            self.tables = data['tables']
-            self.nodes = data['nodes']
-            self.parents = data['parents']
+            self._load(data)
+
+    @classmethod
+    def from_dict(cls, data, **options):
+        """
+        Builds a net from an already-parsed definition (same format as the JSON file).
+        options are the keyword arguments of the constructor.
+        """
+        bn = cls(**options)
+        bn._load(data)
+        return bn
+
+    def _load(self, data):
+        self.data = data
+        self.tables = data['tables']
+        self.nodes = data['nodes']
+        self.parents = data['parents']
+        if self.inference is None:
+            self.inference = data.get('inference')
+
+        self._compile()
+
+    def _compile(self, cpt=None):
+        """
+        Compiles every conditional probability table into a flat array so lookups are O(1).
+
+        For a variable with parents [P1, ..., Pk], the row for a parent assignment is found with
+        a mixed-radix index: sum(index_of(Pi) * stride_i), where the last parent has stride 1.
+        The probability of value v is then cpt[row * cardinality + index_of(v)].
+
+        The net is validated here, once, so inference never runs on a broken definition
+        (see _check_structure and _check_table). The topological order, ancestor sets and
+        Markov blankets are cached for inference and pruning.
+
+        The JSON tables (self.data / self.tables) are kept untouched for serialization only.
+
+        Args:
+            cpt (Dict) : Already-flat tables to use instead of parsing self.tables, e.g. the
+                         memory-mapped arrays of a compiled net (see compiled_net.py).
+        """
+        self._check_structure()
+
+        # value -> index map for every node
+        self.value_index = {}
+        self.cardinality = {}
+        for var, values in self.nodes.items():
+            self.value_index[var] = {val: i for i, val in enumerate(values)}
+            self.cardinality[var] = len(values)
+
+        self.strides = {}
+        self.cpt = {}
+        for var in self.nodes:
+            parents = self.parents[var]
+
+            # last parent varies fastest, matching the row order of the JSON tables
+            strides = [0] * len(parents)
+            stride = 1
+            for i in range(len(parents) - 1, -1, -1):
+                strides[i] = stride
+                stride *= self.cardinality[parents[i]]
+            self.strides[var] = strides
+
+            if cpt is not None:
+                self.cpt[var] = cpt[var]
+                self._check_table(var)
+                continue
+
+            if var not in self.tables:
+                raise InvalidNetError(f"{var!r} has no entry in tables")
+            card = self.cardinality[var]
+            flat = array('d', [float('nan')]) * (stride * card)
+            for parent_assignment, probabilities in self.tables[var]:
+                if len(parent_assignment) != len(parents):
+                    raise InvalidNetError(f"{var!r}: row {parent_assignment} has {len(parent_assignment)} "
+                                          f"parent values, expected {len(parents)} for {parents}")
+                if len(probabilities) != card:
+                    raise InvalidNetError(f"{var!r}: row {parent_assignment} has {len(probabilities)} "
+                                          f"probabilities, expected {card}")
+                row = 0
+                for parent, parent_value, parent_stride in zip(parents, parent_assignment, strides):
+                    parent_index = self.value_index[parent].get(parent_value)
+                    if parent_index is None:
+                        raise InvalidNetError(f"{var!r}: {parent_value!r} is not a value of parent {parent!r}")
+                    row += parent_index * parent_stride
+                if flat[row * card] == flat[row * card]:
+                    raise InvalidNetError(f"{var!r}: duplicate row for {parent_assignment}")
+                flat[row * card:(row + 1) * card] = array('d', probabilities)
+            self.cpt[var] = flat
+            self._check_table(var)
+
+        # the same structure by node position, for the iterative enumeration
+        self.node_index = {var: i for i, var in enumerate(self.nodes)}
+        self.node_names = list(self.nodes)
+        self._cards = [self.cardinality[var] for var in self.nodes]
+        self._cpts = [self.cpt[var] for var in self.nodes]
+        self._families = [
+            [(self.node_index[parent], stride) for parent, stride in zip(self.parents[var], self.strides[var])]
+            for var in self.nodes
+        ]
+        self._topological = [self.node_index[var] for var in self.order]
+
+        # built on first use by compile_junction_tree / batch_query
+        self.junction_tree = None
+        self._joint = None
+
+        # _prune results (relevant nodes, set-aside nodes), keyed on (query, evidence variables)
+        self._pruned = {}
+
+        # anything cached was computed from the old tables
+        self.cache.clear()
+
+    def _check_structure(self):
+        """
+        Validates the graph and caches its structure:
+            self.order : every node in topological order (ties keep the order of self.nodes)
+            self.children, self.ancestors, self.markov_blanket : sets per node
+
+        Raises:
+            InvalidNetError : If a node has no parents entry, a parent is not a node, or the graph has a cycle.
+        """
+        for var in self.nodes:
+            if var not in self.parents:
+                raise InvalidNetError(f"{var!r} has no entry in parents")
+            for parent in self.parents[var]:
+                if parent not in self.nodes:
+                    raise InvalidNetError(f"parent {parent!r} of {var!r} is not a node")
+            if len(set(self.parents[var])) != len(self.parents[var]):
+                raise InvalidNetError(f"{var!r} lists a parent twice")
+            if len(set(self.nodes[var])) != len(self.nodes[var]):
+                raise InvalidNetError(f"{var!r} lists a value twice")
+
+        self.children = {var: [] for var in self.nodes}
+        for var in self.nodes:
+            for parent in self.parents[var]:
+                self.children[parent].append(var)
+
+        # Kahn's algorithm, always taking the earliest ready node so a sorted file keeps its order
+        waiting = {var: len(self.parents[var]) for var in self.nodes}
+        position = {var: i for i, var in enumerate(self.nodes)}
+        ready = [position[var] for var in self.nodes if waiting[var] == 0]
+        heapq.heapify(ready)
+        names = list(self.nodes)
+        self.order = []
+        while ready:
+            var = names[heapq.heappop(ready)]
+            self.order.append(var)
+            for child in self.children[var]:
+                waiting[child] -= 1
+                if waiting[child] == 0:
+                    heapq.heappush(ready, position[child])
+        if len(self.order) != len(self.nodes):
+            cycle = sorted(var for var in self.nodes if waiting[var] > 0)
+            raise InvalidNetError(f"the graph has a cycle through {cycle}")
+
+        self.ancestors = {}
+        for var in self.order:
+            ancestors = set(self.parents[var])
+            for parent in self.parents[var]:
+                ancestors |= self.ancestors[parent]
+            self.ancestors[var] = frozenset(ancestors)
+
+        self.markov_blanket = {}
+        for var in self.nodes:
+            blanket = set(self.parents[var]) | set(self.children[var])
+            for child in self.children[var]:
+                blanket.update(self.parents[child])
+            blanket.discard(var)
+            self.markov_blanket[var] = frozenset(blanket)
+
+    def _check_table(self, var):
+        """
+        Validates the compiled CPT of var: every row present, no negative entries, and every row
+        summing to 1 within ROW_SUM_TOLERANCE.
+
+        Raises:
+            InvalidNetError : Naming the first bad row by its parent assignment.
+        """
+        card = self.cardinality[var]
+        flat = self.cpt[var]
+        if len(flat) % card:
+            raise InvalidNetError(f"{var!r}: table size {len(flat)} is not a multiple of {card}")
+        for row in range(len(flat) // card):
+            probabilities = flat[row * card:(row + 1) * card]
+            problem = None
+            if any(p != p for p in probabilities):
+                problem = "is missing"
+            elif min(probabilities) < 0:
+                problem = "has a negative probability"
+            elif abs(sum(probabilities) - 1.0) > ROW_SUM_TOLERANCE:
+                problem = f"sums to {sum(probabilities)!r}"
+            if problem is not None:
+                assignment = []
+                rest = row
+                for parent in reversed(self.parents[var]):
+                    rest, value_index = divmod(rest, self.cardinality[parent])
+                    assignment.insert(0, self.nodes[parent][value_index])
+                raise InvalidNetError(f"{var!r}: row {assignment} {problem}")
+
+    def update_tables(self, tables):
+        """
+        Replaces the conditional probability tables of some variables and recompiles the net.
+        Cached posteriors, the junction tree and the batch joint are all invalidated.
+
+        Args:
+            tables (Dict) : Keys are variables, values are tables in the JSON format.
+        """
+        if self.tables is None:
+            self.tables = self.tables_from_cpt()
+        self.tables.update(tables)
+        self._compile()
+
+    def changed_tables(self, other):
+        """
+        The variables whose conditional probability table differs in other, an earlier version
+        of this net. Returns None when the two do not share their nodes, values and parents.
+        """
+        if list(self.nodes.items()) != list(other.nodes.items()) or self.parents != other.parents:
+            return None
+        return {var for var in self.nodes if memoryview(self.cpt[var]) != memoryview(other.cpt[var])}
+
+    def inherit_cache(self, previous):
+        """
+        Carries the posterior cache of previous (an earlier version of this net, e.g. before a
+        reload) over to this one, except the entries that depend on a table that changed. An
+        entry P(query | evidence) depends only on the tables relevant_nodes keeps for it. Nothing
+        carries over when the structure changed.
+
+        Returns:
+            int : How many cached posteriors were kept.
+        """
+        changed = self.changed_tables(previous)
+        if changed is None:
+            return 0
+        # pruning depends only on the structure
+        self._pruned.update(previous._pruned)
+        names = self.node_names
+
+        def unchanged(key):
+            query, _, evidence = key
+            # evidence is (variable, value) from cached_infer or (node index, value index) from cached_infer_encoded
+            evidence_vars = [names[var] if isinstance(var, int) else var for var, _ in evidence]
+            return changed.isdisjoint(self.relevant_nodes(query, evidence_vars))
+
+        return self.cache.copy_from(previous.cache, unchanged)
+
+    def encode_evidence(self, evidence):
+        """
+        Converts string-valued evidence into value indices.
+
+        Args:
+            evidence (Dict): Keys are names of variables, and values are a specific outcome value.
+
+        Returns:
+            Dict : Keys are names of variables, values are the index of the outcome in self.nodes[var].
+
+        Raises:
+            ValueError : If a value is not a possible outcome of its variable.
+        """
+        codes = {}
+        for var, val in evidence.items():
+            index = self.value_index[var].get(val)
+            if index is None:
+                raise ValueError(f"{val!r} is not a possible value of {var!r}")
+            codes[var] = index
+        return codes
+
+    def encode_pairs(self, evidence):
+        """
+        Encodes evidence as a tuple of (node index, value index) pairs, in the order given.
+        This is the compact form the prioritization pipeline passes around (see infer_encoded).
+
+        Raises:
+            ValueError : If a variable or value is not part of the net.
+        """
+        return tuple((self.node_index[var], value_index) for var, value_index in self.encode_evidence(evidence).items())
+
+    def codes_from_pairs(self, pairs):
+        """
+        Turns (node index, value index) pairs back into index-coded evidence {variable: value index}.
+        """
+        names = self.node_names
+        return {names[node]: value_index for node, value_index in pairs}
+
+    def tables_from_cpt(self):
+        """
+        Rebuilds tables in the JSON format from the compiled CPTs.
+        Nets loaded with load_compiled have no JSON tables until then.
+        """
+        tables = {}
+        for var in self.nodes:
+            parents = self.parents[var]
+            card = self.cardinality[var]
+            flat = self.cpt[var]
+
+            rows = []
+            for row in range(len(flat) // card):
+                probabilities = list(flat[row * card:(row + 1) * card])
+                assignment = []
+                rest = row
+                for parent in reversed(parents):
+                    rest, value_index = divmod(rest, self.cardinality[parent])
+                    assignment.insert(0, self.nodes[parent][value_index])
+                rows.append([assignment, probabilities])
+            tables[var] = rows
+        return tables
+
+    def to_dict(self):
+        """
+        Returns the JSON-serializable definition of the net (nodes, parents, tables).
+        """
+        tables = self.tables if self.tables is not None else self.tables_from_cpt()
+        data = {"nodes": self.nodes, "parents": self.parents, "tables": tables}
+        if self.inference:
+            data["inference"] = self.inference
+        return data
+
+    def save_compiled(self, path):
+        """
+        Writes the net in the binary compiled format (see compiled_net.py).
+        """
+        save_compiled(self, path)
+
+    @classmethod
+    def load_compiled(cls, path, **options):
+        """
+        Loads a net written by save_compiled. The CPTs are memory-mapped read-only, so loading
+        does not parse or copy them and worker processes share the same pages.
+        options are the keyword arguments of the constructor.
+        """
+        bn = cls(**options)
+        load_compiled(bn, path)
+        return bn
+
+    def save(self, json_file_path):
+        """
+        Writes the net back out in the same JSON format the constructor reads.
+        """
+        with open(json_file_path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2)
 
     def query_prob(self, variable, var_value, evidence):
         """
@@ -28,84 +429,231 @@ class BayesNet:
 
         """
 
-        # check that evidence contains all parent values, 
-        for parent in self.parents[variable]:
+        # mixed-radix row index from the parent values
+        row = 0
+        for parent, stride in zip(self.parents[variable], self.strides[variable]):
             if parent not in evidence:
                 return None
-
-        # build ordered list of parent values
-        parent_values = []
-        for parent in self.parents[variable]:
-            parent_values.append(evidence[parent])
-
-        # find the table row that matches these parent values
-        for row in self.tables[variable]:
-            parent_assignment = row[0]
-            probabilities = row[1]
-
-            if parent_assignment == parent_values:
-                possible_values = self.nodes[variable]
-
-                index = 0
-                for val in possible_values:
-                    if val == var_value:
-                        return probabilities[index]
-                    index += 1
-
+            parent_index = self.value_index[parent].get(evidence[parent])
+            if parent_index is None:
                 return None
+            row += parent_index * stride
+
+        value_index = self.value_index[variable].get(var_value)
+        if value_index is None:
+            return None
 
-        return None
+        return self.cpt[variable][row * self.cardinality[variable] + value_index]
 
-        
     def enumerate_all(self, vars, evidence, index=0):
         """
-        Recursivley caculates the joint probability of variables taking on the values specified in evidence.
+        Calculates the joint probability of variables taking on the values specified in evidence,
+        by summing over the hidden variables (see _enumerate_iterative, no recursion is used).
 
         Args:
             variable (List[String]) : The variables present in the bayes net, specified in topological order.
             evidence (Dict): Dictionary representing specific outcomes.
                             Keys are names of variables, and values are a specific outcome value.
+                            Keys that are not variables of the net are ignored.
 
         Returns:
             float : The result of the joint probability query for P(evidence).
 
+        Raises:
+            ValueError : If a parent of a variable in vars is neither in evidence nor earlier in vars.
         """
-        # Base case        
-        if index == len(vars):
-            return 1.0
+        order = [self.node_index[var] for var in vars[index:]]
+        values = [-1] * len(self.node_index)
+        known = {var: val for var, val in evidence.items() if var in self.node_index}
+        for var, value_index in self.encode_evidence(known).items():
+            values[self.node_index[var]] = value_index
 
-        current_var = vars[index]
+        assigned = {node for node, value_index in enumerate(values) if value_index >= 0}
+        for node in order:
+            for parent, _ in self._families[node]:
+                if parent not in assigned:
+                    raise ValueError(f"parent {self.node_names[parent]!r} of {self.node_names[node]!r} "
+                                     f"is neither in evidence nor earlier in vars")
+            assigned.add(node)
+        return self._enumerate_iterative(order, values)
+
+    def _enumerate_iterative(self, order, values, query_level=None):
+        """
+        Iterative, in-place version of the enumerate_all recursion.
 
-        # Current variable in evidence -> multiplication
-        if current_var in evidence:
+        The assignment is a list of value indices per node (self.node_index), -1 where hidden.
+        Each level of the depth-first walk keeps its current branch, CPT probability and running
+        total in preallocated lists, and hidden nodes are assigned in place, so no dicts are copied.
+        Multiplications and additions happen in the same order as the recursion, so results
+        are bit-for-bit the same.
 
-            parent_evidence = {}
-            for parent in self.parents[current_var]:
-                parent_evidence[parent] = evidence[parent]
+        Args:
+            order (List[int]) : Node indices to walk, in topological order.
+            values (List[int]) : The assignment. Hidden entries are reset to -1 before returning.
+            query_level (int) : Optional level in order whose values are not summed but kept apart,
+                                so enumerate_ask scores every query value in one walk.
 
-            probability = self.query_prob(current_var, evidence[current_var], parent_evidence)
-            return probability * self.enumerate_all(vars, evidence, index + 1)
+        Returns:
+            float : P(evidence) over order, or with query_level a list of P(evidence, query=v) per value v.
+        """
+        n = len(order)
+        cards = self._cards
+        families = self._families
+        cpts = self._cpts
 
-        # Current variable not in evidence -> addition
+        observed = [values[node] >= 0 for node in order]
+        if query_level is not None:
+            observed[query_level] = False
         else:
-            total = 0.0
+            query_level = -1
+
+        branch = [0] * n
+        prob = [0.0] * n
+        total = [0.0] * n
+        collected = [None] * n
+
+        def lookup(node):
+            row = 0
+            for parent, stride in families[node]:
+                row += values[parent] * stride
+            return cpts[node][row * cards[node] + values[node]]
+
+        i = 0
+        while True:
+            # descend: first branch of every level below i
+            while i < n:
+                node = order[i]
+                if not observed[i]:
+                    values[node] = 0
+                    total[i] = 0.0
+                    collected[i] = None
+                branch[i] = values[node]
+                prob[i] = lookup(node)
+                i += 1
+            result = 1.0
+
+            # ascend until a level still has branches left
+            while True:
+                i -= 1
+                if i < 0:
+                    return result
+
+                if i < query_level:
+                    # above the query level, one product per query value
+                    contribution = [prob[i] * r for r in result]
+                else:
+                    contribution = prob[i] * result
 
-            # Try each possible assignment of current_var
-            for possible_value in self.nodes[current_var]:
+                if observed[i]:
+                    result = contribution
+                    continue
 
-                new_evidence = evidence.copy()
-                new_evidence[current_var] = possible_value
+                if i == query_level:
+                    if collected[i] is None:
+                        collected[i] = []
+                    collected[i].append(contribution)
+                elif i < query_level:
+                    # the recursion starts its total at 0.0, and 0.0 + x == x
+                    if collected[i] is None:
+                        collected[i] = contribution
+                    else:
+                        collected[i] = [a + b for a, b in zip(collected[i], contribution)]
+                else:
+                    total[i] += contribution
 
-                parent_evidence = {}
-                for parent in self.parents[current_var]:
-                    parent_evidence[parent] = new_evidence[parent]
+                node = order[i]
+                if branch[i] + 1 < cards[node]:
+                    branch[i] += 1
+                    values[node] = branch[i]
+                    prob[i] = lookup(node)
+                    i += 1
+                    break
 
-                probability = self.query_prob(current_var, possible_value, parent_evidence)
-                total += probability * self.enumerate_all(vars, new_evidence, index + 1)
+                values[node] = -1
+                result = collected[i] if i <= query_level else total[i]
 
-            return total
+    def relevant_nodes(self, query, evidence_vars):
+        """
+        Prunes the net down to the nodes whose CPTs can change P(query | evidence).
+
+        1. Barren nodes go first: only query, evidence and their ancestors are kept.
+        2. On the moral graph of what is left, with the evidence nodes removed, everything not
+           connected to query is d-separated from it.
+        3. A CPT matters only if its family touches the query's component; the other CPTs are
+           constant in query and vanish when normalizing.
+
+        The result depends only on which variables are observed, not on their values, so it is
+        cached per (query, evidence variables).
+
+        The CPTs dropped in 3) still decide whether the evidence is possible at all (e.g. an
+        impossible observation d-separated from query); inference checks them separately with
+        _check_set_aside.
+
+        Args:
+            query (String) : The variable we wish to know the distribution of.
+            evidence_vars (Iterable[String]) : The observed variables (query itself is ignored).
+
+        Returns:
+            List[String] : The nodes whose CPTs have to be summed over, in topological order.
+        """
+        return self._prune(query, evidence_vars)[0]
 
-    def enumerate_ask(self, query, evidence):
+    def _prune(self, query, evidence_vars):
+        """
+        relevant_nodes, along with the nodes set aside in its step 3): the ancestral nodes whose
+        CPTs are constant in query. Both lists are in topological order.
+        """
+        evidence_vars = frozenset(evidence_vars) - {query}
+        key = (query, evidence_vars)
+        pruned = self._pruned.get(key)
+        if pruned is not None:
+            return pruned
+
+        # 1) ancestral set of query and evidence
+        kept = {query, *evidence_vars}
+        for var in list(kept):
+            kept |= self.ancestors[var]
+
+        # 2) component of query in the moral graph of the kept nodes, cut at the evidence
+        neighbours = {var: set() for var in kept}
+        for var in kept:
+            family = self.parents[var] + [var]
+            for a in family:
+                neighbours[a].update(b for b in family if b != a)
+
+        component = {query}
+        stack = [query]
+        while stack:
+            var = stack.pop()
+            for neighbour in neighbours[var]:
+                if neighbour not in component and neighbour not in evidence_vars:
+                    component.add(neighbour)
+                    stack.append(neighbour)
+
+        # 3) CPTs whose family touches the component
+        relevant = [var for var in self.order
+                    if var in kept and (var in component or not component.isdisjoint(self.parents[var]))]
+        relevant_set = set(relevant)
+        set_aside = [var for var in self.order if var in kept and var not in relevant_set]
+        self._pruned[key] = (relevant, set_aside)
+        return self._pruned[key]
+
+    def _check_set_aside(self, query, codes, log_space=False):
+        """
+        Raises ZeroProbabilityEvidence if the CPTs that relevant_nodes set aside for (query, codes)
+        make the evidence impossible, so pruned inference agrees with prune=False on that.
+
+        The set-aside CPTs share no hidden variable with the relevant ones, so they contribute a
+        constant factor to P(evidence); it is computed by summing out their own hidden variables.
+        """
+        set_aside = self._prune(query, codes)[1]
+        if not set_aside:
+            return
+        probability = evidence_probability(self, codes, set_aside, log_space=log_space)
+        if probability == (-math.inf if log_space else 0.0):
+            raise ZeroProbabilityEvidence()
+
+    def enumerate_ask(self, query, evidence, prune=True):
         """
         Calculates the distribution of P(query | evidence) for every possible value query can take on.
 
@@ -113,6 +661,7 @@ class BayesNet:
             query (String) : The variable we wish to know the distribution of.
             evidence (Dict): The evidence specified.
                             Keys are names of variables, and values are a specific outcome value.
+            prune (Boolean) : Only enumerate over relevant_nodes instead of the whole net.
 
         Returns:
             Dictionary : A dictionary representing the entire distribution of P(query | evidence).
@@ -120,24 +669,448 @@ class BayesNet:
 
         """
 
-        distribution = {}
-        nodes = list(self.nodes.keys())
+        return self._enumerate_codes(query, self.encode_evidence(evidence), prune)
 
-        # Compute unnormalized probabilities using enumerate_all
-        for value in self.nodes[query]:
-            new_evidence = evidence.copy()
-            new_evidence[query] = value
+    def _enumerate_codes(self, query, codes, prune=True):
+        """
+        enumerate_ask for index-coded evidence (see encode_evidence).
+        """
+        distribution = {}
+        values = [-1] * len(self.node_index)
+        for var, value_index in codes.items():
+            values[self.node_index[var]] = value_index
 
-            prob = self.enumerate_all(nodes, new_evidence, index=0)
+        # Compute unnormalized probabilities for every query value in one enumeration walk
+        if prune:
+            self._check_set_aside(query, {var: value_index for var, value_index in codes.items() if var != query})
+            order = [self.node_index[var] for var in self.relevant_nodes(query, codes)]
+        else:
+            order = self._topological
+        query_level = order.index(self.node_index[query])
+        probabilities = self._enumerate_iterative(order, values, query_level=query_level)
+        for value, prob in zip(self.nodes[query], probabilities):
             distribution[value] = prob
 
         # Normalize dict
         total = sum(distribution.values())
+        if total == 0:
+            raise ZeroProbabilityEvidence()
         for value in distribution:
             distribution[value] = distribution[value] / total
 
         return distribution
 
+    def default_method(self):
+        """
+        The inference method configured for this net (see the inference argument of the constructor).
+        """
+        return (self.inference or {}).get("method", "ve")
+
+    def infer(self, query, evidence, method=None, prune=True, log_space=None):
+        """
+        Calculates the distribution of P(query | evidence) with the chosen inference method.
+
+        Args:
+            query (String) : The variable we wish to know the distribution of.
+            evidence (Dict): The evidence specified.
+                            Keys are names of variables, and values are a specific outcome value.
+            method (String) : "ve" for variable elimination, "jt" for the junction tree,
+                              "enumerate" for enumerate_ask, "lw" or "gibbs" for the approximate
+                              samplers (see approximate_ask, the sampler options come from the
+                              net's inference config). Defaults to the net's default_method.
+            prune (Boolean) : Run "ve", "enumerate" and the samplers on relevant_nodes only. The
+                              junction tree is compiled for the whole net and is never pruned.
+            log_space (Boolean) : Run "ve" on log probabilities (defaults to the net's log_space).
+                                  The samplers always weight in log space and ignore it.
+                                  Products of many small probabilities then cannot underflow to 0;
+                                  the posterior agrees with the plain float64 one to about 1e-15
+                                  relative error wherever that one does not underflow.
+
+        Returns:
+            Dictionary : Same as enumerate_ask, keys are the possible outcomes of query,
+                        values are the probabilities of each outcome.
+
+        Raises:
+            ZeroProbabilityEvidence : If the evidence has probability zero (a ZeroDivisionError).
+
+        """
+        return self.infer_codes(query, self.encode_evidence(evidence), method, prune, log_space)
+
+    def infer_codes(self, query, codes, method=None, prune=True, log_space=None):
+        """
+        infer for index-coded evidence (see encode_evidence), so callers that already hold
+        value indices skip looking every value up again.
+        """
+        if method is None:
+            method = self.default_method()
+        if log_space is None:
+            log_space = self.log_space
+        if log_space and method in ("jt", "enumerate"):
+            raise ValueError("log_space is only supported with method='ve'")
+
+        if method == "enumerate":
+            return self._enumerate_codes(query, codes, prune=prune)
+        if method in SAMPLERS:
+            options = {}
+            if method == self.default_method():
+                options = {key: value for key, value in self.inference.items() if key != "method"}
+            return self._sample(query, codes, method, prune, options)["posterior"]
+        if method not in ("ve", "jt"):
+            raise ValueError(f"unknown inference method {method!r}")
+
+        # like enumerate_ask, evidence on the query variable itself is overridden
+        codes = {var: value_index for var, value_index in codes.items() if var != query}
+
+        if method == "ve":
+            nodes = None
+            if prune:
+                self._check_set_aside(query, codes, log_space)
+                nodes = self.relevant_nodes(query, codes)
+            probabilities = variable_elimination(self, query, codes, nodes=nodes, log_space=log_space)
+        else:
+            probabilities = self.compile_junction_tree().calibrate(codes)[query]
+
+        if log_space:
+            log_total = logsumexp(probabilities)
+            if log_total == -math.inf:
+                raise ZeroProbabilityEvidence()
+            return {value: math.exp(log_prob - log_total)
+                    for value, log_prob in zip(self.nodes[query], probabilities)}
+
+        total = sum(probabilities)
+        if total == 0:
+            raise ZeroProbabilityEvidence()
+
+        distribution = {}
+        for value, prob in zip(self.nodes[query], probabilities):
+            distribution[value] = prob / total
+        return distribution
+
+    def cached_infer(self, query, evidence, method=None):
+        """
+        Same as infer, but answers repeated (query, evidence) pairs from the LRU posterior cache.
+
+        Returns:
+            Dictionary : A fresh copy of the distribution, safe for the caller to modify.
+        """
+        if method is None:
+            method = self.default_method()
+        key = PosteriorCache.key(query, evidence, (method, self.log_space))
+        distribution = self.cache.get(key)
+        if distribution is None:
+            distribution = self.infer(query, evidence, method)
+            self.cache.put(key, distribution)
+        return dict(distribution)
+
+    def cached_infer_encoded(self, query, pairs, method=None):
+        """
+        Same as cached_infer, for evidence already encoded by encode_pairs. The cache key is
+        built from the integer pairs, so no value string is hashed or looked up again.
+        """
+        if method is None:
+            method = self.default_method()
+        key = (query, (method, self.log_space), tuple(sorted(pairs)))
+        distribution = self.cache.get(key)
+        if distribution is None:
+            distribution = self.infer_codes(query, self.codes_from_pairs(pairs), method)
+            self.cache.put(key, distribution)
+        return dict(distribution)
+
+    def information_value(self, query, evidence, candidates=None):
+        """
+        How much observing each candidate variable is expected to tell about query, given the
+        evidence so far: for deciding which signal is worth looking up next.
+
+        Args:
+            query (String) : The variable we wish to know the distribution of.
+            evidence (Dict): The evidence specified.
+                            Keys are names of variables, and values are a specific outcome value.
+            candidates (List[String]) : Variables that could be observed next. Defaults to the
+                                        parents of query that are not in evidence.
+
+        Returns:
+            Dictionary : {candidate: {"entropy_reduction": ..., "expected_change": ...}}, see
+                         information_value_encoded.
+        """
+        return {var: {"entropy_reduction": gain, "expected_change": change}
+                for var, (gain, change) in self.information_value_encoded(
+                    query, self.encode_pairs(evidence), candidates).items()}
+
+    def information_value_encoded(self, query, pairs, candidates=None):
+        """
+        information_value for evidence encoded by encode_pairs. Every posterior goes through
+        cached_infer_encoded, so cases that share an evidence pattern share the work.
+
+        For a candidate X with values x:
+            entropy_reduction = H(query | e) - sum_x P(x | e) H(query | e, x), in bits
+                                (the mutual information of query and X given e)
+            expected_change   = sum_x P(x | e) TV(P(query | e, x), P(query | e)), the expected
+                                total variation distance; for a binary query, the expected
+                                absolute change of P(query = value)
+
+        Returns:
+            Dictionary : {candidate: (entropy_reduction, expected_change)}, with candidates that
+                         are already observed (or the query itself) left out.
+
+        Raises:
+            ZeroProbabilityEvidence : If the evidence has probability zero.
+        """
+        observed = {self.node_names[node] for node, _ in pairs}
+        if candidates is None:
+            candidates = self.parents[query]
+        candidates = [var for var in candidates if var != query and var not in observed]
+
+        prior = self.cached_infer_encoded(query, pairs)
+        entropy = _entropy(prior.values())
+        values = {}
+        for var in candidates:
+            node = self.node_index[var]
+            outcome = self.cached_infer_encoded(var, pairs)
+            gain = entropy
+            change = 0.0
+            for value_index, value in enumerate(self.nodes[var]):
+                weight = outcome[value]
+                if weight <= 0.0:
+                    continue
+                posterior = self.cached_infer_encoded(query, pairs + ((node, value_index),))
+                gain -= weight * _entropy(posterior.values())
+                change += weight * 0.5 * sum(abs(posterior[v] - prior[v]) for v in prior)
+            values[var] = (max(gain, 0.0), change)
+        return values
+
+    def approximate_ask(self, query, evidence, method="lw", prune=True, **options):
+        """
+        Estimates P(query | evidence) by sampling, for nets too large for exact inference.
+
+        Args:
+            query (String) : The variable we wish to know the distribution of.
+            evidence (Dict): The evidence specified.
+                            Keys are names of variables, and values are a specific outcome value.
+            method (String) : "lw" for likelihood weighting, "gibbs" for the Gibbs sampler.
+            prune (Boolean) : Only sample relevant_nodes.
+            options : Passed to the sampler, e.g. samples (budget), target_se (stop once every
+                      standard error is at most this) and seed. See sampling.py.
+
+        Returns:
+            Dictionary : "posterior" (same format as enumerate_ask), "stderr" and "interval"
+                         (95% confidence interval) per value, and the number of "samples" used.
+
+        Raises:
+            ZeroProbabilityEvidence : If no sample is consistent with the evidence.
+        """
+        return self._sample(query, self.encode_evidence(evidence), method, prune, options)
+
+    def _sample(self, query, codes, method, prune, options):
+        if method not in SAMPLERS:
+            raise ValueError(f"unknown sampling method {method!r}")
+
+        codes = {var: value_index for var, value_index in codes.items() if var != query}
+        nodes = None
+        if prune:
+            self._check_set_aside(query, codes)
+            nodes = self.relevant_nodes(query, codes)
+        return SAMPLERS[method](self, query, codes, nodes=nodes, **options)
+
+    def compile_junction_tree(self, heuristic="min_fill"):
+        """
+        Builds the junction tree for this net once and caches it for every later query.
+
+        Returns:
+            JunctionTree : The compiled tree.
+        """
+        if self.junction_tree is None:
+            self.junction_tree = JunctionTree(self, heuristic)
+        return self.junction_tree
+
+    def marginals(self, evidence):
+        """
+        Calculates P(var | evidence) for every variable of the net with a single calibration
+        of the junction tree.
+
+        Args:
+            evidence (Dict): Keys are names of variables, and values are a specific outcome value.
+
+        Returns:
+            Dictionary : Keys are variables, values are distributions in the same format as enumerate_ask.
+        """
+        return self.compile_junction_tree().marginals(evidence)
+
+    def marginals_codes(self, codes):
+        """
+        marginals for index-coded evidence (see encode_evidence).
+        """
+        return self.compile_junction_tree().posteriors(codes)
+
+    def joint_array(self, max_size=MAX_JOINT_SIZE, dtype="float64"):
+        """
+        Builds the full joint distribution as a NumPy array with one axis per node (in node order),
+        by broadcasting every compiled CPT against the others. Cached after the first call
+        (the float32 version is cast from the cached float64 one).
+
+        Raises:
+            ValueError : If the joint would have more than max_size entries.
+        """
+        if np is None:
+            raise ImportError("batch inference requires numpy")
+        if self._joint is not None:
+            return self._joint.astype(dtype, copy=False)
+
+        order = list(self.nodes)
+        axis = {var: i for i, var in enumerate(order)}
+        shape = [self.cardinality[var] for var in order]
+
+        size = 1
+        for card in shape:
+            size *= card
+        if size > max_size:
+            raise ValueError(f"joint distribution has {size} entries (limit {max_size}), use infer instead")
+
+        joint = np.ones(shape)
+        for var in order:
+            family = self.parents[var] + [var]
+            table = np.asarray(self.cpt[var]).reshape([self.cardinality[v] for v in family])
+
+            # reorder the CPT axes to node order, then broadcast over the nodes outside the family
+            perm = sorted(range(len(family)), key=lambda i: axis[family[i]])
+            table = table.transpose(perm)
+            broadcast_shape = [1] * len(order)
+            for v in family:
+                broadcast_shape[axis[v]] = self.cardinality[v]
+            joint = joint * table.reshape(broadcast_shape)
+
+        self._joint = joint
+        return joint.astype(dtype, copy=False)
+
+    def encode_evidence_matrix(self, evidence_list, columns=None):
+        """
+        Encodes a list of evidence dicts into an N x K integer array for batch_query.
+
+        Args:
+            evidence_list (List[Dict]) : Evidence for each row, same format as enumerate_ask.
+            columns (List[String]) : Variable for each column, defaults to every node in node order.
+
+        Returns:
+            numpy.ndarray : Value indices, UNOBSERVED where a variable is missing from the evidence.
+        """
+        if np is None:
+            raise ImportError("batch inference requires numpy")
+        if columns is None:
+            columns = list(self.nodes)
+
+        matrix = np.full((len(evidence_list), len(columns)), UNOBSERVED, dtype=np.int32)
+        for row, evidence in enumerate(evidence_list):
+            codes = self.encode_evidence(evidence)
+            for col, var in enumerate(columns):
+                if var in codes:
+                    matrix[row, col] = codes[var]
+        return matrix
+
+    def encode_pairs_matrix(self, pairs_list):
+        """
+        Same as encode_evidence_matrix (every node a column, in node order), for evidence already
+        encoded by encode_pairs. The matrix is filled with one vectorized assignment.
+        """
+        if np is None:
+            raise ImportError("batch inference requires numpy")
+
+        rows = [row for row, pairs in enumerate(pairs_list) for _ in pairs]
+        flat = [pair for pairs in pairs_list for pair in pairs]
+        matrix = np.full((len(pairs_list), len(self.nodes)), UNOBSERVED, dtype=np.int32)
+        if flat:
+            columns, values = zip(*flat)
+            matrix[rows, list(columns)] = values
+        return matrix
+
+    def batch_query(self, query, evidence_matrix, columns=None, dtype=None):
+        """
+        Calculates P(query | evidence) for every row of an evidence matrix at once.
+
+        Rows are deduplicated first. The distinct evidence patterns are then scored in blocks of
+        about BATCH_BLOCK_ENTRIES / (largest CPT) patterns, by variable elimination over the CPTs
+        and one indicator vector per observed variable and pattern: every hidden variable is
+        summed out with one einsum over the factors that mention it, with an extra axis for the
+        patterns of the block. The joint distribution is never built, so memory is bounded by the
+        block and the largest intermediate factor, not by the number of patterns.
+
+        Args:
+            query (String) : The variable we wish to know the distribution of.
+            evidence_matrix (numpy.ndarray) : N x K array of value indices (see encode_evidence_matrix),
+                                              UNOBSERVED where a variable was not observed.
+            columns (List[String]) : Variable for each column, defaults to every node in node order.
+            dtype (String) : "float64" or "float32" (defaults to the net's batch_dtype). float32 halves
+                             memory traffic; every posterior stays within (n + m + 2) * 2**-24 relative
+                             error of the float64 result, for n nodes and m = joint size / |values of query|
+                             summed terms, as long as no product of CPT entries underflows float32 (about 1e-38).
+
+        Returns:
+            numpy.ndarray : N x |values of query| array of posteriors, columns ordered like self.nodes[query].
+                            Rows whose evidence has probability zero are NaN.
+
+        Raises:
+            ValueError : If the matrix has the wrong shape or a code out of range, or the net has
+                         more than MAX_BATCH_NODES nodes.
+        """
+        if np is None:
+            raise ImportError("batch inference requires numpy")
+        if columns is None:
+            columns = list(self.nodes)
+        if dtype is None:
+            dtype = self.batch_dtype
+
+        evidence_matrix = np.asarray(evidence_matrix)
+        if evidence_matrix.ndim != 2 or evidence_matrix.shape[1] != len(columns):
+            raise ValueError(f"evidence matrix must have shape (N, {len(columns)})")
+        if len(self.nodes) > MAX_BATCH_NODES:
+            raise ValueError(f"batch_query handles at most {MAX_BATCH_NODES} nodes, use infer instead")
+
+        patterns, inverse = np.unique(evidence_matrix, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        n_patterns = patterns.shape[0]
+
+        # einsum axis of every node, axis 0 runs over the patterns of a block
+        axis = {var: i + 1 for i, var in enumerate(self.nodes)}
+        cpts = [(np.asarray(self.cpt[var], dtype=dtype).reshape([self.cardinality[v] for v in family]),
+                 [axis[v] for v in family])
+                for var, family in ((var, self.parents[var] + [var]) for var in self.nodes)]
+        hidden = elimination_order([Factor.from_cpt(self, var) for var in self.nodes],
+                                   [var for var in self.order if var != query])
+
+        # the query column is overridden, like enumerate_ask does
+        observed = []
+        for col, var in enumerate(columns):
+            if var == query:
+                continue
+            codes = patterns[:, col]
+            if np.any(codes >= self.cardinality[var]):
+                raise ValueError(f"evidence code out of range for {var!r}")
+            observed.append((var, codes))
+
+        block = max(1, BATCH_BLOCK_ENTRIES // max(len(self.cpt[var]) for var in self.nodes))
+        table = np.empty((n_patterns, self.cardinality[query]), dtype=dtype)
+        for start in range(0, n_patterns, block):
+            stop = min(start + block, n_patterns)
+            # (array, axes) factors; the all-ones query factor gives the result its pattern axis
+            factors = list(cpts) + [(np.ones((stop - start, self.cardinality[query]), dtype=dtype), [0, axis[query]])]
+            for var, codes in observed:
+                codes = codes[start:stop]
+                indicator = np.ones((stop - start, self.cardinality[var]), dtype=dtype)
+                known = codes != UNOBSERVED
+                indicator[known] = 0.0
+                indicator[known, codes[known]] = 1.0
+                factors.append((indicator, [0, axis[var]]))
+
+            for var in hidden:
+                eliminated = axis[var]
+                used = [factor for factor in factors if eliminated in factor[1]]
+                factors = [factor for factor in factors if eliminated not in factor[1]]
+                kept = sorted({a for _, axes in used for a in axes} - {eliminated})
+                # one pass over the axes of the factors, the same work as a step of variable elimination
+                factors.append((np.einsum(*[x for factor in used for x in factor], kept), kept))
+            table[start:stop] = np.einsum(*[x for factor in factors for x in factor], [0, axis[query]])
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            posteriors = table / table.sum(axis=1, keepdims=True)
+        return posteriors[inverse]
 
 def main():
     bn = BayesNet("./nets/sprinkler.json")
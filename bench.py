@@ -0,0 +1,291 @@
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from BayesNet import BayesNet
+from fraud_review_prioritization import iter_cases, prioritize_cases
+
+# Benchmarks for BayesNet inference and case prioritization.
+# Run like test.py:  python bench.py -b b1 b4 --save bench.json --compare old_bench.json
+
+
+def synthetic_net(num_signals, seed=0):
+    """
+    Fraud-style net: num_signals binary root signals, all of them parents of a binary Fraud node.
+    The Fraud CPT has 2 ** num_signals rows.
+    """
+    rng = random.Random(seed)
+    signals = [f"Signal{i}" for i in range(num_signals)]
+
+    nodes = {var: ["F", "T"] for var in signals}
+    nodes["Fraud"] = ["F", "T"]
+    parents = {var: [] for var in signals}
+    parents["Fraud"] = list(signals)
+
+    tables = {}
+    for var in signals:
+        p = rng.uniform(0.05, 0.3)
+        tables[var] = [[[], [1.0 - p, p]]]
+
+    tables["Fraud"] = []
+    for row in range(2 ** num_signals):
+        assignment = ["T" if (row >> (num_signals - 1 - i)) & 1 else "F" for i in range(num_signals)]
+        p = min(0.02 + 0.9 * assignment.count("T") / num_signals * rng.uniform(0.5, 1.0), 0.95)
+        tables["Fraud"].append([assignment, [1.0 - p, p]])
+
+    return BayesNet.from_dict({"nodes": nodes, "parents": parents, "tables": tables})
+
+
+def synthetic_cases(bn, count, seed=0):
+    """
+    Cases observing each signal with probability 0.8, with random amounts.
+    """
+    rng = random.Random(seed)
+    signals = [var for var in bn.nodes if var != "Fraud"]
+    cases = []
+    for i in range(count):
+        evidence = {var: rng.choice(bn.nodes[var]) for var in signals if rng.random() < 0.8}
+        cases.append({"case_id": f"TXN-{i:07d}", "amount_usd": round(rng.uniform(1, 5000), 2), "evidence": evidence})
+    return cases
+
+
+def write_cases(cases, path, signals):
+    """
+    Writes cases in the format given by the extension of path (.json, .ndjson or .csv),
+    the formats read by iter_cases.
+    """
+    with open(path, "w", newline="") as file:
+        if path.endswith(".json"):
+            json.dump(cases, file)
+        elif path.endswith(".ndjson"):
+            for case in cases:
+                file.write(json.dumps(case) + "\n")
+        else:
+            writer = csv.writer(file)
+            writer.writerow(["case_id", "amount_usd"] + signals)
+            for case in cases:
+                writer.writerow([case["case_id"], case["amount_usd"]] + [case["evidence"].get(var, "") for var in signals])
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(int(q * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def measure(calls):
+    """
+    Times every call in calls, then repeats them once under tracemalloc for peak memory.
+
+    Returns:
+        Dict : ops_per_sec, p50_ms, p99_ms, peak_kb
+    """
+    latencies = []
+    start = time.perf_counter()
+    for call in calls:
+        t0 = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - t0)
+    total = time.perf_counter() - start
+
+    tracemalloc.start()
+    for call in calls:
+        call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "ops_per_sec": len(calls) / total if total else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "peak_kb": peak / 1024,
+    }
+
+
+def bench_query_prob(sizes, repeat, case_counts):
+    results = {}
+    for size in sizes:
+        bn = synthetic_net(size)
+        cases = synthetic_cases(bn, repeat)
+        calls = []
+        for case in cases:
+            evidence = {var: case["evidence"].get(var, "F") for var in bn.parents["Fraud"]}
+            calls.append(lambda evidence=evidence: bn.query_prob("Fraud", "T", evidence))
+        results[f"signals={size}"] = measure(calls)
+    return results
+
+
+def bench_enumerate_all(sizes, repeat, case_counts):
+    results = {}
+    for size in sizes:
+        bn = synthetic_net(size)
+        nodes = list(bn.nodes)
+        cases = synthetic_cases(bn, repeat)
+        calls = [lambda evidence=case["evidence"]: bn.enumerate_all(nodes, evidence) for case in cases]
+        results[f"signals={size}"] = measure(calls)
+    return results
+
+
+def bench_enumerate_ask(sizes, repeat, case_counts):
+    results = {}
+    for size in sizes:
+        bn = synthetic_net(size)
+        cases = synthetic_cases(bn, repeat)
+        calls = [lambda evidence=case["evidence"]: bn.enumerate_ask("Fraud", evidence) for case in cases]
+        results[f"signals={size}"] = measure(calls)
+    return results
+
+
+def bench_prioritize_cases(sizes, repeat, case_counts):
+    """
+    End to end: ops_per_sec is cases per second and peak_kb the peak of one prioritize_cases
+    call over each of case_counts cases; p50/p99 are per-case latencies of ranking repeat
+    cases one at a time.
+    """
+    results = {}
+    for size in sizes:
+        bn = synthetic_net(size)
+        latency = measure([lambda case=case: prioritize_cases(bn, [case]) for case in synthetic_cases(bn, repeat)])
+
+        for count in case_counts:
+            cases = synthetic_cases(bn, count)
+            # fresh net, so the posterior cache starts cold like a new CLI run
+            fresh = synthetic_net(size)
+            tracemalloc.start()
+            start = time.perf_counter()
+            prioritize_cases(fresh, cases)
+            total = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            stats = dict(latency)
+            stats["ops_per_sec"] = len(cases) / total if total else 0.0
+            stats["peak_kb"] = peak / 1024
+            results[f"signals={size},cases={count}"] = stats
+    return results
+
+
+def bench_read_cases(sizes, repeat, case_counts):
+    """
+    Reads generated case files of each of case_counts cases with iter_cases (a .json list goes
+    through load_cases). ops_per_sec is cases per second, p50/p99 the latency of each case
+    yielded (for .json the first one pays for parsing the whole file) and peak_kb the peak
+    of reading the file once. The nets have max(sizes) signals.
+    """
+    bn = synthetic_net(max(sizes))
+    signals = [var for var in bn.nodes if var != "Fraud"]
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for count in case_counts:
+            cases = synthetic_cases(bn, count)
+            for suffix in (".json", ".ndjson", ".csv"):
+                path = os.path.join(directory, f"cases-{count}{suffix}")
+                write_cases(cases, path, signals)
+
+                latencies = []
+                start = time.perf_counter()
+                reader = iter_cases(path)
+                while True:
+                    t0 = time.perf_counter()
+                    if next(reader, None) is None:
+                        break
+                    latencies.append(time.perf_counter() - t0)
+                total = time.perf_counter() - start
+
+                tracemalloc.start()
+                for _ in iter_cases(path):
+                    pass
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                latencies.sort()
+                results[f"cases={count},format={suffix[1:]}"] = {
+                    "ops_per_sec": len(latencies) / total if total else 0.0,
+                    "p50_ms": percentile(latencies, 0.50) * 1000,
+                    "p99_ms": percentile(latencies, 0.99) * 1000,
+                    "peak_kb": peak / 1024,
+                }
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns a line for every benchmark whose throughput dropped by more than threshold
+    (a fraction) against baseline.
+    """
+    regressions = []
+    for name, runs in results.items():
+        for label, stats in runs.items():
+            old = baseline.get(name, {}).get(label)
+            if not old or not old["ops_per_sec"]:
+                continue
+            change = stats["ops_per_sec"] / old["ops_per_sec"] - 1.0
+            if change < -threshold:
+                regressions.append(f"{name} [{label}]: {old['ops_per_sec']:.1f} -> {stats['ops_per_sec']:.1f} ops/s ({change:+.1%})")
+    return regressions
+
+
+if __name__ == "__main__":
+    # Define the mapping of benchmark names to benchmark functions
+    benchmarks = {"b1": bench_query_prob, "b2": bench_enumerate_all,
+                  "b3": bench_enumerate_ask, "b4": bench_prioritize_cases,
+                  "b5": bench_read_cases}
+
+    parser = argparse.ArgumentParser(description='Run inference and prioritization benchmarks with optional filtering')
+    parser.add_argument('-b', '--benchmarks', nargs='*',
+                        choices=benchmarks.keys(),
+                        help='Specify which benchmarks to run (e.g., -b b1 b4). If not specified, all benchmarks will run.')
+    parser.add_argument('--sizes', nargs='*', type=int, default=[4, 8, 12],
+                        help='Number of signal nodes in each synthetic net.')
+    parser.add_argument('--repeat', type=int, default=1000,
+                        help='Calls per inference benchmark, and cases ranked one at a time for prioritize_cases latencies.')
+    parser.add_argument('--case-counts', nargs='*', type=int, default=[1000, 10000],
+                        help='Number of cases in each prioritize_cases run and each generated case file.')
+    parser.add_argument('--save', type=str, default=None,
+                        help='Save results as JSON to this path.')
+    parser.add_argument('--compare', type=str, default=None,
+                        help='Compare against results saved earlier with --save.')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Allowed throughput drop against --compare before failing (0.2 = 20%%).')
+
+    args = parser.parse_args()
+
+    selected = args.benchmarks if args.benchmarks else list(benchmarks)
+    print(f"Running benchmarks for: {', '.join(selected)}")
+
+    results = {}
+    for key in selected:
+        function = benchmarks[key]
+        name = function.__name__
+        print(f"\n{'='*60}")
+        print(f"Running {name}")
+        print(f"{'='*60}")
+        results[name] = function(args.sizes, args.repeat, args.case_counts)
+        for label, stats in results[name].items():
+            print(f"{label:<28} {stats['ops_per_sec']:>12.1f} ops/s  p50={stats['p50_ms']:.4f}ms  "
+                  f"p99={stats['p99_ms']:.4f}ms  peak={stats['peak_kb']:.1f}KB")
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f"\nSaved results to: {args.save}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        print(f"\n{'='*60}")
+        if regressions:
+            print(f"⚠️  {len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"✔️  No regressions over {args.threshold:.0%} against {args.compare}")
@@ -0,0 +1,148 @@
+"""
+Binary compiled format for BayesNet, for fast startup on nets with large tables.
+
+Layout (all integers little-endian):
+
+    magic     4 bytes   b"BNC1"
+    length    uint32    size of the header in bytes
+    header    JSON      {"nodes", "parents", "inference", "byteorder", "cpt": {var: [offset, length]}}
+    padding   0-7 bytes so the data starts on an 8-byte boundary
+    data      float64   every compiled CPT back to back, offsets/lengths counted in floats
+
+The data block is exactly BayesNet.cpt (mixed-radix rows), so loading memory-maps the file
+and hands out read-only float views without parsing anything. The tables are still
+validated by BayesNet._compile, so a corrupted file fails at load time.
+
+Convert an existing JSON net with:
+
+    python compiled_net.py nets/books.json nets/books.bnc
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+MAGIC = b"BNC1"
+
+# File extension of compiled nets
+COMPILED_SUFFIX = ".bnc"
+
+
+def save_compiled(bn, path):
+    """
+    Writes a compiled BayesNet to path in the binary format.
+    """
+    layout = {}
+    data = array('d')
+    for var in bn.nodes:
+        layout[var] = [len(data), len(bn.cpt[var])]
+        data.extend(bn.cpt[var])
+
+    header = json.dumps({
+        "nodes": bn.nodes,
+        "parents": bn.parents,
+        "inference": bn.inference,
+        "byteorder": sys.byteorder,
+        "cpt": layout,
+    }).encode("utf-8")
+    padding = -(len(MAGIC) + 4 + len(header)) % 8
+
+    with open(path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(struct.pack("<I", len(header)))
+        file.write(header)
+        file.write(b"\0" * padding)
+        data.tofile(file)
+
+
+def load_compiled(bn, path):
+    """
+    Loads the binary format into bn (an empty BayesNet), memory-mapping the CPTs read-only.
+
+    Raises:
+        ValueError : If path is not a compiled net, or is truncated or corrupt.
+    """
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size < len(MAGIC) + 4:
+            raise ValueError(f"corrupt .bnc file {path}: too short for a header")
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    try:
+        header, start = _read_header(buffer, path)
+    except ValueError:
+        buffer.close()
+        raise
+
+    if header["byteorder"] == sys.byteorder:
+        floats = memoryview(buffer)[start:].cast('d')
+    else:
+        # written on a machine with the other byte order: fall back to a private swapped copy
+        floats = array('d')
+        floats.frombytes(buffer[start:])
+        floats.byteswap()
+
+    cpt = {var: floats[offset:offset + size] for var, (offset, size) in header["cpt"].items()}
+
+    # the mapping stays open for as long as the net holds views into it
+    bn._mapping = buffer
+    bn.data = None
+    bn.tables = None
+    bn.nodes = header["nodes"]
+    bn.parents = header["parents"]
+    if bn.inference is None:
+        bn.inference = header.get("inference")
+    bn._compile(cpt=cpt)
+
+
+def _read_header(buffer, path):
+    """
+    Parses and checks the header against the size of the file, before any float view is made.
+    Returns the header and the offset of the data block.
+    """
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a compiled Bayes net")
+    (length,) = struct.unpack_from("<I", buffer, len(MAGIC))
+    start = len(MAGIC) + 4
+    if start + length > len(buffer):
+        raise ValueError(f"corrupt .bnc file {path}: header of {length} bytes runs past the end of the file")
+    try:
+        header = json.loads(bytes(buffer[start:start + length]).decode("utf-8"))
+    except ValueError as error:
+        raise ValueError(f"corrupt .bnc file {path}: unreadable header ({error})") from None
+    if not isinstance(header, dict) or any(key not in header for key in ("nodes", "parents", "byteorder", "cpt")):
+        raise ValueError(f"corrupt .bnc file {path}: incomplete header")
+    start += length
+    start += -start % 8
+
+    size = len(buffer) - start
+    if size < 0 or size % 8:
+        raise ValueError(f"corrupt .bnc file {path}: data block of {size} bytes is not a whole number of floats")
+    floats = size // 8
+    sections = header["cpt"]
+    if not isinstance(sections, dict) or not isinstance(header["nodes"], dict) or set(sections) != set(header["nodes"]):
+        raise ValueError(f"corrupt .bnc file {path}: the tables do not match the nodes")
+    for var, section in sections.items():
+        if not (isinstance(section, list) and len(section) == 2 and all(type(n) is int for n in section)):
+            raise ValueError(f"corrupt .bnc file {path}: bad table entry for {var!r}")
+        offset, count = section
+        if offset < 0 or count < 0 or offset + count > floats:
+            raise ValueError(f"corrupt .bnc file {path}: table of {var!r} runs past the end of the file")
+    return header, start
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("usage: python compiled_net.py <net.json> <net.bnc>")
+        sys.exit(1)
+
+    from BayesNet import BayesNet
+
+    BayesNet(sys.argv[1]).save_compiled(sys.argv[2])
+    print(f"Saved compiled net to: {sys.argv[2]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Factors and variable elimination for BayesNet.
+
+A factor is a table over a list of variables, stored flat with the same mixed-radix layout
+the compiled CPTs use: the last variable varies fastest.
+"""
+
+import math
+from itertools import product
+
+
+class ZeroProbabilityEvidence(ZeroDivisionError):
+    """
+    Raised when the evidence has probability zero, so no posterior exists.
+    Subclasses ZeroDivisionError, which is what the plain normalization used to raise.
+    """
+
+    def __init__(self, message="evidence has probability zero"):
+        super().__init__(message)
+
+
+def logsumexp(values):
+    """
+    log(sum(exp(v) for v in values)) without underflow. Returns -inf when every value is -inf.
+    """
+    values = list(values)
+    top = max(values, default=-math.inf)
+    if top == -math.inf:
+        return -math.inf
+    return top + math.log(sum(math.exp(v - top) for v in values))
+
+
+class Factor:
+    def __init__(self, variables, cardinalities, values):
+        """
+        Args:
+            variables (List[String]) : Names of the variables the factor is defined over.
+            cardinalities (List[int]) : Number of values each variable can take on, same order.
+            values (List[float]) : Flat table of length prod(cardinalities), last variable fastest.
+        """
+        self.variables = list(variables)
+        self.cardinalities = list(cardinalities)
+        self.values = list(values)
+
+        self.strides = [0] * len(self.variables)
+        stride = 1
+        for i in range(len(self.variables) - 1, -1, -1):
+            self.strides[i] = stride
+            stride *= self.cardinalities[i]
+
+    @classmethod
+    def from_cpt(cls, bn, variable):
+        """
+        Builds the factor P(variable | parents) from a compiled BayesNet CPT.
+        The CPT is already laid out as parents (last fastest) followed by variable.
+        """
+        variables = bn.parents[variable] + [variable]
+        cardinalities = [bn.cardinality[v] for v in variables]
+        return cls(variables, cardinalities, bn.cpt[variable])
+
+    def _assignments(self):
+        return product(*[range(card) for card in self.cardinalities])
+
+    def reduce(self, codes):
+        """
+        Fixes every variable of the factor that appears in codes (variable -> value index)
+        and drops it from the factor.
+        """
+        observed = [v for v in self.variables if v in codes]
+        if not observed:
+            return self
+
+        offset = 0
+        kept = []
+        for var, card, stride in zip(self.variables, self.cardinalities, self.strides):
+            if var in codes:
+                offset += codes[var] * stride
+            else:
+                kept.append((var, card, stride))
+
+        reduced = Factor([k[0] for k in kept], [k[1] for k in kept], [])
+        for assignment in reduced._assignments():
+            index = offset
+            for value_index, (_, _, stride) in zip(assignment, kept):
+                index += value_index * stride
+            reduced.values.append(self.values[index])
+        return reduced
+
+    def observe(self, codes):
+        """
+        Zeroes every entry inconsistent with codes (variable -> value index).
+        Unlike reduce, the observed variables stay in the factor.
+        """
+        observed = [(stride, card, codes[var])
+                    for var, card, stride in zip(self.variables, self.cardinalities, self.strides)
+                    if var in codes]
+        if not observed:
+            return self
+
+        values = list(self.values)
+        for index in range(len(values)):
+            for stride, card, value_index in observed:
+                if (index // stride) % card != value_index:
+                    values[index] = 0.0
+                    break
+        return Factor(self.variables, self.cardinalities, values)
+
+    def log(self):
+        """
+        Returns the factor with every value replaced by its natural log (log(0) = -inf).
+        """
+        return Factor(self.variables, self.cardinalities,
+                      [math.log(v) if v > 0 else -math.inf for v in self.values])
+
+    def multiply(self, other, log_space=False):
+        """
+        Returns the pointwise product of two factors, over the union of their variables.
+        With log_space, both factors hold logs and the values are added instead.
+        """
+        variables = list(self.variables)
+        cardinalities = list(self.cardinalities)
+        for var, card in zip(other.variables, other.cardinalities):
+            if var not in variables:
+                variables.append(var)
+                cardinalities.append(card)
+
+        position = {var: i for i, var in enumerate(variables)}
+        self_map = [(position[v], s) for v, s in zip(self.variables, self.strides)]
+        other_map = [(position[v], s) for v, s in zip(other.variables, other.strides)]
+
+        result = Factor(variables, cardinalities, [])
+        for assignment in result._assignments():
+            a = 0
+            for pos, stride in self_map:
+                a += assignment[pos] * stride
+            b = 0
+            for pos, stride in other_map:
+                b += assignment[pos] * stride
+            if log_space:
+                result.values.append(self.values[a] + other.values[b])
+            else:
+                result.values.append(self.values[a] * other.values[b])
+        return result
+
+    def sum_out(self, variable, log_space=False):
+        """
+        Returns the factor with variable summed out.
+        With log_space, the factor holds logs and the sum is taken with logsumexp.
+        """
+        i = self.variables.index(variable)
+        card = self.cardinalities[i]
+        stride = self.strides[i]
+
+        result = Factor(self.variables[:i] + self.variables[i + 1:],
+                        self.cardinalities[:i] + self.cardinalities[i + 1:], [])
+
+        # everything left of variable is the outer block, everything right of it is the inner block
+        block = stride * card
+        for outer in range(0, len(self.values), block):
+            for inner in range(stride):
+                if log_space:
+                    result.values.append(logsumexp(
+                        self.values[outer + value_index * stride + inner] for value_index in range(card)))
+                    continue
+                total = 0.0
+                for value_index in range(card):
+                    total += self.values[outer + value_index * stride + inner]
+                result.values.append(total)
+        return result
+
+    def marginalize(self, keep):
+        """
+        Sums out every variable not in keep.
+        """
+        result = self
+        for var in self.variables:
+            if var not in keep:
+                result = result.sum_out(var)
+        return result
+
+
+def elimination_order(factors, hidden, heuristic="min_fill"):
+    """
+    Greedy elimination order over the interaction graph of factors.
+
+    Args:
+        factors (List[Factor]) : Factors that will be eliminated over.
+        hidden (List[String]) : Variables to eliminate, in topological order (used to break ties).
+        heuristic (String) : "min_fill" (fewest new edges) or "min_degree" (fewest neighbours).
+
+    Returns:
+        List[String] : hidden, reordered.
+    """
+    if heuristic not in ("min_fill", "min_degree"):
+        raise ValueError(f"unknown elimination heuristic {heuristic!r}")
+
+    neighbours = {}
+    for factor in factors:
+        for var in factor.variables:
+            neighbours.setdefault(var, set()).update(v for v in factor.variables if v != var)
+
+    def cost(var):
+        adjacent = neighbours.get(var, set())
+        if heuristic == "min_degree":
+            return len(adjacent)
+        adjacent = list(adjacent)
+        fill = 0
+        for i, a in enumerate(adjacent):
+            for b in adjacent[i + 1:]:
+                if b not in neighbours[a]:
+                    fill += 1
+        return fill
+
+    remaining = list(hidden)
+    order = []
+    while remaining:
+        # min() keeps the first of equal-cost variables, so ties follow topological order
+        var = min(remaining, key=cost)
+        remaining.remove(var)
+        order.append(var)
+
+        # connect the neighbours of var, then drop it from the graph
+        adjacent = neighbours.pop(var, set())
+        for a in adjacent:
+            neighbours[a].discard(var)
+            neighbours[a].update(b for b in adjacent if b != a)
+    return order
+
+
+def variable_elimination(bn, query, codes, heuristic="min_fill", nodes=None, log_space=False):
+    """
+    Computes the unnormalized distribution P(query, evidence) by variable elimination.
+
+    Args:
+        bn (BayesNet) : A compiled bayes net.
+        query (String) : The variable we wish to know the distribution of.
+        codes (Dict) : Index-coded evidence (see BayesNet.encode_evidence), not including query.
+        heuristic (String) : Elimination order heuristic, see elimination_order.
+        nodes (List[String]) : Only use the CPTs of these nodes (see BayesNet.relevant_nodes),
+                               defaults to every node of the net in topological order.
+        log_space (Boolean) : Work with log probabilities (sums of logs, logsumexp), so long
+                              products of small probabilities do not underflow to 0.
+
+    Returns:
+        List[float] : Unnormalized probabilities (log probabilities with log_space),
+                      indexed like bn.nodes[query].
+    """
+    if nodes is None:
+        nodes = bn.order
+    factors = _eliminate(bn, codes, nodes, [query], heuristic, log_space)
+
+    # only the query variable (or nothing, for fully reduced factors) is left
+    one = 0.0 if log_space else 1.0
+    result = Factor([query], [bn.cardinality[query]], [one] * bn.cardinality[query])
+    for factor in factors:
+        result = result.multiply(factor, log_space)
+    return result.values
+
+
+def evidence_probability(bn, codes, nodes, heuristic="min_fill", log_space=False):
+    """
+    Computes the product of the CPTs of nodes, reduced by the evidence and summed over every
+    variable that is not observed. For the nodes relevant_nodes sets aside this is the constant
+    factor they contribute to P(evidence), and 0 exactly when that evidence is impossible.
+
+    Returns:
+        float : The probability (log probability with log_space).
+    """
+    one = 0.0 if log_space else 1.0
+    result = Factor([], [], [one])
+    for factor in _eliminate(bn, codes, nodes, [], heuristic, log_space):
+        result = result.multiply(factor, log_space)
+    return result.values[0]
+
+
+def _eliminate(bn, codes, nodes, keep, heuristic, log_space):
+    """
+    Reduces the CPTs of nodes by codes and sums out every variable not in codes or keep.
+    Returns the factors left, which only involve the variables of keep.
+    """
+    factors = [Factor.from_cpt(bn, var).reduce(codes) for var in nodes]
+    if log_space:
+        factors = [factor.log() for factor in factors]
+    hidden = [var for var in nodes if var not in keep and var not in codes]
+
+    for var in elimination_order(factors, hidden, heuristic):
+        involved = [f for f in factors if var in f.variables]
+        factors = [f for f in factors if var not in f.variables]
+
+        joint = involved[0]
+        for factor in involved[1:]:
+            joint = joint.multiply(factor, log_space)
+        factors.append(joint.sum_out(var, log_space))
+    return factors
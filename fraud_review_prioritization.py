@@ -1,8 +1,22 @@
 import argparse
+import csv
+import hashlib
+import heapq
 import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+from array import array
+from collections import Counter, deque
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-from BayesNet import BayesNet
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from BayesNet import BayesNet, ZeroProbabilityEvidence
+from compiled_net import COMPILED_SUFFIX
+from instrumentation import Profiler, instrument_net, net_counters
+from scoring_policies import DEFAULT_AMOUNT_CAP, DEFAULT_POLICY, SCORING_POLICIES, ScoringPolicy
 
 # -----------------------------
 # 1) A small default Fraud Bayes Net
@@ -104,10 +118,22 @@ def ensure_net_file(net_path: str) -> str:
     # Create the file if it doesn't exist
     path.parent.mkdir(parents=True, exist_ok=True)
     data = build_default_fraud_net_json()
-    path.write_text(json.dumps(data, indent=2))
+    if path.suffix == COMPILED_SUFFIX:
+        BayesNet.from_dict(data).save_compiled(str(path))
+    else:
+        path.write_text(json.dumps(data, indent=2))
     return str(path)
 
 
+def load_net(net_path: str, **options: Any) -> BayesNet:
+    """
+    Loads a JSON net, or a binary compiled one (see compiled_net.py) when the path ends in .bnc.
+    """
+    if Path(net_path).suffix == COMPILED_SUFFIX:
+        return BayesNet.load_compiled(net_path, **options)
+    return BayesNet(net_path, **options)
+
+
 # -----------------------------
 # 2) Load cases (or use defaults)
 # -----------------------------
@@ -161,10 +187,47 @@ def load_cases(cases_path: Optional[str]) -> List[Dict[str, Any]]:
     return cases
 
 
+def iter_cases(cases_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yields cases one at a time, so memory use does not depend on the size of the file.
+
+    Supported formats (by file extension):
+    - .ndjson / .jsonl: one case object per line, same shape as in load_cases
+    - .csv: header with case_id, amount_usd and one column per evidence variable;
+            an empty cell means the variable was not observed
+    - anything else is read with load_cases (a JSON list has to be parsed whole)
+    """
+    suffix = Path(cases_path).suffix.lower()
+
+    if suffix in (".ndjson", ".jsonl"):
+        with open(cases_path, "r") as file:
+            for line in file:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+    elif suffix == ".csv":
+        with open(cases_path, "r", newline="") as file:
+            for record in csv.DictReader(file):
+                amount = record.pop("amount_usd", "")
+                case = {
+                    "case_id": record.pop("case_id", "UNKNOWN"),
+                    "amount_usd": float(amount) if amount else None,
+                }
+                if "merchant_id" in record:
+                    case["merchant_id"] = record.pop("merchant_id") or None
+                case["evidence"] = {var: val for var, val in record.items() if val}
+                yield case
+
+    else:
+        yield from load_cases(cases_path)
+
+
 def validate_evidence(bn: BayesNet, evidence: Dict[str, str]) -> Dict[str, str]:
     """
     Keeps only valid evidence keys and values.
     This prevents typos from silently producing nonsense.
+    The pipeline itself uses EvidenceEncoder, which also counts what it drops.
     """
     cleaned: Dict[str, str] = {}
     for var, val in evidence.items():
@@ -175,6 +238,159 @@ def validate_evidence(bn: BayesNet, evidence: Dict[str, str]) -> Dict[str, str]:
         cleaned[var] = val
     return cleaned
 
+# A case with its evidence encoded: (case_id, amount_usd, ((node index, value index), ...))
+CompactCase = Tuple[str, Any, Tuple[Tuple[int, int], ...]]
+
+# Most distinct evidence patterns an EvidenceEncoder shares between cases (see EvidenceEncoder.encode)
+MAX_SHARED_PATTERNS = 1 << 16
+
+
+class EvidenceEncoder:
+    """
+    Validates and integer-encodes case evidence once, at ingestion.
+
+    Evidence becomes (node index, value index) pairs in the order given (see BayesNet.encode_pairs),
+    and everything downstream (inference, the posterior cache, --compile lookups, --batch matrices
+    and worker processes) consumes that form. Unknown variables and values are dropped like
+    validate_evidence does, but counted in dropped_keys (per unknown key) and dropped_values
+    (per variable) instead of vanishing silently.
+
+    Cases with the same evidence share one pairs tuple (up to MAX_SHARED_PATTERNS patterns), so
+    a million cases over a few hundred patterns hold a few hundred tuples.
+    """
+
+    def __init__(self, bn: BayesNet):
+        self.bn = bn
+        self.lookup = {var: (bn.node_index[var], bn.value_index[var]) for var in bn.nodes}
+        self.patterns: Dict[Tuple[Tuple[int, int], ...], Tuple[Tuple[int, int], ...]] = {}
+        self.cases = 0
+        self.dropped_keys: Counter = Counter()
+        self.dropped_values: Counter = Counter()
+
+    def encode(self, evidence: Dict[str, str]) -> Tuple[Tuple[int, int], ...]:
+        lookup = self.lookup
+        pairs = []
+        for var, val in evidence.items():
+            entry = lookup.get(var)
+            if entry is None:
+                self.dropped_keys[var] += 1
+                continue
+            try:
+                value_index = entry[1].get(val)
+            except TypeError:  # unhashable, e.g. a list
+                value_index = None
+            if value_index is None:
+                self.dropped_values[var] += 1
+                continue
+            pairs.append((entry[0], value_index))
+        pairs = tuple(pairs)
+        shared = self.patterns.get(pairs)
+        if shared is not None:
+            return shared
+        if len(self.patterns) < MAX_SHARED_PATTERNS:
+            self.patterns[pairs] = pairs
+        return pairs
+
+    def encode_case(self, case: Dict[str, Any]) -> CompactCase:
+        evidence = case.get("evidence", {})
+        if not isinstance(evidence, dict):
+            evidence = {}
+        self.cases += 1
+        return (str(case.get("case_id", "UNKNOWN")), case.get("amount_usd", None), self.encode(evidence))
+
+    def encode_columns(self, cases: Iterable[Dict[str, Any]]) -> "CaseColumns":
+        columns = CaseColumns()
+        for case in cases:
+            columns.append(self.encode_case(case), case.get("merchant_id"))
+        return columns
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cases": self.cases,
+            "dropped_keys": dict(self.dropped_keys),
+            "dropped_values": dict(self.dropped_values),
+        }
+
+
+def decode_evidence(bn: BayesNet, pairs: Tuple[Tuple[int, int], ...]) -> Dict[str, str]:
+    """
+    The evidence dict of encoded pairs, in their order (what validate_evidence would have returned).
+    """
+    names = bn.node_names
+    return {names[node]: bn.nodes[names[node]][value] for node, value in pairs}
+
+
+class CaseColumns:
+    """
+    Encoded cases and their scores, stored column by column instead of one dict per case.
+
+    case_ids, amounts and merchants are the objects read from the input, pairs the encoder's
+    (shared) evidence tuples, and p_fraud / scores are float arrays filled in by score_columns
+    (a NaN p_fraud marks evidence with probability zero). A case costs about a tenth of its scored
+    dict row; rows are only built at the output edge, by row and rows. net_version, when set, is
+    the version of the net (see NetHandle) every case was scored with.
+    """
+
+    def __init__(self):
+        self.case_ids: List[str] = []
+        self.amounts: List[Any] = []
+        self.merchants: List[Optional[str]] = []
+        self.pairs: List[Tuple[Tuple[int, int], ...]] = []
+        self.p_fraud = array('d')
+        self.scores = array('d')
+        # rounded posteriors per case, only with explain
+        self.posteriors: Optional[List[Optional[Dict[str, Dict[str, float]]]]] = None
+        # value of information, only after recommend_signals: (entropy reduction, p_fraud change)
+        # per signal, shared by every case with the same evidence, and score changes per signal
+        self.signal_values: Optional[List[Dict[str, Tuple[float, float]]]] = None
+        self.score_changes: Dict[str, array] = {}
+        self.next_signals: List[Optional[str]] = []
+        self.net_version: Optional[str] = None
+
+    def append(self, record: CompactCase, merchant_id: Optional[str] = None) -> None:
+        case_id, amount, pairs = record
+        self.case_ids.append(case_id)
+        self.amounts.append(amount)
+        self.merchants.append(merchant_id)
+        self.pairs.append(pairs)
+
+    def __len__(self) -> int:
+        return len(self.case_ids)
+
+    def row(self, bn: BayesNet, i: int) -> Dict[str, Any]:
+        """
+        The scored dict row of case i, exactly as score_cases returns it.
+        """
+        p = self.p_fraud[i]
+        row = {"case_id": self.case_ids[i], "amount_usd": self.amounts[i]}
+        if self.merchants[i] is not None:
+            row["merchant_id"] = self.merchants[i]
+        row["p_fraud"] = p if p == p else None
+        row["priority_score"] = self.scores[i]
+        if self.net_version is not None:
+            row["net_version"] = self.net_version
+        row["evidence"] = decode_evidence(bn, self.pairs[i])
+        if p != p:
+            # No posterior exists, so the case is flagged and sinks to the bottom of the ranking.
+            row["error"] = "evidence has probability zero"
+        elif self.posteriors is not None:
+            row["posteriors"] = self.posteriors[i]
+        if self.signal_values is not None:
+            row["next_signal"] = self.next_signals[i]
+            row["signal_values"] = {
+                var: {"entropy_reduction": round(gain, 4), "p_fraud_change": round(change, 4),
+                      "score_change": round(self.score_changes[var][i], 4)}
+                for var, (gain, change) in self.signal_values[i].items()
+            }
+        return row
+
+    def rows(self, bn: BayesNet, indices: Optional[Iterable[int]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the dict rows of the cases at indices (all of them, in input order, by default).
+        """
+        for i in range(len(self)) if indices is None else indices:
+            yield self.row(bn, i)
+
 
 # -----------------------------
 # 3) Scoring + Prioritization
@@ -183,57 +399,578 @@ def validate_evidence(bn: BayesNet, evidence: Dict[str, str]) -> Dict[str, str]:
 def fraud_probability(bn: BayesNet, evidence: Dict[str, str]) -> float:
     """
     Returns P(Fraud='T' | evidence).
-    Uses enumerate_ask from your BayesNet implementation.
+    Uses the net's inference method (BayesNet.default_method): variable elimination unless the
+    net is configured for a sampler, which keeps very large nets within a latency budget.
+    Repeated evidence patterns are answered from the net's posterior cache.
     """
-    dist = bn.enumerate_ask("Fraud", evidence)
+    return fraud_probability_encoded(bn, bn.encode_pairs(evidence))
+
+
+def fraud_probability_encoded(bn: BayesNet, pairs: Tuple[Tuple[int, int], ...]) -> float:
+    """
+    fraud_probability for evidence encoded by EvidenceEncoder / BayesNet.encode_pairs.
+    """
+    dist = bn.cached_infer_encoded("Fraud", pairs)
     return float(dist.get("T", 0.0))
 
 
+def fraud_probabilities(bn: BayesNet, evidence_list: List[Dict[str, str]]) -> List[float]:
+    """
+    Returns P(Fraud='T' | evidence) for many cases at once.
+    Uses BayesNet.batch_query, so the whole list is a handful of NumPy operations.
+    """
+    return fraud_probabilities_encoded(bn, [bn.encode_pairs(evidence) for evidence in evidence_list])
+
+
+def fraud_probabilities_encoded(bn: BayesNet, pairs_list: List[Tuple[Tuple[int, int], ...]]) -> List[float]:
+    """
+    fraud_probabilities for encoded evidence (see EvidenceEncoder).
+    """
+    posteriors = bn.batch_query("Fraud", bn.encode_pairs_matrix(pairs_list))
+    return posteriors[:, bn.nodes["Fraud"].index("T")].tolist()
+
+
 def priority_score(p_fraud: float, amount_usd: Optional[float]) -> float:
     """
-    Simple prioritization score:
+    Simple prioritization score (the default "impact" policy, see scoring_policies.py):
     - risk is primary driver
     - amount adds a small multiplier to surface high-impact cases
+    The pipeline scores whole columns at once with ScoringPolicy.score_batch instead.
+    """
+    return DEFAULT_POLICY.score(p_fraud, amount_usd)
+
+
+def node_posteriors(bn: BayesNet, evidence: Dict[str, str]) -> Dict[str, Dict[str, float]]:
+    """
+    Returns P(var | evidence) for every node, from a single junction tree calibration.
+    Observed nodes are left out since their posterior is just the evidence.
+    """
+    return node_posteriors_encoded(bn, bn.encode_pairs(evidence))
+
+
+def node_posteriors_encoded(bn: BayesNet, pairs: Tuple[Tuple[int, int], ...]) -> Dict[str, Dict[str, float]]:
+    """
+    node_posteriors for encoded evidence (see EvidenceEncoder).
+    Evidence on Fraud itself (e.g. labelled history) is ignored, like every other scoring path
+    does, so the result always holds the posterior of Fraud that p_fraud is read from.
+    """
+    fraud = bn.node_index["Fraud"]
+    codes = bn.codes_from_pairs([pair for pair in pairs if pair[0] != fraud])
+    marginals = bn.marginals_codes(codes)
+    return {var: dist for var, dist in marginals.items() if var not in codes}
+
+
+def score_cases(
+    bn: BayesNet,
+    cases: Iterable[Dict[str, Any]],
+    explain: bool = False,
+    batch: bool = False,
+    posterior_table: Optional["PosteriorTable"] = None,
+    encoder: Optional[EvidenceEncoder] = None,
+    policy: Optional[ScoringPolicy] = None,
+    net_version: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Scores cases, keeping their input order.
+    With explain=True, every scored case also carries the posteriors of all unobserved nodes,
+    taken from the same junction tree calibration that produces p_fraud.
+    With batch=True, all probabilities are computed in one fraud_probabilities call.
+    With a posterior_table (see --compile), p_fraud is a single table lookup per case.
+    policy turns p_fraud and the amount into priority_score (DEFAULT_POLICY if None).
+    net_version, if given, is recorded on every row (see NetHandle.acquire).
+    The evidence is encoded once by encoder (a fresh EvidenceEncoder if not given), and
+    scoring works on the encoded form, see score_columns.
+    """
+    if encoder is None:
+        encoder = EvidenceEncoder(bn)
+    columns = score_columns(bn, encoder.encode_columns(cases), explain=explain, batch=batch,
+                            posterior_table=posterior_table, policy=policy, net_version=net_version)
+    return list(columns.rows(bn))
+
+
+def score_columns(
+    bn: BayesNet,
+    columns: CaseColumns,
+    explain: bool = False,
+    batch: bool = False,
+    posterior_table: Optional["PosteriorTable"] = None,
+    policy: Optional[ScoringPolicy] = None,
+    net_version: Optional[str] = None,
+) -> CaseColumns:
+    """
+    Fills in p_fraud and scores of encoded cases (see score_cases for the options) and returns columns.
     """
-    if amount_usd is None:
-        return p_fraud
+    probabilities = array('d')
+    columns.posteriors = [] if explain else None
+    columns.net_version = net_version
+
+    batch_probabilities = None
+    if batch and not explain:
+        batch_probabilities = fraud_probabilities_encoded(bn, columns.pairs)
+
+    for i, (amount, pairs) in enumerate(zip(columns.amounts, columns.pairs)):
+        posteriors = None
+        try:
+            if explain:
+                posteriors = node_posteriors_encoded(bn, pairs)
+                p = float(posteriors["Fraud"].get("T", 0.0))
+            elif batch_probabilities is not None:
+                p = batch_probabilities[i]
+            elif posterior_table is not None:
+                p = posterior_table.fraud_probability_encoded(bn, pairs)
+            else:
+                p = fraud_probability_encoded(bn, pairs)
+        except ZeroProbabilityEvidence:
+            p = float("nan")
+
+        # NaN: the evidence is impossible under the net (batch_query reports it this way too)
+        probabilities.append(p)
+        if explain:
+            columns.posteriors.append(None if p != p else {
+                var: {val: round(prob, 4) for val, prob in dist.items()}
+                for var, dist in posteriors.items()
+            })
 
-    # Beginner-friendly: mild log scaling so $50 vs $5000 doesn't explode the score
-    # log1p keeps it defined for amount=0
-    import math
-    impact = math.log1p(max(amount_usd, 0.0))  # ~3.9 for $50, ~8.5 for $5000
-    return p_fraud * (1.0 + 0.15 * impact)
+    apply_policy(columns, probabilities, policy)
+    return columns
+
+
+def apply_policy(columns: CaseColumns, probabilities: Iterable[float], policy: Optional[ScoringPolicy] = None) -> None:
+    """
+    Sets p_fraud and scores of columns from the unrounded probabilities, scoring every case in one
+    ScoringPolicy.score_batch call (DEFAULT_POLICY if policy is None).
+    Both are rounded to 4 places, like the rows of score_cases, so rankings tie the same way;
+    cases with a NaN probability score 0.
+    """
+    if policy is None:
+        policy = DEFAULT_POLICY
+    probabilities = array('d', probabilities)
+    scores = policy.score_batch(probabilities, columns.amounts, columns.merchants)
+    columns.p_fraud = array('d', [round(p, 4) if p == p else p for p in probabilities])
+    columns.scores = array('d', [round(score, 4) if p == p else 0.0 for p, score in zip(probabilities, scores)])
+
+
+def rescore_columns(columns: CaseColumns, policy: ScoringPolicy) -> CaseColumns:
+    """
+    Re-scores already scored columns under another policy without running inference again.
+    Scores come from the rounded p_fraud, so they can differ from a fresh run in the 4th place.
+    """
+    apply_policy(columns, columns.p_fraud, policy)
+    return columns
+
+
+def load_ranked_columns(bn: BayesNet, path: str, encoder: Optional[EvidenceEncoder] = None) -> CaseColumns:
+    """
+    Reads a ranking written by --output back into scored columns, e.g. for rescore_columns.
+    """
+    if encoder is None:
+        encoder = EvidenceEncoder(bn)
+    rows = load_cases(path)
+    columns = encoder.encode_columns(rows)
+    columns.p_fraud = array('d', [float("nan") if row.get("p_fraud") is None else row["p_fraud"] for row in rows])
+    columns.scores = array('d', [row.get("priority_score", 0.0) for row in rows])
+    if any("posteriors" in row for row in rows):
+        columns.posteriors = [row.get("posteriors") for row in rows]
+    return columns
 
 
 def prioritize_cases(
     bn: BayesNet,
     cases: List[Dict[str, Any]],
+    explain: bool = False,
+    batch: bool = False,
+    posterior_table: Optional["PosteriorTable"] = None,
+    top: Optional[int] = None,
+    encoder: Optional[EvidenceEncoder] = None,
+    policy: Optional[ScoringPolicy] = None,
 ) -> List[Dict[str, Any]]:
-    ranked: List[Dict[str, Any]] = []
+    """
+    Scores and ranks cases by priority_score (highest first), see score_cases for the options.
+    With top, only the best top cases are returned, selected with a bounded heap in O(N log top);
+    the result is the same as the first top entries of the full ranking, ties included.
+    """
+    columns, order = prioritize_columns(bn, cases, explain=explain, batch=batch, posterior_table=posterior_table,
+                                        top=top, encoder=encoder, policy=policy)
+    return list(columns.rows(bn, order))
 
-    for c in cases:
-        case_id = str(c.get("case_id", "UNKNOWN"))
-        amount = c.get("amount_usd", None)
-        evidence = c.get("evidence", {})
-        if not isinstance(evidence, dict):
-            evidence = {}
 
-        evidence = validate_evidence(bn, evidence)
-        p = fraud_probability(bn, evidence)
-        score = priority_score(p, amount)
+def prioritize_columns(
+    bn: BayesNet,
+    cases: Iterable[Dict[str, Any]],
+    explain: bool = False,
+    batch: bool = False,
+    posterior_table: Optional["PosteriorTable"] = None,
+    top: Optional[int] = None,
+    encoder: Optional[EvidenceEncoder] = None,
+    policy: Optional[ScoringPolicy] = None,
+) -> Tuple[CaseColumns, array]:
+    """
+    prioritize_cases without building dict rows: returns the scored columns and the indices of
+    the ranked cases, highest first. The CLI turns only what it prints or writes into rows.
+    """
+    if encoder is None:
+        encoder = EvidenceEncoder(bn)
+    columns = score_columns(bn, encoder.encode_columns(cases), explain=explain, batch=batch,
+                            posterior_table=posterior_table, policy=policy)
+    return columns, rank_columns(columns, top=top)
+
 
-        ranked.append(
-            {
-                "case_id": case_id,
-                "amount_usd": amount,
-                "p_fraud": round(p, 4),
-                "priority_score": round(score, 4),
-                "evidence": evidence,
-            }
-        )
+def rank_cases(scored: List[Dict[str, Any]], top: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Sorts scored cases by priority_score (highest first, ties in input order), in place.
+    With top, returns only the best top cases (see prioritize_cases).
+    """
+    if top is not None:
+        # nlargest is documented to equal sorted(..., reverse=True)[:top], so ties keep input order
+        return heapq.nlargest(top, scored, key=lambda x: x["priority_score"])
+    scored.sort(key=lambda x: x["priority_score"], reverse=True)
+    return scored
+
+
+def rank_columns(columns: CaseColumns, top: Optional[int] = None) -> array:
+    """
+    rank_cases for scored columns: the case indices in rank order (only the best top with top).
+    """
+    scores = columns.scores
+    if top is not None:
+        return array('q', heapq.nlargest(top, range(len(scores)), key=scores.__getitem__))
+    return array('q', sorted(range(len(scores)), key=scores.__getitem__, reverse=True))
 
-    ranked.sort(key=lambda x: x["priority_score"], reverse=True)
-    return ranked
+
+def recommend_signals(
+    bn: BayesNet,
+    columns: CaseColumns,
+    candidates: Optional[List[str]] = None,
+    policy: Optional[ScoringPolicy] = None,
+    costs: Optional[Dict[str, float]] = None,
+    min_change: float = 0.0,
+) -> CaseColumns:
+    """
+    Value of information per scored case: which unobserved signal is worth looking up next.
+
+    For every candidate signal (default: the parents of Fraud) the case is not already carrying,
+    columns get the expected entropy reduction of Fraud and the expected change of p_fraud
+    (BayesNet.information_value_encoded), computed once per distinct evidence pattern, and the
+    expected change of priority_score under policy. Every policy is linear in p_fraud, so the
+    latter is one score_batch call per signal. next_signal is the signal with the largest
+    expected score change per unit of cost (costs: signal -> cost, default 1), or None when no
+    signal is expected to move the score by more than min_change.
+    """
+    if policy is None:
+        policy = DEFAULT_POLICY
+    if candidates is None:
+        candidates = bn.parents["Fraud"]
+    costs = costs or {}
+
+    patterns: Dict[Tuple[Tuple[int, int], ...], Dict[str, Tuple[float, float]]] = {}
+    values = []
+    for pairs in columns.pairs:
+        entry = patterns.get(pairs)
+        if entry is None:
+            try:
+                entry = bn.information_value_encoded("Fraud", pairs, candidates)
+            except ZeroProbabilityEvidence:
+                entry = {}
+            patterns[pairs] = entry
+        values.append(entry)
+
+    score_changes = {}
+    for var in candidates:
+        changes = array('d', [entry[var][1] if var in entry else 0.0 for entry in values])
+        score_changes[var] = policy.score_batch(changes, columns.amounts, columns.merchants)
+
+    next_signals: List[Optional[str]] = []
+    for i, entry in enumerate(values):
+        best, best_value = None, 0.0
+        for var in entry:
+            change = score_changes[var][i]
+            if change > min_change and change / costs.get(var, 1.0) > best_value:
+                best, best_value = var, change / costs.get(var, 1.0)
+        next_signals.append(best)
+
+    columns.signal_values = values
+    columns.score_changes = score_changes
+    columns.next_signals = next_signals
+    return columns
+
+
+class ReviewQueue:
+    """
+    Long-lived review queue that stays ranked while evidence for its cases trickles in.
+
+    Adding a case or updating its evidence re-scores only that case and pushes it onto a heap
+    in O(log N); the entry it replaces is left behind and skipped when it surfaces (lazy
+    deletion), and the heap is rebuilt once stale entries outnumber live ones. Cases rank
+    exactly like prioritize_cases over the live cases in the order they were first added.
+
+    Case ids are keyed as strings, like the case_id of a scored row, so 17 and "17" are the same case.
+    """
+
+    def __init__(
+        self,
+        bn: BayesNet,
+        explain: bool = False,
+        posterior_table: Optional["PosteriorTable"] = None,
+        policy: Optional[ScoringPolicy] = None,
+    ):
+        self.bn = bn
+        self.options = {"explain": explain, "posterior_table": posterior_table, "policy": policy}
+        self.heap: List[Tuple[float, int, int, str]] = []
+        # case_id -> (order added, version, case, scored row)
+        self.entries: Dict[str, Tuple[int, int, Dict[str, Any], Dict[str, Any]]] = {}
+        self.added = 0
+        self.versions = 0
+
+    def _push(self, order: int, case: Dict[str, Any]) -> Dict[str, Any]:
+        row = score_cases(self.bn, [case], **self.options)[0]
+        self.versions += 1
+        case_id = row["case_id"]
+        self.entries[case_id] = (order, self.versions, case, row)
+        heapq.heappush(self.heap, (-row["priority_score"], order, self.versions, case_id))
+        if len(self.heap) > 2 * len(self.entries) + 16:
+            self._compact()
+        return row
+
+    def _compact(self) -> None:
+        self.heap = [(-row["priority_score"], order, version, case_id)
+                     for case_id, (order, version, _, row) in self.entries.items()]
+        heapq.heapify(self.heap)
+
+    def _discard_stale(self) -> None:
+        while self.heap:
+            _, _, version, case_id = self.heap[0]
+            entry = self.entries.get(case_id)
+            if entry is not None and entry[1] == version:
+                return
+            heapq.heappop(self.heap)
+
+    def add_case(self, case: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Scores case (same shape as in load_cases) and queues it. Returns the scored row.
+
+        Raises:
+            ValueError : If a case with the same case_id is already queued.
+        """
+        case_id = str(case.get("case_id", "UNKNOWN"))
+        if case_id in self.entries:
+            raise ValueError(f"case {case_id!r} is already queued, use update_evidence")
+        self.added += 1
+        return self._push(self.added, case)
+
+    def update_evidence(self, case_id: str, evidence: Dict[str, str], replace: bool = False) -> Dict[str, Any]:
+        """
+        Merges new evidence into a queued case (or replaces all of it) and re-scores only that case.
+        The case keeps its tie-breaking position. Returns the new scored row.
+
+        Raises:
+            KeyError : If no case with case_id is queued.
+        """
+        order, _, case, _ = self.entries[str(case_id)]
+        merged = dict(evidence) if replace else {**case.get("evidence", {}), **evidence}
+        return self._push(order, {**case, "evidence": merged})
+
+    def remove(self, case_id: str) -> Dict[str, Any]:
+        """
+        Drops a queued case without reviewing it. Returns its last scored row.
+
+        Raises:
+            KeyError : If no case with case_id is queued.
+        """
+        return self.entries.pop(str(case_id))[3]
+
+    def peek_top(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns the highest-priority case without removing it, or None if the queue is empty.
+        """
+        self._discard_stale()
+        if not self.heap:
+            return None
+        return self.entries[self.heap[0][3]][3]
+
+    def pop_top(self) -> Optional[Dict[str, Any]]:
+        """
+        Removes and returns the highest-priority case, or None if the queue is empty.
+        """
+        self._discard_stale()
+        if not self.heap:
+            return None
+        case_id = heapq.heappop(self.heap)[3]
+        return self.entries.pop(case_id)[3]
+
+    def ranked(self) -> List[Dict[str, Any]]:
+        """
+        Every queued case in rank order, without changing the queue (O(N log N)).
+        """
+        entries = sorted(self.entries.values(), key=lambda entry: (-entry[3]["priority_score"], entry[0]))
+        return [row for _, _, _, row in entries]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, case_id: str) -> bool:
+        return str(case_id) in self.entries
+
+
+class ExternalRanking:
+    """
+    Ranks more scored cases than fit in memory.
+
+    Cases are buffered run_size at a time; each full buffer is sorted and spilled to a temporary
+    file, and ranked() merges the sorted runs back. The order is the same as sorting everything
+    by priority_score (highest first) with ties in the order the cases were added.
+    """
+
+    def __init__(self, run_size: int = 100_000, tmp_dir: Optional[str] = None):
+        self.run_size = run_size
+        self.tmp_dir = tmp_dir
+        self.runs: List[str] = []
+        self.buffer: List[Tuple[int, Dict[str, Any]]] = []
+        self.count = 0
+
+    @staticmethod
+    def _key(entry: Tuple[int, Dict[str, Any]]) -> Tuple[float, int]:
+        position, row = entry
+        return (-row["priority_score"], position)
+
+    def add(self, row: Dict[str, Any]) -> None:
+        self.buffer.append((self.count, row))
+        self.count += 1
+        if len(self.buffer) >= self.run_size:
+            self._spill()
+
+    def _spill(self) -> None:
+        self.buffer.sort(key=self._key)
+        fd, path = tempfile.mkstemp(prefix="ranking-run-", suffix=".ndjson", dir=self.tmp_dir)
+        with os.fdopen(fd, "w") as file:
+            for entry in self.buffer:
+                file.write(json.dumps(entry) + "\n")
+        self.runs.append(path)
+        self.buffer = []
+
+    @staticmethod
+    def _read_run(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        with open(path, "r") as file:
+            for line in file:
+                position, row = json.loads(line)
+                yield position, row
+
+    def ranked(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yields every added case in rank order.
+        """
+        self.buffer.sort(key=self._key)
+        streams = [self._read_run(path) for path in self.runs] + [iter(self.buffer)]
+        for _, row in heapq.merge(*streams, key=self._key):
+            yield row
+
+    def close(self) -> None:
+        """
+        Deletes the spilled runs.
+        """
+        for path in self.runs:
+            os.remove(path)
+        self.runs = []
+        self.buffer = []
+
+    def __enter__(self) -> "ExternalRanking":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def write_ranked_json(rows: Iterable[Dict[str, Any]], path: str) -> None:
+    """
+    Writes rows as a JSON list one row at a time.
+    The file is byte-for-byte what json.dumps(list(rows), indent=2) would produce.
+    """
+    with open(path, "w") as file:
+        first = True
+        for row in rows:
+            file.write("[\n  " if first else ",\n  ")
+            file.write(json.dumps(row, indent=2).replace("\n", "\n  "))
+            first = False
+        file.write("[]" if first else "\n]")
+
+
+TopEntry = Tuple[float, int, Dict[str, Any]]
+
+
+def push_top(heap: List[TopEntry], row: Dict[str, Any], position: int, top: int) -> None:
+    """
+    Offers a scored case to a min-heap holding the best top cases seen so far.
+
+    Entries are (score, -position, row): the root is the weakest case currently kept,
+    and among equal scores the one that came last (it would sort after the others).
+    """
+    entry = (row["priority_score"], -position, row)
+    if len(heap) < top:
+        heapq.heappush(heap, entry)
+    elif top > 0 and entry[:2] > heap[0][:2]:
+        heapq.heapreplace(heap, entry)
+
+
+def push_top_columns(bn: BayesNet, heap: List[TopEntry], columns: CaseColumns, start: int, top: int) -> None:
+    """
+    Offers the best top cases of a scored chunk (the first at position start) to push_top.
+    The rest of the chunk could not make the cut, so it never becomes dict rows.
+    """
+    for i in rank_columns(columns, top):
+        push_top(heap, columns.row(bn, i), start + i, top)
+
+
+def ranked_from_heap(heap: List[TopEntry]) -> List[Dict[str, Any]]:
+    """
+    Returns the cases kept by push_top, highest first, ties in input order.
+    """
+    return [row for _, _, row in sorted(heap, key=lambda entry: entry[:2], reverse=True)]
+
+
+def stream_prioritize(
+    bn: BayesNet,
+    cases: Iterable[Dict[str, Any]],
+    top: int = 10,
+    chunk_size: int = 10_000,
+    on_scored: Optional[Callable[[Dict[str, Any]], None]] = None,
+    explain: bool = False,
+    batch: bool = False,
+    posterior_table: Optional["PosteriorTable"] = None,
+    encoder: Optional[EvidenceEncoder] = None,
+    policy: Optional[ScoringPolicy] = None,
+    net_handle: Optional["NetHandle"] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Scores a stream of cases chunk by chunk and returns only the top cases, highest first.
+
+    At most chunk_size cases and the top-sized heap are held in memory at any time.
+    Ties keep input order, exactly like prioritize_cases(...)[:top].
+    on_scored, if given, is called with every scored case in input order (e.g. to write it out).
+    With a net_handle, every chunk is scored with the version of the net current when the chunk
+    starts (bn is then only used to encode), and its rows record that net_version.
+    """
+    heap: List[TopEntry] = []
+    position = 0
+    if encoder is None:
+        encoder = EvidenceEncoder(bn)
+    version = None
+
+    cases = iter(cases)
+    while True:
+        chunk = list(islice(cases, chunk_size))
+        if not chunk:
+            break
+
+        if net_handle is not None:
+            bn, version = net_handle.acquire()
+        columns = score_columns(bn, encoder.encode_columns(chunk), explain=explain, batch=batch,
+                                posterior_table=posterior_table, policy=policy, net_version=version)
+        if on_scored is not None:
+            for row in columns.rows(bn):
+                on_scored(row)
+        push_top_columns(bn, heap, columns, position, top)
+        position += len(columns)
+
+    return ranked_from_heap(heap)
 
 
 def print_ranked(ranked: List[Dict[str, Any]], top: int = 10) -> None:
@@ -241,11 +978,469 @@ def print_ranked(ranked: List[Dict[str, Any]], top: int = 10) -> None:
     for i, r in enumerate(ranked[:top], start=1):
         print(f"{i}. {r['case_id']} | p_fraud={r['p_fraud']} | score={r['priority_score']} | amount={r['amount_usd']}")
         print(f"   evidence={r['evidence']}")
+        if "error" in r:
+            print(f"   error={r['error']}")
+        if "posteriors" in r:
+            print(f"   posteriors={r['posteriors']}")
+        if r.get("next_signal") is not None:
+            change = r["signal_values"][r["next_signal"]]["score_change"]
+            print(f"   next_signal={r['next_signal']} (expected score change {change})")
     print("")
 
 
 # -----------------------------
-# 4) CLI entrypoint
+# 4) Compiled scoring mode
+# -----------------------------
+#
+# For small nets every evidence pattern over the signals (each one unobserved or one of its
+# values) can be scored ahead of time. A pattern is indexed mixed-radix style, one digit per
+# signal: digit 0 means unobserved, digit i + 1 means the signal took its i-th value.
+
+DEFAULT_COMPILE_LIMIT = 100_000
+
+
+def net_digest(net_path: str) -> str:
+    """
+    Fingerprint of the net file, used to detect a stale posterior table.
+    """
+    return hashlib.sha256(Path(net_path).read_bytes()).hexdigest()
+
+
+def posterior_table_digest(bn: BayesNet, net_path: str) -> str:
+    """
+    Fingerprint of everything a posterior table depends on: the net file and the inference
+    settings of bn (method, log space, sampler settings). A table of sampled or log-space
+    estimates is then recompiled, not reused, by an exact run on the same net.
+    """
+    settings = {"inference": {**(bn.inference or {}), "method": bn.default_method()}, "log_space": bn.log_space}
+    text = net_digest(net_path) + json.dumps(settings, sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def posterior_table_path(net_path: str) -> str:
+    """
+    The posterior table lives next to the net: nets/fraud_review.json -> nets/fraud_review.posteriors.json
+    """
+    path = Path(net_path)
+    return str(path.with_name(path.stem + ".posteriors.json"))
+
+
+class PosteriorTable:
+    def __init__(self, signals: List[str], values: Dict[str, List[str]], probabilities: List[Optional[float]], digest: str):
+        """
+        signals: the observable nodes (every node except Fraud), in net order
+        values: the possible values of each signal
+        probabilities: P(Fraud='T' | pattern) for every pattern index, None where the evidence is impossible
+        digest: posterior_table_digest of the net and inference settings the table was computed with
+        """
+        self.signals = signals
+        self.values = values
+        self.probabilities = probabilities
+        self.digest = digest
+
+        self.strides: List[int] = []
+        self.value_digit: List[Dict[str, int]] = []
+        stride = 1
+        for var in reversed(signals):
+            self.strides.insert(0, stride)
+            stride *= len(values[var]) + 1
+        for var in signals:
+            self.value_digit.append({val: i + 1 for i, val in enumerate(values[var])})
+        self._node_strides: Optional[Dict[int, int]] = None
+
+    @staticmethod
+    def size_for(bn: BayesNet) -> int:
+        size = 1
+        for var in bn.nodes:
+            if var != "Fraud":
+                size *= len(bn.nodes[var]) + 1
+        return size
+
+    @classmethod
+    def compile(cls, bn: BayesNet, digest: str) -> "PosteriorTable":
+        """
+        Runs inference once for every evidence pattern over the signals.
+        """
+        signals = [var for var in bn.nodes if var != "Fraud"]
+        values = {var: bn.nodes[var] for var in signals}
+
+        probabilities: List[Optional[float]] = []
+        for index in range(cls.size_for(bn)):
+            # decode the pattern index, last signal fastest
+            evidence = {}
+            rest = index
+            for var in reversed(signals):
+                rest, digit = divmod(rest, len(values[var]) + 1)
+                if digit:
+                    evidence[var] = values[var][digit - 1]
+            try:
+                probabilities.append(float(bn.infer("Fraud", evidence).get("T", 0.0)))
+            except ZeroProbabilityEvidence:
+                probabilities.append(None)
+
+        return cls(signals, values, probabilities, digest)
+
+    def index(self, evidence: Dict[str, str]) -> int:
+        index = 0
+        for var, stride, digits in zip(self.signals, self.strides, self.value_digit):
+            if var in evidence:
+                index += digits[evidence[var]] * stride
+        return index
+
+    def fraud_probability(self, bn: BayesNet, evidence: Dict[str, str]) -> float:
+        """
+        P(Fraud='T' | evidence) by table lookup. Evidence on Fraud itself or an impossible pattern
+        falls back to live inference, which handles them the same way it always has.
+        """
+        return self.fraud_probability_encoded(bn, bn.encode_pairs(evidence))
+
+    def fraud_probability_encoded(self, bn: BayesNet, pairs: Tuple[Tuple[int, int], ...]) -> float:
+        """
+        fraud_probability for encoded evidence (see EvidenceEncoder). The digit of a signal is
+        its value index + 1, so the pattern index comes straight from the pairs.
+        """
+        fraud = bn.node_index["Fraud"]
+        signal_stride = self._signal_strides(bn)
+        index = 0
+        for node, value in pairs:
+            if node == fraud:
+                return fraud_probability_encoded(bn, pairs)
+            index += (value + 1) * signal_stride[node]
+        p = self.probabilities[index]
+        if p is None:
+            return fraud_probability_encoded(bn, pairs)
+        return p
+
+    def _signal_strides(self, bn: BayesNet) -> Dict[int, int]:
+        # node index -> stride of its digit, built on first use for the net being scored
+        if self._node_strides is None:
+            self._node_strides = {bn.node_index[var]: stride for var, stride in zip(self.signals, self.strides)}
+        return self._node_strides
+
+    def save(self, path: str) -> None:
+        data = {
+            "digest": self.digest,
+            "signals": self.signals,
+            "values": self.values,
+            "probabilities": self.probabilities,
+        }
+        Path(path).write_text(json.dumps(data))
+
+    @classmethod
+    def load(cls, path: str) -> "PosteriorTable":
+        data = json.loads(Path(path).read_text())
+        return cls(data["signals"], data["values"], data["probabilities"], data["digest"])
+
+
+def load_or_compile_posterior_table(bn: BayesNet, net_path: str, limit: int = DEFAULT_COMPILE_LIMIT) -> Optional[PosteriorTable]:
+    """
+    Returns the posterior table for the net at net_path, recompiling (and saving) it when it is
+    missing or was computed from a different version of the net or with other inference settings.
+    Returns None when the net has more than limit evidence patterns: score with live inference then.
+    """
+    if PosteriorTable.size_for(bn) > limit:
+        return None
+
+    digest = posterior_table_digest(bn, net_path)
+    table_path = posterior_table_path(net_path)
+    if Path(table_path).exists():
+        table = PosteriorTable.load(table_path)
+        if table.digest == digest:
+            return table
+
+    table = PosteriorTable.compile(bn, digest)
+    table.save(table_path)
+    return table
+
+
+# -----------------------------
+# 5) Multiprocess scoring
+# -----------------------------
+#
+# The case stream is cut into chunks that are scored by a process pool. Every worker loads the
+# net once (pool initializer), chunks travel already encoded (CaseColumns), and each worker sends
+# back only the p_fraud and score columns; dict rows are built here, and only for the cases that
+# make the top or are needed for --output.
+
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(net_path: str, net_options: Dict[str, Any], table_path: Optional[str], options: Dict[str, Any]) -> None:
+    bn = load_net(net_path, **net_options)
+    _worker["bn"] = bn
+    _worker["posterior_table"] = PosteriorTable.load(table_path) if table_path else None
+    _worker["options"] = options
+
+
+def _score_chunk(columns: CaseColumns) -> Tuple[array, array, Optional[List[Any]]]:
+    columns = score_columns(_worker["bn"], columns, posterior_table=_worker["posterior_table"], **_worker["options"])
+    return columns.p_fraud, columns.scores, columns.posteriors
+
+
+def parallel_prioritize(
+    bn: BayesNet,
+    net_path: str,
+    cases: Iterable[Dict[str, Any]],
+    workers: int,
+    top: int = 10,
+    chunk_size: int = 10_000,
+    on_scored: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cache_size: int = 1024,
+    explain: bool = False,
+    batch: bool = False,
+    posterior_table: Optional[PosteriorTable] = None,
+    encoder: Optional[EvidenceEncoder] = None,
+    policy: Optional[ScoringPolicy] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Same as stream_prioritize, with the scoring spread over a pool of worker processes.
+
+    bn is the net already loaded from net_path (used here only to validate and encode cases,
+    so workers receive and score the encoded form).
+    The result, and the order of on_scored calls, are identical to stream_prioritize.
+    """
+    if encoder is None:
+        encoder = EvidenceEncoder(bn)
+    table_path = posterior_table_path(net_path) if posterior_table is not None else None
+    options = {"explain": explain, "batch": batch, "policy": policy}
+    # workers load their own copy of the net, with the same numeric settings
+    net_options = {"cache_size": cache_size, "log_space": bn.log_space, "batch_dtype": bn.batch_dtype,
+                   "inference": bn.inference}
+
+    heap: List[TopEntry] = []
+    cases = iter(cases)
+    start = 0
+
+    with multiprocessing.Pool(
+        workers, initializer=_init_worker, initargs=(net_path, net_options, table_path, options)
+    ) as pool:
+        # a bounded window of chunks in flight keeps memory independent of the input size
+        pending: deque = deque()
+
+        def collect() -> None:
+            chunk_start, columns, result = pending.popleft()
+            columns.p_fraud, columns.scores, columns.posteriors = result.get()
+            push_top_columns(bn, heap, columns, chunk_start, top)
+            if on_scored is not None:
+                for row in columns.rows(bn):
+                    on_scored(row)
+
+        while True:
+            chunk = encoder.encode_columns(islice(cases, chunk_size))
+            if not chunk:
+                break
+            pending.append((start, chunk, pool.apply_async(_score_chunk, (chunk,))))
+            start += len(chunk)
+            if len(pending) >= 2 * workers:
+                collect()
+
+        while pending:
+            collect()
+
+    return ranked_from_heap(heap)
+
+
+# -----------------------------
+# 6) Hot reload
+# -----------------------------
+
+def net_version(net_path: str) -> str:
+    """
+    Short fingerprint of the net file, recorded on scored cases as net_version.
+    """
+    return net_digest(net_path)[:12]
+
+
+class NetHandle:
+    """
+    A net that follows its file, so a long-running scorer picks up new tables without a restart.
+
+    A background thread (start) checks the file every check_interval seconds. A new version is
+    loaded and validated on that thread while scoring carries on, and only staged; acquire swaps
+    it in when the next batch starts, so a batch always runs against the version it started
+    with. The new net inherits every cached posterior that does not depend on a changed table
+    (BayesNet.inherit_cache). A file that fails to load, or that changes the nodes or their values
+    (cases already encoded would no longer match), is not swapped in; the error is kept in error.
+
+    Replace the file atomically (write a new file and rename it over the old one): a compiled .bnc
+    net rewritten in place changes under the memory-mapped tables of the version being served.
+    """
+
+    def __init__(
+        self,
+        net_path: str,
+        check_interval: float = 1.0,
+        on_swap: Optional[Callable[[BayesNet, BayesNet], None]] = None,
+        **options: Any,
+    ):
+        """
+        Args:
+            net_path (String) : The JSON or compiled net to load and watch.
+            check_interval (float) : Seconds between checks of the file by the background thread.
+            on_swap (Callable) : Called with the previous and the new net every time acquire swaps
+                                 in a new version, e.g. to instrument it for --profile.
+            options : Keyword arguments of load_net (cache_size, log_space, ...), for every version.
+        """
+        self.net_path = net_path
+        self.check_interval = check_interval
+        self.on_swap = on_swap
+        self.options = options
+
+        self._signature = self._stat()
+        self.current: Tuple[BayesNet, str] = self._load()
+        self._pending: Optional[Tuple[BayesNet, str]] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.error: Optional[str] = None
+
+    @property
+    def bn(self) -> BayesNet:
+        return self.current[0]
+
+    @property
+    def version(self) -> str:
+        return self.current[1]
+
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.net_path)
+        except FileNotFoundError:
+            # mid-rename, or deleted: keep serving what is loaded
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _load(self) -> Tuple[BayesNet, str]:
+        # the fingerprint is taken on both sides of the load, so a write in between is not mislabeled
+        version = net_version(self.net_path)
+        while True:
+            bn = load_net(self.net_path, **self.options)
+            loaded, version = version, net_version(self.net_path)
+            if loaded == version:
+                return bn, version
+
+    def check(self) -> bool:
+        """
+        Loads and validates the file if it changed since the last check, and stages it for acquire.
+        Runs on the background thread, but can also be called directly.
+
+        Returns:
+            bool : Whether a new version was staged.
+        """
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+
+        try:
+            bn, version = self._load()
+            with self._lock:
+                latest = self._pending or self.current
+            if version == latest[1]:
+                # touched, or changed back, but the same content
+                return False
+            if list(bn.nodes.items()) != list(latest[0].nodes.items()):
+                raise ValueError("the nodes or their values changed, restart the scorer to load this net")
+        except Exception as exc:
+            self.failed_reloads += 1
+            self.error = f"{self.net_path}: {exc}"
+            return False
+
+        with self._lock:
+            self._pending = (bn, version)
+        self.error = None
+        return True
+
+    def acquire(self) -> Tuple[BayesNet, str]:
+        """
+        The net to score the next batch with, and its version. A staged version is swapped in
+        first, so call this once per batch and use what it returns for the whole batch.
+        """
+        if self._pending is not None:
+            with self._lock:
+                pending, self._pending = self._pending, None
+            if pending is not None:
+                previous = self.current[0]
+                pending[0].inherit_cache(previous)
+                self.current = pending
+                self.reloads += 1
+                if self.on_swap is not None:
+                    self.on_swap(previous, pending[0])
+        return self.current
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.check_interval):
+            self.check()
+
+    def start(self) -> "NetHandle":
+        """
+        Starts checking the file in a background (daemon) thread. Returns self.
+        """
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="net-reload", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"net_version": self.version, "reloads": self.reloads,
+                "failed_reloads": self.failed_reloads, "reload_error": self.error}
+
+    def __enter__(self) -> "NetHandle":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+# -----------------------------
+# 7) Profiling (--profile)
+# -----------------------------
+
+# Pipeline stages timed by --profile, each one a function of this module
+PROFILED_STAGES = [
+    "load_net", "load_or_compile_posterior_table", "load_cases", "score_cases", "score_columns",
+    "fraud_probability_encoded", "fraud_probabilities_encoded", "node_posteriors_encoded",
+    "apply_policy", "recommend_signals", "rank_cases", "rank_columns", "write_ranked_json", "print_ranked",
+]
+
+
+def instrument_pipeline(profiler: Profiler) -> None:
+    """
+    Times every stage in PROFILED_STAGES until profiler.uninstrument() (see instrumentation.py).
+    Only this process is instrumented; --workers processes are not profiled.
+    """
+    module = sys.modules[__name__]
+    for name in PROFILED_STAGES:
+        profiler.instrument(module, name)
+    profiler.instrument(EvidenceEncoder, "encode", "encode_evidence")
+    profiler.instrument(ScoringPolicy, "score_batch", "score_policy")
+
+
+def write_profile(profiler: Profiler, bn: BayesNet, path: str, fmt: str = "json") -> None:
+    """
+    Dumps the profile as JSON or Prometheus text, to path or to stdout when path is "-".
+    """
+    net_counters(profiler, bn)
+    text = profiler.to_prometheus() if fmt == "prometheus" else profiler.to_json() + "\n"
+    if path == "-":
+        print(text, end="")
+    else:
+        Path(path).write_text(text)
+        print(f"Saved profile to: {path}")
+
+
+# -----------------------------
+# 8) CLI entrypoint
 # -----------------------------
 
 def main():
@@ -256,7 +1451,7 @@ def main():
         "--net",
         type=str,
         default="nets/fraud_review.json",
-        help="Path to the Bayes Net JSON file. If it does not exist, a default one is created.",
+        help="Path to the Bayes Net JSON file, or a binary compiled .bnc net. If it does not exist, a default one is created.",
     )
     parser.add_argument(
         "--cases",
@@ -277,19 +1472,307 @@ def main():
         help="Optional path to save ranked results as JSON.",
     )
 
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read --cases (.ndjson/.jsonl/.csv) as a stream and keep only the --top cases in memory. "
+        "The full --output ranking is built with an external merge sort.",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=10_000,
+        help="How many cases --stream scores at a time.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Score cases on this many processes (each loads the net once). Output is identical to 1.",
+    )
+    parser.add_argument(
+        "--run-size",
+        type=int,
+        default=100_000,
+        help="How many cases the --stream --output merge sort holds in memory per sorted run.",
+    )
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="Also report the posterior of every unobserved node (one junction tree pass per case).",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Score all cases in one vectorized NumPy pass (requires numpy).",
+    )
+    parser.add_argument(
+        "--compile",
+        action="store_true",
+        help="Precompute P(Fraud) for every evidence pattern, save it next to the net and score by table lookup.",
+    )
+    parser.add_argument(
+        "--compile-limit",
+        type=int,
+        default=DEFAULT_COMPILE_LIMIT,
+        help="Largest number of evidence patterns --compile will precompute; bigger nets use live inference.",
+    )
+    parser.add_argument(
+        "--log-space",
+        action="store_true",
+        help="Run inference on log probabilities, so deep nets with rare evidence cannot underflow.",
+    )
+    parser.add_argument(
+        "--float32",
+        action="store_true",
+        help="Use float32 arrays for --batch scoring (faster, about 1e-6 relative error).",
+    )
+    parser.add_argument(
+        "--inference",
+        type=str,
+        choices=["ve", "jt", "enumerate", "lw", "gibbs"],
+        default=None,
+        help="Inference method for P(Fraud), overriding the net's \"inference\" config "
+        "(lw = likelihood weighting, gibbs = Gibbs sampling).",
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=10_000,
+        help="Sample budget per evidence pattern for --inference lw/gibbs.",
+    )
+    parser.add_argument(
+        "--target-se",
+        type=float,
+        default=None,
+        help="Stop sampling once every posterior's standard error is at most this.",
+    )
+    parser.add_argument(
+        "--policy",
+        type=str,
+        choices=sorted(SCORING_POLICIES),
+        default="impact",
+        help="How p_fraud and amount_usd become priority_score, see scoring_policies.py.",
+    )
+    parser.add_argument(
+        "--amount-cap",
+        type=float,
+        default=DEFAULT_AMOUNT_CAP,
+        help="Amount above which --policy capped_impact stops growing.",
+    )
+    parser.add_argument(
+        "--merchant-weights",
+        type=str,
+        default=None,
+        help="JSON object of merchant_id -> weight for --policy merchant_weighted (cases carry a merchant_id).",
+    )
+    parser.add_argument(
+        "--voi",
+        action="store_true",
+        help="Rank the unobserved signals of every case by expected value of information and report the one "
+        "worth looking up next (next_signal).",
+    )
+    parser.add_argument(
+        "--voi-min-change",
+        type=float,
+        default=0.0,
+        help="Only recommend a signal expected to change priority_score by more than this.",
+    )
+    parser.add_argument(
+        "--signal-costs",
+        type=str,
+        default=None,
+        help="JSON object of signal -> lookup cost; --voi picks the largest expected score change per unit of cost.",
+    )
+    parser.add_argument(
+        "--rescore",
+        type=str,
+        default=None,
+        help="Re-rank a ranking saved with --output under --policy, without running inference again.",
+    )
+    parser.add_argument(
+        "--reload",
+        action="store_true",
+        help="With --stream, watch --net and swap in a new version between chunks, without restarting. "
+        "Every scored case records the net_version it was scored with.",
+    )
+    parser.add_argument(
+        "--reload-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between checks of --net for --reload.",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=1024,
+        help="How many distinct evidence patterns to keep in the posterior cache (0 disables it).",
+    )
+    parser.add_argument(
+        "--cache-stats",
+        action="store_true",
+        help="Print posterior cache hit/miss statistics after scoring.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        nargs="?",
+        const="-",
+        default=None,
+        help="Time every pipeline stage and count inference calls, then write the profile to this path "
+        "(stdout if no path is given). Off by default, and then adds no overhead.",
+    )
+    parser.add_argument(
+        "--profile-format",
+        type=str,
+        choices=["json", "prometheus"],
+        default="json",
+        help="Format of the --profile dump.",
+    )
+
     args = parser.parse_args()
+    if args.voi and (args.stream or args.workers > 1):
+        parser.error("--voi needs the full case list, it cannot be combined with --stream or --workers")
+    if args.reload and (not args.stream or args.workers > 1 or args.compile):
+        parser.error("--reload needs --stream, and cannot be combined with --workers or --compile")
+    if args.samples <= 0:
+        parser.error("--samples must be positive")
+    if args.log_space and args.inference in ("jt", "enumerate"):
+        parser.error(f"--log-space only works with variable elimination (or a sampler), not --inference {args.inference}")
+
+    profiler = None
+    if args.profile:
+        profiler = Profiler()
+        instrument_pipeline(profiler)
 
     net_path = ensure_net_file(args.net)
-    bn = BayesNet(net_path)
+    inference = None
+    if args.inference:
+        inference = {"method": args.inference}
+        if args.inference in ("lw", "gibbs"):
+            # fixed seed, so reruns (and --workers) rank the same
+            inference.update(samples=args.samples, target_se=args.target_se, seed=0)
+    net_options = {"cache_size": args.cache_size, "log_space": args.log_space,
+                   "batch_dtype": "float32" if args.float32 else "float64", "inference": inference}
+    net_handle = None
+    if args.reload:
+        on_swap = None
+        if profiler is not None:
+            def on_swap(previous: BayesNet, current: BayesNet) -> None:
+                # the profile covers every version: keep the cache counters of the one retired
+                net_counters(profiler, previous)
+                instrument_net(profiler, current)
+        net_handle = NetHandle(net_path, check_interval=args.reload_interval, on_swap=on_swap, **net_options).start()
+        bn = net_handle.bn
+    else:
+        bn = load_net(net_path, **net_options)
+    if args.log_space and bn.default_method() in ("jt", "enumerate"):
+        parser.error(f"--log-space only works with variable elimination (or a sampler), "
+                     f"but {net_path} selects inference {bn.default_method()!r}")
+    if profiler is not None:
+        instrument_net(profiler, bn)
+
+    policy_options = {"cap": args.amount_cap} if args.policy == "capped_impact" else {}
+    merchant_weights = json.loads(Path(args.merchant_weights).read_text()) if args.merchant_weights else None
+    policy = ScoringPolicy(args.policy, merchant_weights, **policy_options)
+
+    signal_options = None
+    if args.voi:
+        costs = json.loads(Path(args.signal_costs).read_text()) if args.signal_costs else None
+        signal_options = {"policy": policy, "costs": costs, "min_change": args.voi_min_change}
+
+    encoder = EvidenceEncoder(bn)
+    posterior_table = None
+    if args.compile:
+        posterior_table = load_or_compile_posterior_table(bn, net_path, limit=args.compile_limit)
+        if posterior_table is None:
+            print(f"Net has more than {args.compile_limit} evidence patterns, using live inference.")
 
-    cases = load_cases(args.cases)
-    ranked = prioritize_cases(bn, cases)
+    if args.rescore:
+        columns = rescore_columns(load_ranked_columns(bn, args.rescore, encoder), policy)
+        order = rank_columns(columns, top=None if args.output else args.top)
+        if signal_options is not None:
+            recommend_signals(bn, columns, **signal_options)
+        print_ranked(list(columns.rows(bn, order[:args.top])), top=args.top)
 
-    print_ranked(ranked, top=args.top)
+        if args.output:
+            write_ranked_json(columns.rows(bn, order), args.output)
+            print(f"Saved ranked cases to: {args.output}")
+    elif args.stream or args.workers > 1:
+        if args.stream:
+            cases = iter_cases(args.cases) if args.cases else iter(load_cases(None))
+        else:
+            cases = iter(load_cases(args.cases))
+
+        with ExternalRanking(run_size=args.run_size) as full_ranking:
+            on_scored = full_ranking.add if args.output else None
+            if args.workers > 1:
+                ranked = parallel_prioritize(
+                    bn, net_path, cases, args.workers, top=args.top, chunk_size=args.chunk_size,
+                    on_scored=on_scored, cache_size=args.cache_size, explain=args.explain, batch=args.batch,
+                    posterior_table=posterior_table, encoder=encoder, policy=policy,
+                )
+            else:
+                ranked = stream_prioritize(
+                    bn, cases, top=args.top, chunk_size=args.chunk_size, on_scored=on_scored, explain=args.explain,
+                    batch=args.batch, posterior_table=posterior_table, encoder=encoder, policy=policy,
+                    net_handle=net_handle,
+                )
+            print_ranked(ranked, top=args.top)
+
+            if args.output:
+                write_ranked_json(full_ranking.ranked(), args.output)
+                print(f"Saved ranked cases to: {args.output}")
+    else:
+        # cases are encoded as they are read, so only their columns stay in memory
+        cases = iter_cases(args.cases) if args.cases else load_cases(None)
+        # only the displayed cases need ranking unless the full list is saved
+        columns, order = prioritize_columns(
+            bn, cases, explain=args.explain, batch=args.batch, posterior_table=posterior_table,
+            top=None if args.output else args.top, encoder=encoder, policy=policy,
+        )
+        if signal_options is not None:
+            recommend_signals(bn, columns, **signal_options)
+
+        print_ranked(list(columns.rows(bn, order[:args.top])), top=args.top)
+
+        if args.output:
+            write_ranked_json(columns.rows(bn, order), args.output)
+            print(f"Saved ranked cases to: {args.output}")
+
+    if args.voi:
+        fetch = Counter(var for var in columns.next_signals if var is not None)
+        print(f"Signals worth looking up: {dict(fetch.most_common())}, "
+              f"none for {len(columns) - sum(fetch.values())} of {len(columns)} cases")
+
+    if net_handle is not None:
+        net_handle.stop()
+        bn = net_handle.bn
+        print(f"Net version {net_handle.version}, reloaded {net_handle.reloads} times")
+        if net_handle.error:
+            print(f"Last reload failed: {net_handle.error}")
+
+    dropped = encoder.stats()
+    if dropped["dropped_keys"] or dropped["dropped_values"]:
+        print(
+            f"Dropped evidence: unknown variables {dropped['dropped_keys']}, "
+            f"unknown values per variable {dropped['dropped_values']}"
+        )
+
+    if args.cache_stats:
+        stats = bn.cache.stats()
+        print(
+            f"Posterior cache: hits={stats['hits']} misses={stats['misses']} "
+            f"hit_rate={stats['hit_rate']:.2%} evictions={stats['evictions']} "
+            f"size={stats['size']}/{stats['maxsize']}"
+        )
 
-    if args.output:
-        Path(args.output).write_text(json.dumps(ranked, indent=2))
-        print(f"Saved ranked cases to: {args.output}")
+    if profiler is not None:
+        profiler.uninstrument()
+        profiler.count("evidence_cases", dropped["cases"])
+        profiler.count("evidence_dropped_keys", sum(dropped["dropped_keys"].values()))
+        profiler.count("evidence_dropped_values", sum(dropped["dropped_values"].values()))
+        write_profile(profiler, bn, args.profile, args.profile_format)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,185 @@
+"""
+Opt-in instrumentation for BayesNet and the prioritization pipeline (--profile).
+
+Nothing in the hot paths checks for a profiler. Instead, instrument() swaps a function or
+method for a timed wrapper and uninstrument() puts the original back, so with profiling off
+the inner loops run exactly the code they always did.
+
+A Profiler collects counters and wall-time histograms per stage and dumps them as JSON or
+in the Prometheus text exposition format.
+"""
+
+import functools
+import json
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets, Prometheus style (cumulative, plus +Inf)
+BUCKETS = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 0.1, 1.0, 10.0)
+
+# Prefix of every Prometheus metric name
+METRIC_PREFIX = "bayesnet"
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def to_dict(self):
+        # cumulative counts keyed by upper bound, like Prometheus "le" labels
+        cumulative = {}
+        running = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            running += count
+            cumulative[str(bound)] = running
+        return {"count": self.count, "sum_s": self.sum, "buckets": cumulative}
+
+
+class Profiler:
+    def __init__(self):
+        self.counters = {}
+        self.stages = {}
+        self._installed = []
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, stage, seconds):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Times the body of a with block as one observation of stage name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, function, stage, on_call=None):
+        """
+        Wraps function so every call is timed as stage. on_call(args, kwargs), if given, runs
+        before the call, e.g. to update counters from the arguments.
+        """
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if on_call is not None:
+                on_call(args, kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.observe(stage, time.perf_counter() - start)
+        return wrapper
+
+    def instrument(self, owner, attribute, stage=None, on_call=None):
+        """
+        Replaces owner.attribute (a module function, or a method looked up on an instance)
+        with a timed wrapper until uninstrument is called.
+        """
+        original = getattr(owner, attribute)
+        self._installed.append((owner, attribute, owner.__dict__.get(attribute)))
+        setattr(owner, attribute, self.timed(original, stage or attribute, on_call))
+
+    def uninstrument(self):
+        """
+        Restores everything instrument replaced, most recent first.
+        """
+        while self._installed:
+            owner, attribute, previous = self._installed.pop()
+            if previous is None:
+                # it was a method of the class, drop the instance override
+                delattr(owner, attribute)
+            else:
+                setattr(owner, attribute, previous)
+
+    def to_dict(self):
+        return {
+            "counters": dict(sorted(self.counters.items())),
+            "stages": {name: histogram.to_dict() for name, histogram in sorted(self.stages.items())},
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self):
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        for name, value in sorted(self.counters.items()):
+            metric = f"{METRIC_PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+
+        metric = f"{METRIC_PREFIX}_stage_seconds"
+        if self.stages:
+            lines.append(f"# TYPE {metric} histogram")
+        for name, histogram in sorted(self.stages.items()):
+            for bound, count in histogram.to_dict()["buckets"].items():
+                lines.append(f'{metric}_bucket{{stage="{name}",le="{bound}"}} {count}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {histogram.sum}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+def nodes_visited(bn, order, values, query_level=None):
+    """
+    Number of CPT lookups a walk of BayesNet._enumerate_iterative makes: every level is
+    visited once per assignment of the hidden levels above and including it.
+    """
+    visited = 0
+    branches = 1
+    for level, node in enumerate(order):
+        if values[node] < 0 or level == query_level:
+            branches *= bn._cards[node]
+        visited += branches
+    return visited
+
+
+def instrument_net(profiler, bn):
+    """
+    Instruments one BayesNet instance: query_prob and inference calls are counted and timed,
+    and enumeration walks also count the nodes they visit. Cache hits and misses are read
+    from bn.cache by net_counters when the profile is dumped.
+
+    The pipeline calls the encoded entry points (cached_infer_encoded, marginals_codes). Every
+    inference that actually runs goes through infer_codes, whatever the entry point, so
+    infer_codes_calls counts the inferences and the "infer_codes" stage times them.
+    """
+    def count_nodes(args, kwargs):
+        order, values = args[0], args[1]
+        query_level = args[2] if len(args) > 2 else kwargs.get("query_level")
+        profiler.count("enumerate_nodes_visited", nodes_visited(bn, order, values, query_level))
+
+    for attribute in ("query_prob", "infer", "infer_codes", "cached_infer", "cached_infer_encoded", "marginals",
+                      "marginals_codes", "batch_query", "approximate_ask"):
+        profiler.instrument(bn, attribute, on_call=lambda args, kwargs, name=attribute: profiler.count(f"{name}_calls"))
+    profiler.instrument(bn, "_enumerate_iterative", "enumerate", on_call=count_nodes)
+
+
+def net_counters(profiler, bn):
+    """
+    Adds the posterior cache counters of bn to the profiler. Call it once per net, e.g. for
+    every version a reloaded net went through.
+    """
+    stats = bn.cache.stats()
+    for name in ("hits", "misses", "evictions"):
+        profiler.count(f"posterior_cache_{name}", stats[name])
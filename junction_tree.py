@@ -0,0 +1,193 @@
+"""
+Junction tree (clique tree) compilation for BayesNet.
+
+The tree is built once per net: moralize, triangulate with the elimination order heuristic
+from factors.py, keep the maximal cliques and join them with a maximum-weight spanning tree
+over separator sizes. Each query then only reapplies evidence and runs two passes of
+message passing, which yields the posterior of every variable at once.
+"""
+
+from factors import Factor, ZeroProbabilityEvidence, elimination_order
+
+
+def moral_graph(bn):
+    """
+    Returns the moral graph of bn as {variable: set of neighbours}:
+    every node is connected to its parents, and parents of a common child are married,
+    so the neighbours of a node are exactly its Markov blanket.
+    """
+    return {var: set(bn.markov_blanket[var]) for var in bn.nodes}
+
+
+def triangulate(bn, heuristic="min_fill"):
+    """
+    Eliminates every variable of the moral graph and records the clique formed at each step.
+
+    Returns:
+        List[List[String]] : The maximal cliques, each listed in the node order of bn.
+    """
+    factors = [Factor.from_cpt(bn, var) for var in bn.nodes]
+    order = elimination_order(factors, bn.order, heuristic)
+
+    graph = moral_graph(bn)
+    candidates = []
+    for var in order:
+        adjacent = graph.pop(var)
+        candidates.append(adjacent | {var})
+        for a in adjacent:
+            graph[a].discard(var)
+            graph[a].update(b for b in adjacent if b != a)
+
+    cliques = []
+    for clique in candidates:
+        if any(clique < other for other in candidates):
+            continue
+        if clique in cliques:
+            continue
+        cliques.append(clique)
+
+    return [[var for var in bn.nodes if var in clique] for clique in cliques]
+
+
+class JunctionTree:
+    def __init__(self, bn, heuristic="min_fill"):
+        """
+        Compiles the junction tree of a compiled BayesNet.
+
+        Args:
+            bn (BayesNet) : The net to compile.
+            heuristic (String) : Triangulation heuristic, see factors.elimination_order.
+        """
+        self.bn = bn
+        self.cliques = triangulate(bn, heuristic)
+
+        # Maximum-weight spanning tree on separator size (Kruskal). Zero-weight edges join
+        # disconnected parts of the net, their messages are plain normalizing constants.
+        candidate_edges = []
+        for i in range(len(self.cliques)):
+            for j in range(i + 1, len(self.cliques)):
+                weight = len(set(self.cliques[i]) & set(self.cliques[j]))
+                candidate_edges.append((-weight, i, j))
+        candidate_edges.sort()
+
+        component = list(range(len(self.cliques)))
+
+        def find(i):
+            while component[i] != i:
+                component[i] = component[component[i]]
+                i = component[i]
+            return i
+
+        self.neighbours = {i: [] for i in range(len(self.cliques))}
+        self.separators = {}
+        for _, i, j in candidate_edges:
+            root_i, root_j = find(i), find(j)
+            if root_i == root_j:
+                continue
+            component[root_i] = root_j
+            self.neighbours[i].append(j)
+            self.neighbours[j].append(i)
+            separator = [var for var in self.cliques[i] if var in self.cliques[j]]
+            self.separators[(i, j)] = separator
+            self.separators[(j, i)] = separator
+
+        # Each CPT goes into the first clique that holds its whole family
+        self.potentials = []
+        for clique in self.cliques:
+            cardinalities = [bn.cardinality[var] for var in clique]
+            size = 1
+            for card in cardinalities:
+                size *= card
+            self.potentials.append(Factor(clique, cardinalities, [1.0] * size))
+        for var in bn.nodes:
+            family = set(bn.parents[var]) | {var}
+            for i, clique in enumerate(self.cliques):
+                if family <= set(clique):
+                    self.potentials[i] = self.potentials[i].multiply(Factor.from_cpt(bn, var))
+                    break
+
+        # Smallest clique holding each variable, used to read off its marginal
+        self.home = {}
+        for var in bn.nodes:
+            holding = [i for i, clique in enumerate(self.cliques) if var in clique]
+            self.home[var] = min(holding, key=lambda i: len(self.cliques[i]))
+
+        # Message schedule: (child, parent) pairs in post-order from root clique 0
+        visited = {0}
+        stack = [(0, None)]
+        order = []
+        while stack:
+            clique, parent = stack.pop()
+            order.append((clique, parent))
+            for neighbour in self.neighbours[clique]:
+                if neighbour not in visited:
+                    visited.add(neighbour)
+                    stack.append((neighbour, clique))
+        self.schedule = [(clique, parent) for clique, parent in reversed(order) if parent is not None]
+
+    def _message(self, potentials, messages, sender, receiver):
+        factor = potentials[sender]
+        for neighbour in self.neighbours[sender]:
+            if neighbour != receiver:
+                factor = factor.multiply(messages[(neighbour, sender)])
+        return factor.marginalize(self.separators[(sender, receiver)])
+
+    def calibrate(self, codes):
+        """
+        Runs collect and distribute message passing with the given evidence.
+
+        Args:
+            codes (Dict) : Index-coded evidence (see BayesNet.encode_evidence).
+
+        Returns:
+            Dict : Unnormalized marginals, keys are variables and values are lists of
+                   probabilities indexed like bn.nodes[var].
+        """
+        potentials = [potential.observe(codes) for potential in self.potentials]
+
+        messages = {}
+        # collect towards the root, then distribute back out
+        for child, parent in self.schedule:
+            messages[(child, parent)] = self._message(potentials, messages, child, parent)
+        for child, parent in reversed(self.schedule):
+            messages[(parent, child)] = self._message(potentials, messages, parent, child)
+
+        beliefs = {}
+        marginals = {}
+        for var in self.bn.nodes:
+            i = self.home[var]
+            if i not in beliefs:
+                belief = potentials[i]
+                for neighbour in self.neighbours[i]:
+                    belief = belief.multiply(messages[(neighbour, i)])
+                beliefs[i] = belief
+            marginals[var] = beliefs[i].marginalize([var]).values
+        return marginals
+
+    def marginals(self, evidence):
+        """
+        Calculates P(var | evidence) for every variable in the net in one calibration.
+
+        Args:
+            evidence (Dict): Keys are names of variables, and values are a specific outcome value.
+
+        Returns:
+            Dictionary : Keys are variables, values are distributions in the same format
+                        as enumerate_ask. Observed variables put all mass on their value.
+
+        Raises:
+            ZeroProbabilityEvidence : If the evidence has probability zero.
+        """
+        return self.posteriors(self.bn.encode_evidence(evidence))
+
+    def posteriors(self, codes):
+        """
+        Same as marginals, for index-coded evidence (see BayesNet.encode_evidence).
+        """
+        result = {}
+        for var, probabilities in self.calibrate(codes).items():
+            total = sum(probabilities)
+            if total == 0:
+                raise ZeroProbabilityEvidence()
+            result[var] = {value: prob / total for value, prob in zip(self.bn.nodes[var], probabilities)}
+        return result
@@ -0,0 +1,373 @@
+"""
+Parameter learning for BayesNet: fits the CPTs of a fixed structure from labelled case history.
+
+Cases have the shape load_cases / iter_cases read (JSON, NDJSON or CSV), with the label either
+in the evidence (e.g. "Fraud": "T") or in a top-level "label" field (true/false map to "T"/"F").
+
+Learning is one streamed pass that only keeps sufficient statistics (CPTCounts):
+- fully observed rows are counted straight into one count table per node, a chunk at a time
+  (NumPy bincount when available)
+- rows with unobserved variables are aggregated per distinct evidence pattern, and their
+  counts are filled in by EM (expected counts from inference under the current CPTs)
+so memory depends on the number of distinct patterns, not rows. Counts can be saved and
+updated with new labels later without reading the history again. Tables are estimated with
+Dirichlet smoothing: (count + alpha) / (row count + alpha * cardinality).
+
+Learn a net with:
+
+    python learning.py --structure nets/fraud_review.json --cases history.ndjson --output nets/learned.json \\
+        --counts nets/learned.counts.json
+"""
+
+import argparse
+import json
+from collections import Counter
+from itertools import islice
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # numpy only speeds up counting
+    np = None
+
+from BayesNet import UNOBSERVED, BayesNet
+from factors import ZeroProbabilityEvidence
+
+# Cases encoded per counting round
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Posterior cache of the net built for each EM iteration
+EM_CACHE_SIZE = 1 << 16
+
+# Labels given as booleans, for nets whose label variable takes "T" / "F". Strings are matched
+# lowercased, since a CSV label column only ever holds strings.
+BOOLEAN_LABELS = {True: "T", False: "F", "true": "T", "false": "F", "t": "T", "f": "F",
+                  "1": "T", "0": "F", "yes": "T", "no": "F"}
+
+
+class CPTCounts:
+    """
+    Sufficient statistics of a net structure: a flat count table per node, laid out like the
+    compiled CPTs of BayesNet (parents mixed-radix, last parent fastest, then the node's value),
+    plus the number of rows per incomplete evidence pattern.
+    """
+
+    def __init__(self, nodes, parents, label_var="Fraud"):
+        """
+        Args:
+            nodes (Dict[String, List[String]]) : Values of every variable (the net's "nodes").
+            parents (Dict[String, List[String]]) : Parents of every variable (the net's "parents").
+            label_var (String) : Variable a case's top-level "label" field is the value of.
+        """
+        self.nodes = nodes
+        self.parents = parents
+        self.label_var = label_var
+        self.names = list(nodes)
+        self.index = {var: i for i, var in enumerate(self.names)}
+        self.value_index = {var: {value: i for i, value in enumerate(values)} for var, values in nodes.items()}
+        self.cardinality = {var: len(values) for var, values in nodes.items()}
+
+        self.strides = {}
+        self.counts = {}
+        for var in self.names:
+            strides = []
+            stride = 1
+            for parent in reversed(parents[var]):
+                strides.insert(0, stride)
+                stride *= self.cardinality[parent]
+            self.strides[var] = strides
+            self.counts[var] = [0.0] * (stride * self.cardinality[var])
+
+        self.patterns = Counter()
+        self.rows = 0
+        self.dropped = Counter()
+
+    @classmethod
+    def from_net(cls, data, label_var="Fraud"):
+        """
+        Empty counts for the structure of a net definition (its tables, if any, are ignored).
+        """
+        return cls(data["nodes"], data["parents"], label_var)
+
+    def encode(self, case):
+        """
+        Value indices of a case, one per node, UNOBSERVED where it is missing. Unknown variables
+        and values are skipped and counted in dropped.
+
+        Raises:
+            ValueError : If the case has a label that is neither a value of the label variable nor a boolean.
+        """
+        evidence = case.get("evidence", {})
+        if not isinstance(evidence, dict):
+            evidence = {}
+        label = case.get("label", evidence.get("label"))
+        if label is not None:
+            evidence = {**evidence, self.label_var: self.label_value(label)}
+
+        codes = [UNOBSERVED] * len(self.names)
+        for var, value in evidence.items():
+            if var == "label":
+                continue
+            node = self.index.get(var)
+            value_index = self.value_index[var].get(value) if node is not None and isinstance(value, str) else None
+            if value_index is None:
+                self.dropped[var] += 1
+                continue
+            codes[node] = value_index
+        return codes
+
+    def label_value(self, label):
+        """
+        The value of the label variable a case label stands for. An unknown label fails loudly,
+        instead of quietly turning a labelled case into an unlabelled one for EM.
+        """
+        values = self.value_index[self.label_var]
+        if isinstance(label, str) and label in values:
+            return label
+        try:
+            value = BOOLEAN_LABELS.get(label.strip().lower() if isinstance(label, str) else label)
+        except TypeError:  # unhashable, e.g. a list
+            value = None
+        if value not in values:
+            raise ValueError(f"label {label!r} is not a value of {self.label_var!r} {list(values)} or a boolean")
+        return value
+
+    def update(self, cases, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Adds cases (any iterable, read chunk_size at a time) to the counts.
+        """
+        cases = iter(cases)
+        while True:
+            chunk = [self.encode(case) for case in islice(cases, chunk_size)]
+            if not chunk:
+                break
+            self.rows += len(chunk)
+            if np is None:
+                for codes in chunk:
+                    if UNOBSERVED in codes:
+                        self.patterns[tuple(codes)] += 1
+                    else:
+                        self._add_row(codes, 1.0)
+                continue
+
+            matrix = np.asarray(chunk, dtype=np.int64)
+            incomplete = (matrix == UNOBSERVED).any(axis=1)
+            self._add_complete(matrix[~incomplete])
+            if incomplete.any():
+                patterns, counts = np.unique(matrix[incomplete], axis=0, return_counts=True)
+                for pattern, count in zip(patterns.tolist(), counts.tolist()):
+                    self.patterns[tuple(pattern)] += count
+
+    def _flat_index(self, var, codes):
+        index = 0
+        for parent, stride in zip(self.parents[var], self.strides[var]):
+            index += codes[self.index[parent]] * stride
+        return index * self.cardinality[var] + codes[self.index[var]]
+
+    def _add_row(self, codes, weight, counts=None):
+        counts = self.counts if counts is None else counts
+        for var in self.names:
+            counts[var][self._flat_index(var, codes)] += weight
+
+    def _add_complete(self, matrix):
+        if not len(matrix):
+            return
+        for var in self.names:
+            card = self.cardinality[var]
+            flat = matrix[:, self.index[var]].copy()
+            for parent, stride in zip(self.parents[var], self.strides[var]):
+                flat += matrix[:, self.index[parent]] * (stride * card)
+            added = np.bincount(flat, minlength=len(self.counts[var])).tolist()
+            self.counts[var] = [a + b for a, b in zip(self.counts[var], added)]
+
+    def tables(self, alpha=1.0, counts=None):
+        """
+        Dirichlet-smoothed tables in the JSON format of BayesNet, from counts (self.counts by default).
+        Rows without data and alpha = 0 fall back to uniform.
+        """
+        counts = self.counts if counts is None else counts
+        tables = {}
+        for var in self.names:
+            card = self.cardinality[var]
+            flat = counts[var]
+            rows = []
+            for row in range(len(flat) // card):
+                cells = flat[row * card:(row + 1) * card]
+                total = sum(cells) + alpha * card
+                probabilities = [(c + alpha) / total for c in cells] if total > 0 else [1.0 / card] * card
+                assignment = []
+                rest = row
+                for parent in reversed(self.parents[var]):
+                    rest, value_index = divmod(rest, self.cardinality[parent])
+                    assignment.insert(0, self.nodes[parent][value_index])
+                rows.append([assignment, probabilities])
+            tables[var] = rows
+        return tables
+
+    def expected_counts(self, bn):
+        """
+        E-step: the complete-data counts plus the expected counts of every incomplete pattern
+        under the CPTs of bn. Patterns impossible under bn are skipped.
+        """
+        counts = {var: list(flat) for var, flat in self.counts.items()}
+        for pattern, weight in self.patterns.items():
+            pairs = tuple((node, code) for node, code in enumerate(pattern) if code != UNOBSERVED)
+            try:
+                for var in self.names:
+                    family = [self.index[parent] for parent in self.parents[var]] + [self.index[var]]
+                    hidden = [node for node in family if pattern[node] == UNOBSERVED]
+                    codes = list(pattern)
+                    for assignment, probability in _posterior_assignments(bn, pairs, hidden):
+                        for node, code in zip(hidden, assignment):
+                            codes[node] = code
+                        counts[var][self._flat_index(var, codes)] += weight * probability
+            except ZeroProbabilityEvidence:
+                continue
+        return counts
+
+    def fit(self, alpha=1.0, max_iterations=50, tolerance=1e-6, initial=None):
+        """
+        Estimates the tables. With incomplete patterns this runs EM from initial tables
+        (default: the smoothed complete-data estimate) until no probability moves by more than
+        tolerance or max_iterations is reached.
+
+        Returns:
+            (Dict, int) : The tables, and the number of EM iterations run.
+        """
+        tables = initial if initial is not None else self.tables(alpha)
+        iteration = 0
+        while self.patterns and iteration < max_iterations:
+            iteration += 1
+            bn = BayesNet.from_dict({"nodes": self.nodes, "parents": self.parents, "tables": tables},
+                                    cache_size=EM_CACHE_SIZE)
+            updated = self.tables(alpha, self.expected_counts(bn))
+            # rows are matched by parent assignment, initial tables may list them in any order
+            change = 0.0
+            for var in self.names:
+                old_rows = {tuple(assignment): probabilities for assignment, probabilities in tables[var]}
+                for assignment, new in updated[var]:
+                    change = max(change, max(abs(a - b) for a, b in zip(old_rows[tuple(assignment)], new)))
+            tables = updated
+            if change <= tolerance:
+                break
+        return tables, iteration
+
+    def to_dict(self):
+        return {
+            "nodes": self.nodes,
+            "parents": self.parents,
+            "label_var": self.label_var,
+            "rows": self.rows,
+            "dropped": dict(self.dropped),
+            "counts": self.counts,
+            "patterns": [[list(pattern), count] for pattern, count in self.patterns.items()],
+        }
+
+    def save(self, path):
+        Path(path).write_text(json.dumps(self.to_dict()))
+
+    @classmethod
+    def load(cls, path, label_var=None):
+        """
+        Counts saved with save.
+
+        Raises:
+            ValueError : If label_var is given and the counts were made with another label variable.
+        """
+        data = json.loads(Path(path).read_text())
+        stored = data.get("label_var", "Fraud")
+        if label_var is not None and label_var != stored:
+            raise ValueError(f"{path} was counted with label variable {stored!r}, not {label_var!r}")
+        counts = cls(data["nodes"], data["parents"], stored)
+        counts.rows = data["rows"]
+        counts.dropped = Counter(data.get("dropped", {}))
+        counts.counts = data["counts"]
+        counts.patterns = Counter({tuple(pattern): count for pattern, count in data["patterns"]})
+        return counts
+
+
+def _posterior_assignments(bn, pairs, hidden):
+    """
+    Yields (value indices of hidden, P(assignment | evidence pairs)) for every assignment of
+    positive probability, by the chain rule over cached_infer_encoded posteriors.
+    """
+    if not hidden:
+        yield (), 1.0
+        return
+    node, rest = hidden[0], hidden[1:]
+    var = bn.node_names[node]
+    distribution = bn.cached_infer_encoded(var, pairs)
+    for value_index, value in enumerate(bn.nodes[var]):
+        probability = distribution[value]
+        if probability <= 0.0:
+            continue
+        for tail, tail_probability in _posterior_assignments(bn, pairs + ((node, value_index),), rest):
+            yield (value_index,) + tail, probability * tail_probability
+
+
+def learn_net(structure, counts, alpha=1.0, max_iterations=50, tolerance=1e-6):
+    """
+    A net definition (nodes, parents, learned tables, and the structure's inference config if
+    any) that BayesNet loads. EM starts from the structure's own tables when it has complete ones.
+    """
+    initial = None
+    if counts.patterns and structure.get("tables"):
+        try:
+            BayesNet.from_dict(structure)
+            initial = structure["tables"]
+        except ValueError:
+            pass
+    tables, _ = counts.fit(alpha, max_iterations, tolerance, initial)
+    net = {"nodes": structure["nodes"], "parents": structure["parents"], "tables": tables}
+    if structure.get("inference"):
+        net["inference"] = structure["inference"]
+    return net
+
+
+def main():
+    from fraud_review_prioritization import iter_cases
+
+    parser = argparse.ArgumentParser(description="Learn the CPTs of a Bayes net from labelled cases.")
+    parser.add_argument("--structure", type=str, required=True,
+                        help="Net JSON whose nodes and parents are kept (its tables only seed EM).")
+    parser.add_argument("--cases", type=str, nargs="*", default=[],
+                        help="Labelled case files (.json, .ndjson/.jsonl or .csv), read as a stream.")
+    parser.add_argument("--output", type=str, required=True, help="Where to write the learned net JSON.")
+    parser.add_argument("--counts", type=str, default=None,
+                        help="Counts file: loaded if it exists, updated with --cases and saved back, so new "
+                        "labels can be added later without the history.")
+    parser.add_argument("--label-var", type=str, default=None,
+                        help="Variable a case's \"label\" field sets (default: the one of --counts, or Fraud).")
+    parser.add_argument("--alpha", type=float, default=1.0, help="Dirichlet pseudo-count per table cell.")
+    parser.add_argument("--em-iterations", type=int, default=50, help="Most EM iterations for incomplete cases.")
+    parser.add_argument("--tolerance", type=float, default=1e-6, help="EM stops once no probability moves more.")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Cases counted per round.")
+    args = parser.parse_args()
+
+    structure = json.loads(Path(args.structure).read_text())
+    if args.counts and Path(args.counts).exists():
+        try:
+            counts = CPTCounts.load(args.counts, args.label_var)
+        except ValueError as error:
+            parser.error(str(error))
+        if counts.nodes != structure["nodes"] or counts.parents != structure["parents"]:
+            parser.error(f"{args.counts} was counted for a different structure")
+    else:
+        counts = CPTCounts.from_net(structure, args.label_var or "Fraud")
+
+    for path in args.cases:
+        counts.update(iter_cases(path), chunk_size=args.chunk_size)
+    if args.counts:
+        counts.save(args.counts)
+
+    net = learn_net(structure, counts, args.alpha, args.em_iterations, args.tolerance)
+    Path(args.output).write_text(json.dumps(net, indent=2))
+    incomplete = sum(counts.patterns.values())
+    print(f"Learned {args.output} from {counts.rows} cases ({incomplete} with missing values, "
+          f"{len(counts.patterns)} distinct patterns)")
+    if counts.dropped:
+        print(f"Dropped evidence: {dict(counts.dropped)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Bounded, thread-safe LRU cache of posterior distributions for BayesNet.
+
+Real traffic only produces a handful of distinct evidence patterns, so most
+P(query | evidence) lookups can be answered without running inference at all.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class PosteriorCache:
+    def __init__(self, maxsize=1024):
+        """
+        Args:
+            maxsize (int) : Most distributions kept before the least recently used is evicted.
+                            0 disables caching.
+        """
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(query, evidence, method):
+        """
+        Canonical key: the order evidence was given in does not matter.
+        """
+        return (query, method, tuple(sorted(evidence.items())))
+
+    def get(self, key):
+        """
+        Returns the cached distribution for key (and marks it recently used), or None.
+        """
+        with self._lock:
+            distribution = self._entries.get(key)
+            if distribution is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return distribution
+
+    def put(self, key, distribution):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = distribution
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def copy_from(self, other, keep):
+        """
+        Copies the entries of another cache for which keep(key) is true, least recently used
+        first so their order is kept. Counters are not copied. Returns how many were copied.
+        """
+        with other._lock:
+            entries = [(key, distribution) for key, distribution in other._entries.items() if keep(key)]
+        for key, distribution in entries:
+            self.put(key, distribution)
+        return len(entries)
+
+    def clear(self):
+        """
+        Drops every entry. Counters are kept so stats cover the whole run.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns hit/miss counters and the current fill as a dict.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
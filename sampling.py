@@ -0,0 +1,255 @@
+"""
+Approximate inference by sampling for BayesNet, for nets too large for exact inference.
+
+Both samplers work on many samples at once with NumPy and draw in rounds until either the
+sample budget is spent or the standard error of every posterior probability is at most
+target_se. They return an estimate dict:
+
+    {"posterior": {value: p}, "stderr": {value: se}, "interval": {value: (low, high)}, "samples": n}
+
+where interval is the 95% normal confidence interval, clipped to [0, 1].
+"""
+
+import math
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for sampling
+    np = None
+
+from factors import ZeroProbabilityEvidence
+
+# z value of a two-sided 95% normal confidence interval
+Z_95 = 1.959963984540054
+
+
+class _Sampler:
+    """
+    The CPTs of nodes as (rows, values) NumPy arrays, with every parent resolved to either a
+    column of the sample matrix or a fixed evidence code.
+    """
+
+    def __init__(self, bn, codes, nodes):
+        self.nodes = list(nodes)
+        self.column = {var: i for i, var in enumerate(self.nodes)}
+        self.codes = {var: code for var, code in codes.items() if var in self.column}
+        self.tables = {}
+        self.families = {}
+        self.offsets = {}
+        for var in self.nodes:
+            self.tables[var] = np.asarray(bn.cpt[var], dtype=np.float64).reshape(-1, bn.cardinality[var])
+            # parents outside nodes are always observed (see BayesNet.relevant_nodes)
+            self.families[var] = [(self.column[parent], stride)
+                                  for parent, stride in zip(bn.parents[var], bn.strides[var])
+                                  if parent in self.column]
+            self.offsets[var] = sum(codes[parent] * stride
+                                    for parent, stride in zip(bn.parents[var], bn.strides[var])
+                                    if parent not in self.column)
+
+        # children of every node, for the Markov blanket of the Gibbs sampler
+        self.children = {var: [child for child in bn.children[var] if child in self.column] for var in self.nodes}
+
+    def rows(self, var, states):
+        """
+        CPT row of var for every sample in states (an N x len(nodes) integer matrix).
+        """
+        rows = np.full(states.shape[0], self.offsets[var], dtype=np.int64)
+        for column, stride in self.families[var]:
+            rows += states[:, column] * stride
+        return rows
+
+    def forward(self, rng, count):
+        """
+        Samples count states in topological order with the evidence clamped.
+
+        Returns:
+            (numpy.ndarray, numpy.ndarray) : The states and the log likelihood weight of each one.
+        """
+        states = np.zeros((count, len(self.nodes)), dtype=np.int64)
+        log_weights = np.zeros(count)
+        with np.errstate(divide="ignore"):
+            for var in self.nodes:
+                probabilities = self.tables[var][self.rows(var, states)]
+                if var in self.codes:
+                    states[:, self.column[var]] = self.codes[var]
+                    log_weights += np.log(probabilities[:, self.codes[var]])
+                else:
+                    states[:, self.column[var]] = draw(rng, probabilities)
+        return states, log_weights
+
+
+def draw(rng, probabilities):
+    """
+    Draws one value index per row of an N x K array of (possibly unnormalized) probabilities.
+    """
+    cumulative = np.cumsum(probabilities, axis=1)
+    u = rng.random(probabilities.shape[0]) * cumulative[:, -1]
+    return np.minimum((u[:, None] >= cumulative).sum(axis=1), probabilities.shape[1] - 1)
+
+
+def _estimate(bn, query, posterior, stderr, samples):
+    result = {"posterior": {}, "stderr": {}, "interval": {}, "samples": int(samples)}
+    for value, p, se in zip(bn.nodes[query], posterior, stderr):
+        p, se = float(p), float(se)
+        result["posterior"][value] = p
+        result["stderr"][value] = se
+        result["interval"][value] = (max(0.0, p - Z_95 * se), min(1.0, p + Z_95 * se))
+    return result
+
+
+def likelihood_weighting(bn, query, codes, samples=10_000, target_se=None, batch=1000, seed=None, nodes=None):
+    """
+    Estimates P(query | evidence) by likelihood weighting: the hidden nodes are sampled from
+    their CPTs and each sample is weighted by the probability of the evidence given it.
+
+    Args:
+        bn (BayesNet) : A compiled bayes net.
+        query (String) : The variable we wish to know the distribution of.
+        codes (Dict) : Index-coded evidence (see BayesNet.encode_evidence), not including query.
+        samples (int) : Sample budget.
+        target_se (float) : Stop as soon as every standard error is at most this (None: use the budget).
+        batch (int) : Samples drawn per round.
+        seed (int) : Seed of the random generator, None for a fresh one.
+        nodes (List[String]) : Only sample these nodes (see BayesNet.relevant_nodes).
+
+    Returns:
+        Dict : The estimate, see the module docstring. The standard error is the delta-method
+               one of the self-normalized weighted mean.
+
+    Raises:
+        ZeroProbabilityEvidence : If no sample has a positive weight.
+        ValueError : If samples or batch is not positive.
+    """
+    if np is None:
+        raise ImportError("sampling requires numpy")
+    if samples <= 0 or batch <= 0:
+        raise ValueError(f"likelihood_weighting needs positive samples and batch, got {samples} and {batch}")
+    if nodes is None:
+        nodes = bn.order
+
+    rng = np.random.default_rng(seed)
+    sampler = _Sampler(bn, codes, nodes)
+    card = bn.cardinality[query]
+    query_column = sampler.column[query]
+
+    # running weight sums, all relative to exp(scale) so tiny weights do not underflow
+    scale = -math.inf
+    sum_w = sum_w2 = 0.0
+    sum_wv = np.zeros(card)
+    sum_w2v = np.zeros(card)
+    drawn = 0
+    while drawn < samples:
+        count = min(batch, samples - drawn)
+        states, log_weights = sampler.forward(rng, count)
+        drawn += count
+
+        top = log_weights.max()
+        if top == -math.inf:
+            continue
+        if top > scale:
+            factor = math.exp(scale - top)
+            sum_w *= factor
+            sum_wv *= factor
+            sum_w2 *= factor * factor
+            sum_w2v *= factor * factor
+            scale = top
+
+        weights = np.exp(log_weights - scale)
+        values = states[:, query_column]
+        sum_w += weights.sum()
+        sum_w2 += (weights * weights).sum()
+        sum_wv += np.bincount(values, weights=weights, minlength=card)
+        sum_w2v += np.bincount(values, weights=weights * weights, minlength=card)
+
+        posterior = sum_wv / sum_w
+        stderr = np.sqrt(np.maximum(sum_w2v * (1 - 2 * posterior) + posterior ** 2 * sum_w2, 0.0)) / sum_w
+        if target_se is not None and stderr.max() <= target_se:
+            break
+
+    if sum_w == 0:
+        raise ZeroProbabilityEvidence()
+    return _estimate(bn, query, posterior, stderr, drawn)
+
+
+def gibbs_sampling(bn, query, codes, samples=10_000, target_se=None, chains=32, burn_in=100, seed=None, nodes=None):
+    """
+    Estimates P(query | evidence) with a Gibbs sampler: chains independent Markov chains, each
+    sweep resamples every hidden node from its distribution given its Markov blanket.
+
+    Chains start from likelihood weighting samples of positive weight. Each sweep contributes
+    the conditional distribution of query given the rest of the state (Rao-Blackwellized), and
+    the standard error comes from the spread of the per-chain means. Nets with deterministic
+    CPTs can leave a chain stuck in one region; prefer likelihood weighting for those.
+
+    Args:
+        bn (BayesNet) : A compiled bayes net.
+        query (String) : The variable we wish to know the distribution of.
+        codes (Dict) : Index-coded evidence (see BayesNet.encode_evidence), not including query.
+        samples (int) : Sample budget after burn-in, summed over the chains.
+        target_se (float) : Stop as soon as every standard error is at most this (None: use the budget).
+        chains (int) : Number of chains run side by side (at least 2).
+        burn_in (int) : Sweeps discarded at the start of every chain.
+        seed (int) : Seed of the random generator, None for a fresh one.
+        nodes (List[String]) : Only sample these nodes (see BayesNet.relevant_nodes).
+
+    Returns:
+        Dict : The estimate, see the module docstring.
+
+    Raises:
+        ZeroProbabilityEvidence : If no starting state consistent with the evidence is found.
+        ValueError : If samples is not positive, or there are fewer than 2 chains.
+    """
+    if np is None:
+        raise ImportError("sampling requires numpy")
+    if samples <= 0:
+        raise ValueError(f"gibbs_sampling needs a positive number of samples, got {samples}")
+    if chains < 2:
+        raise ValueError("gibbs_sampling needs at least 2 chains to estimate its error")
+    if nodes is None:
+        nodes = bn.order
+
+    rng = np.random.default_rng(seed)
+    sampler = _Sampler(bn, codes, nodes)
+    card = bn.cardinality[query]
+    hidden = [var for var in sampler.nodes if var not in sampler.codes]
+
+    # starting states: resample chains states out of a likelihood weighting round
+    candidates, log_weights = sampler.forward(rng, max(1000, 10 * chains))
+    if log_weights.max() == -math.inf:
+        raise ZeroProbabilityEvidence()
+    weights = np.exp(log_weights - log_weights.max())
+    states = candidates[rng.choice(len(weights), size=chains, p=weights / weights.sum())]
+
+    def sweep():
+        for var in hidden:
+            column = sampler.column[var]
+            conditional = np.empty((chains, bn.cardinality[var]))
+            for value in range(bn.cardinality[var]):
+                states[:, column] = value
+                p = sampler.tables[var][sampler.rows(var, states), value]
+                for child in sampler.children[var]:
+                    p = p * sampler.tables[child][sampler.rows(child, states), states[:, sampler.column[child]]]
+                conditional[:, value] = p
+            states[:, column] = draw(rng, conditional)
+            if var == query:
+                sweep_posterior[:] = conditional / conditional.sum(axis=1, keepdims=True)
+
+    sweep_posterior = np.zeros((chains, card))
+    for _ in range(burn_in):
+        sweep()
+
+    totals = np.zeros((chains, card))
+    sweeps = 0
+    while sweeps * chains < samples:
+        sweep()
+        totals += sweep_posterior
+        sweeps += 1
+
+        if target_se is not None and sweeps % max(1, 1000 // chains) == 0:
+            means = totals / sweeps
+            if (means.std(axis=0, ddof=1) / math.sqrt(chains)).max() <= target_se:
+                break
+
+    means = totals / max(sweeps, 1)
+    return _estimate(bn, query, means.mean(axis=0), means.std(axis=0, ddof=1) / math.sqrt(chains),
+                     sweeps * chains)
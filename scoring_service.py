@@ -0,0 +1,343 @@
+"""
+Real-time fraud scoring over HTTP, for checkout instead of the batch CLI.
+
+The net is loaded once. Concurrent requests are coalesced into micro-batches: the first case
+waiting opens a window of --max-wait-ms, and everything that arrives before it closes (up to
+--max-batch cases) is scored in a single score_cases call. Standard library only (asyncio).
+
+The net file is watched (NetHandle): a new version is validated in the background and swapped
+in between micro-batches, and every scored row carries the net_version it was scored with.
+
+Endpoints:
+    POST /score   body: one case, or a list of cases (the shape load_cases expects)
+                  returns: the scored row, or a list of rows in input order
+    GET  /stats   throughput and latency counters, net version and reloads
+    GET  /health  {"status": "ok"}
+
+Run with:  python scoring_service.py --net nets/fraud_review.json --port 8080
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+from BayesNet import BayesNet
+from fraud_review_prioritization import NetHandle, ensure_net_file, load_net, score_cases
+
+# Latencies kept for the p50/p99 counters
+LATENCY_WINDOW = 10_000
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(q * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class ScoringService:
+    def __init__(
+        self,
+        bn: Union[BayesNet, NetHandle],
+        max_batch: int = 256,
+        max_wait_ms: float = 2.0,
+        explain: bool = False,
+        batch: bool = False,
+    ):
+        """
+        Args:
+            bn (BayesNet) : The loaded net, only ever used from one scoring thread. With a NetHandle,
+                            every micro-batch is scored with its current version instead.
+            max_batch (int) : Most cases scored in one micro-batch.
+            max_wait_ms (float) : How long the first waiting case holds the batch open for others.
+            explain, batch : Passed to score_cases.
+        """
+        self.bn = bn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.options = {"explain": explain, "batch": batch}
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        # one thread, so the event loop keeps accepting requests while a batch is scored
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.cases = 0
+        self.batches = 0
+        self.errors = 0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._batch_sizes: Deque[int] = deque(maxlen=LATENCY_WINDOW)
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._run_batches())
+
+    async def close(self) -> None:
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    async def score(self, cases: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Scores cases as part of the next micro-batch and returns their rows in input order.
+        """
+        if self._queue is None:
+            await self.start()
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((cases, future))
+        try:
+            return await future
+        finally:
+            self.requests += 1
+            self._latencies.append(time.perf_counter() - start)
+
+    async def _run_batches(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            size = len(pending[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            cases = [case for request_cases, _ in pending for case in request_cases]
+            try:
+                rows = await loop.run_in_executor(self._executor, self._score_batch, cases)
+            except Exception:
+                # a malformed case must only fail its own request: score the requests one by one
+                await self._run_separately(pending)
+                continue
+
+            self._count_batch(len(cases))
+            offset = 0
+            for request_cases, future in pending:
+                if not future.done():
+                    future.set_result(rows[offset:offset + len(request_cases)])
+                offset += len(request_cases)
+
+    async def _run_separately(self, pending: List[Tuple[List[Dict[str, Any]], asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        for request_cases, future in pending:
+            try:
+                rows = await loop.run_in_executor(self._executor, self._score_batch, request_cases)
+            except Exception as exc:
+                self.errors += 1
+                if not future.done():
+                    future.set_exception(exc)
+                continue
+            self._count_batch(len(request_cases))
+            if not future.done():
+                future.set_result(rows)
+
+    def _count_batch(self, size: int) -> None:
+        self.batches += 1
+        self.cases += size
+        self._batch_sizes.append(size)
+
+    def _score_batch(self, cases: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if isinstance(self.bn, NetHandle):
+            bn, version = self.bn.acquire()
+            return score_cases(bn, cases, net_version=version, **self.options)
+        return score_cases(self.bn, cases, **self.options)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the throughput and latency counters as a dict.
+        """
+        uptime = time.perf_counter() - self.started
+        latencies = sorted(self._latencies)
+        net = self.bn.stats() if isinstance(self.bn, NetHandle) else {}
+        return {
+            "uptime_s": round(uptime, 3),
+            "requests": self.requests,
+            "cases": self.cases,
+            "batches": self.batches,
+            "errors": self.errors,
+            "cases_per_sec": round(self.cases / uptime, 3) if uptime else 0.0,
+            "mean_batch_size": round(sum(self._batch_sizes) / len(self._batch_sizes), 3) if self._batch_sizes else 0.0,
+            "latency_p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "latency_p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+            **net,
+        }
+
+    # -----------------------------
+    # HTTP
+    # -----------------------------
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serves HTTP/1.1 requests on one connection (keep-alive) until the client closes it.
+        """
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload = await self.route(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            # client went away or sent something that is not HTTP
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/stats":
+            return 200, self.stats()
+        if path != "/score":
+            return 404, {"error": f"no route {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST /score"}
+
+        try:
+            data = json.loads(body)
+        except ValueError:
+            self.errors += 1
+            return 400, {"error": "body is not valid JSON"}
+        single = isinstance(data, dict)
+        cases = [data] if single else data
+        if not isinstance(cases, list) or not all(isinstance(case, dict) for case in cases):
+            self.errors += 1
+            return 400, {"error": "body must be a case object or a list of case objects"}
+        if not cases:
+            return 200, []
+
+        try:
+            rows = await self.score(cases)
+        except Exception as exc:
+            return 500, {"error": str(exc)}
+        return 200, rows[0] if single else rows
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        """
+        Starts the batcher and the HTTP server. port=0 picks a free port (see server.sockets).
+        """
+        await self.start()
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """
+    Reads one HTTP request. Returns (method, path, headers, body), or None when the client closed.
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    method, path, _ = line.decode("latin-1").split(" ", 2)
+
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return method, path.split("?", 1)[0], headers, body
+
+
+async def write_response(writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool = True) -> None:
+    body = json.dumps(payload).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+
+async def request_json(host: str, port: int, method: str, path: str, payload: Any = None) -> Tuple[int, Any]:
+    """
+    Minimal local client: sends one request on a fresh connection and returns (status, decoded JSON).
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+    head = (
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value.strip())
+    data = json.loads(await reader.readexactly(length))
+    writer.close()
+    return status, data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP fraud scoring service with request micro-batching.")
+    parser.add_argument("--net", type=str, default="nets/fraud_review.json",
+                        help="Path to the Bayes Net JSON (or .bnc) file. If it does not exist, a default one is created.")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on.")
+    parser.add_argument("--max-batch", type=int, default=256, help="Most cases scored in one micro-batch.")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0,
+                        help="How long a request waits for others to join its micro-batch.")
+    parser.add_argument("--batch", action="store_true", help="Score micro-batches with NumPy (requires numpy).")
+    parser.add_argument("--cache-size", type=int, default=1024,
+                        help="How many distinct evidence patterns to keep in the posterior cache.")
+    parser.add_argument("--reload-interval", type=float, default=1.0,
+                        help="Seconds between checks of --net for a new version (0 loads it once and never reloads).")
+    args = parser.parse_args()
+
+    net_path = ensure_net_file(args.net)
+    if args.reload_interval > 0:
+        net = NetHandle(net_path, check_interval=args.reload_interval, cache_size=args.cache_size).start()
+    else:
+        net = load_net(net_path, cache_size=args.cache_size)
+    service = ScoringService(net, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms, batch=args.batch)
+
+    async def run() -> None:
+        server = await service.serve(args.host, args.port)
+        print(f"Scoring on http://{args.host}:{args.port}/score")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
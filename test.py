@@ -3,12 +3,47 @@ import argparse
 from tests import TestProbQuery
 from tests import TestEnumerateAll
 from tests import TestEnumerateAsk
+from tests import TestVariableElimination
+from tests import TestJunctionTree
+from tests import TestBatchQuery
+from tests import TestPosteriorCache
+from tests import TestCompiledScoring
+from tests import TestStreaming
+from tests import TestParallel
+from tests import TestPruning
+from tests import TestNumericModes
+from tests import TestCompiledNet
+from tests import TestSampling
+from tests import TestScoringService
+from tests import TestReviewQueue
+from tests import TestInstrumentation
+from tests import TestNetValidation
+from tests import TestScoringPolicies
+from tests import TestValueOfInformation
+from tests import TestLearning
+from tests import TestHotReload
+from tests import TestEvidenceEncoder
+from tests import TestCaseColumns
 
 from tests.custom_test_runner import run_tests_with_custom_runner
 
 if __name__ == "__main__":
     # Define the mapping of question names to test classes
-    tests = {"q1": TestProbQuery, "q2": TestEnumerateAll, "q3": TestEnumerateAsk}
+    tests = {"q1": TestProbQuery, "q2": TestEnumerateAll, "q3": TestEnumerateAsk,
+             "q4": TestVariableElimination, "q5": TestJunctionTree,
+             "q6": TestBatchQuery, "q7": TestPosteriorCache,
+             "q8": TestCompiledScoring, "q9": TestStreaming,
+             "q10": TestParallel, "q11": TestPruning,
+             "q12": TestNumericModes, "q13": TestCompiledNet,
+             "q14": TestSampling, "q15": TestScoringService,
+             "q16": TestReviewQueue, "q17": TestInstrumentation,
+             "q18": TestNetValidation,
+             "q19": TestScoringPolicies,
+             "q20": TestValueOfInformation,
+             "q21": TestLearning,
+             "q22": TestHotReload,
+             "q23": TestEvidenceEncoder,
+             "q24": TestCaseColumns}
     
     # Set up command line argument parsing
     parser = argparse.ArgumentParser(description='Run unit tests with optional question filtering')
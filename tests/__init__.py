@@ -5,6 +5,37 @@ Init file to make tests directory a Python package
 from .q1_test_prob_query import TestProbQuery
 from .q2_test_enumerate_all import TestEnumerateAll
 from .q3_test_enumerate_ask import TestEnumerateAsk
+from .q4_test_variable_elimination import TestVariableElimination
+from .q5_test_junction_tree import TestJunctionTree
+from .q6_test_batch_query import TestBatchQuery
+from .q7_test_posterior_cache import TestPosteriorCache
+from .q8_test_compiled_scoring import TestCompiledScoring
+from .q9_test_streaming import TestStreaming
+from .q10_test_parallel import TestParallel
+from .q11_test_pruning import TestPruning
+from .q12_test_numeric_modes import TestNumericModes
+from .q13_test_compiled_net import TestCompiledNet
+from .q14_test_sampling import TestSampling
+from .q15_test_scoring_service import TestScoringService
+from .q16_test_review_queue import TestReviewQueue
+from .q17_test_instrumentation import TestInstrumentation
+from .q18_test_net_validation import TestNetValidation
+from .q19_test_scoring_policies import TestScoringPolicies
+from .q20_test_value_of_information import TestValueOfInformation
+from .q21_test_learning import TestLearning
+from .q22_test_hot_reload import TestHotReload
+from .q23_test_evidence_encoder import TestEvidenceEncoder
+from .q24_test_case_columns import TestCaseColumns
 
 
-__all__ = ['TestProbQuery', "TestEnumerateAll", "TestEnumerateAsk"]
+__all__ = ['TestProbQuery', "TestEnumerateAll", "TestEnumerateAsk", "TestVariableElimination",
+           "TestJunctionTree", "TestBatchQuery",
+           "TestPosteriorCache", "TestCompiledScoring",
+           "TestStreaming", "TestParallel",
+           "TestPruning", "TestNumericModes",
+           "TestCompiledNet", "TestSampling",
+           "TestScoringService", "TestReviewQueue",
+           "TestInstrumentation", "TestNetValidation",
+           "TestScoringPolicies", "TestValueOfInformation",
+           "TestLearning", "TestHotReload",
+           "TestEvidenceEncoder", "TestCaseColumns"]
@@ -0,0 +1,28 @@
+import os
+import tempfile
+import unittest
+from BayesNet import BayesNet
+from fraud_review_prioritization import ensure_net_file, load_cases, parallel_prioritize, prioritize_cases
+from tests.q9_test_streaming import tied_cases
+
+class TestParallel(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.net_path = ensure_net_file(os.path.join(self.tmp.name, "fraud_review.json"))
+        self.bn = BayesNet(self.net_path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parallel_matches_single_process(self):
+        cases = tied_cases(400) + load_cases(None)
+        ranked = prioritize_cases(self.bn, cases)
+
+        scored = []
+        top = parallel_prioritize(self.bn, self.net_path, iter(cases), workers=2, top=15,
+                                  chunk_size=33, on_scored=scored.append)
+        self.assertEqual(top, ranked[:15])
+        self.assertEqual([row["case_id"] for row in scored], [str(c["case_id"]) for c in cases])
+
+        top = parallel_prioritize(self.bn, self.net_path, iter(cases), workers=3, top=1000, chunk_size=50)
+        self.assertEqual(top, ranked)
@@ -0,0 +1,71 @@
+import unittest
+from BayesNet import BayesNet, ZeroProbabilityEvidence
+from fraud_review_prioritization import build_default_fraud_net_json, fraud_probability
+from tests.q4_test_variable_elimination import all_evidence
+
+PLACES = 10
+
+class TestPruning(unittest.TestCase):
+    def test_relevant_nodes_sprinkler(self):
+        bn = BayesNet("./nets/sprinkler.json")
+
+        # everything below Cloudy is barren
+        self.assertEqual(bn.relevant_nodes("Cloudy", []), ["Cloudy"])
+        # Cloudy d-separates Sprinkler from Rain, and its own prior is a constant
+        self.assertEqual(bn.relevant_nodes("Sprinkler", ["Cloudy", "Rain"]), ["Sprinkler"])
+        # explaining away: WetGrass connects Sprinkler and Rain
+        self.assertEqual(bn.relevant_nodes("Sprinkler", ["WetGrass"]), ["Cloudy", "Sprinkler", "Rain", "WetGrass"])
+        self.assertEqual(bn.relevant_nodes("Cloudy", ["Sprinkler", "Rain", "WetGrass"]), ["Cloudy", "Sprinkler", "Rain"])
+        # evidence on the query itself is ignored, like in enumerate_ask
+        self.assertEqual(bn.relevant_nodes("Rain", ["Rain"]), bn.relevant_nodes("Rain", []))
+
+    def test_relevant_nodes_cached(self):
+        bn = BayesNet("./nets/books.json")
+        first = bn.relevant_nodes("Honesty", ["Quality"])
+        self.assertIs(bn.relevant_nodes("Honesty", {"Quality": "3"}), first)
+        self.assertEqual(first, ["Honesty"])
+
+    def assert_pruned_matches(self, bn):
+        for query in bn.nodes:
+            for evidence in all_evidence(bn, query):
+                try:
+                    expected = bn.enumerate_ask(query, evidence, prune=False)
+                except ZeroDivisionError:
+                    for method in ("enumerate", "ve"):
+                        with self.assertRaises(ZeroProbabilityEvidence):
+                            bn.infer(query, evidence, method=method)
+                    continue
+                for method in ("enumerate", "ve"):
+                    actual = bn.infer(query, evidence, method=method)
+                    for value in expected:
+                        self.assertAlmostEqual(actual[value], expected[value], places=PLACES)
+
+    def test_pruned_matches_full_sprinkler(self):
+        self.assert_pruned_matches(BayesNet("./nets/sprinkler.json"))
+
+    def test_pruned_matches_full_books(self):
+        self.assert_pruned_matches(BayesNet("./nets/books.json"))
+
+    def test_impossible_evidence_outside_the_query_component(self):
+        # VPN hangs off IPMismatch, which is observed, so its CPT is pruned away for Fraud
+        data = build_default_fraud_net_json()
+        data["nodes"]["VPN"] = ["F", "T"]
+        data["parents"]["VPN"] = ["IPMismatch"]
+        data["tables"]["VPN"] = [[["F"], [1.0, 0.0]], [["T"], [0.4, 0.6]]]
+        bn = BayesNet.from_dict(data)
+        self.assertNotIn("VPN", bn.relevant_nodes("Fraud", ["IPMismatch", "VPN"]))
+
+        for evidence, possible in (({"IPMismatch": "F", "VPN": "T"}, False), ({"IPMismatch": "T", "VPN": "T"}, True)):
+            for method, log_space in (("ve", False), ("ve", True), ("enumerate", False), ("lw", False)):
+                with self.subTest(evidence=evidence, method=method, log_space=log_space):
+                    if possible:
+                        expected = bn.infer("Fraud", evidence, prune=False)
+                        self.assertAlmostEqual(bn.infer("Fraud", evidence, method=method, log_space=log_space)["T"],
+                                               expected["T"], places=PLACES if method != "lw" else 1)
+                        continue
+                    with self.assertRaises(ZeroProbabilityEvidence):
+                        bn.infer("Fraud", evidence, method=method, prune=False, log_space=log_space)
+                    with self.assertRaises(ZeroProbabilityEvidence):
+                        bn.infer("Fraud", evidence, method=method, log_space=log_space)
+        with self.assertRaises(ZeroProbabilityEvidence):
+            fraud_probability(bn, {"IPMismatch": "F", "VPN": "T"})
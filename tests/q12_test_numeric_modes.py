@@ -0,0 +1,106 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from unittest import mock
+import fraud_review_prioritization as frp
+from BayesNet import BayesNet, ZeroProbabilityEvidence
+from fraud_review_prioritization import build_default_fraud_net_json, prioritize_cases
+from tests.q4_test_variable_elimination import all_evidence
+
+PLACES = 10
+
+def rare_chain(depth):
+    """
+    Chain X0 -> X1 -> ... where observing every node as "T" has probability about 1e-(depth).
+    """
+    names = [f"X{i}" for i in range(depth)]
+    nodes = {name: ["T", "F"] for name in names}
+    parents = {name: ([names[i - 1]] if i else []) for i, name in enumerate(names)}
+    tables = {names[0]: [[[], [0.5, 0.5]]]}
+    for name in names[1:]:
+        tables[name] = [[["T"], [0.1, 0.9]], [["F"], [0.3, 0.7]]]
+    return BayesNet.from_dict({"nodes": nodes, "parents": parents, "tables": tables})
+
+class TestNumericModes(unittest.TestCase):
+    def test_log_space_matches_linear(self):
+        for path in ("./nets/sprinkler.json", "./nets/books.json"):
+            bn = BayesNet(path)
+            for query in bn.nodes:
+                for evidence in all_evidence(bn, query):
+                    try:
+                        expected = bn.infer(query, evidence)
+                    except ZeroProbabilityEvidence:
+                        with self.assertRaises(ZeroProbabilityEvidence):
+                            bn.infer(query, evidence, log_space=True)
+                        continue
+                    actual = bn.infer(query, evidence, log_space=True)
+                    for value in expected:
+                        self.assertAlmostEqual(actual[value], expected[value], places=PLACES)
+
+    def test_log_space_survives_underflow(self):
+        bn = rare_chain(400)
+        names = list(bn.nodes)
+        # drop a middle observation so there is something to sum over
+        evidence = {name: "T" for name in names[1:] if name != "X200"}
+
+        # without pruning, 0.1 ** 399 underflows in the linear domain
+        with self.assertRaises(ZeroProbabilityEvidence):
+            bn.infer("X0", evidence, prune=False)
+
+        # P(X0 | X1=T) only depends on the first link
+        for prune in (False, True):
+            res = bn.infer("X0", evidence, prune=prune, log_space=True)
+            self.assertAlmostEqual(res["T"], 0.05 / (0.05 + 0.15), places=PLACES)
+
+        with self.assertRaises(ValueError):
+            bn.infer("X0", evidence, method="enumerate", log_space=True)
+
+    def test_float32_batch_within_bound(self):
+        bn = BayesNet("./nets/books.json")
+        for query in bn.nodes:
+            evidence_list = list(all_evidence(bn, query))
+            matrix = bn.encode_evidence_matrix(evidence_list)
+            exact = bn.batch_query(query, matrix)
+            fast = bn.batch_query(query, matrix, dtype="float32")
+            self.assertEqual(str(fast.dtype), "float32")
+
+            # documented bound: (n + m + 2) * 2 ** -24 relative error
+            summed_terms = bn.joint_array().size // len(bn.nodes[query])
+            bound = (len(bn.nodes) + summed_terms + 2) * 2.0 ** -24
+            for exact_row, fast_row in zip(exact, fast):
+                for a, b in zip(exact_row, fast_row):
+                    if a == a:
+                        self.assertLessEqual(abs(a - b), bound * a + 1e-30)
+
+    def test_impossible_evidence_is_flagged(self):
+        # a downstream signal that can never be observed as "T"
+        data = build_default_fraud_net_json()
+        data["nodes"]["Disputed"] = ["F", "T"]
+        data["parents"]["Disputed"] = ["Fraud"]
+        data["tables"]["Disputed"] = [[["F"], [1.0, 0.0]], [["T"], [1.0, 0.0]]]
+        bn = BayesNet.from_dict(data)
+
+        cases = [
+            {"case_id": "OK", "amount_usd": 10.0, "evidence": {"NewDevice": "T"}},
+            {"case_id": "IMPOSSIBLE", "amount_usd": 5000.0, "evidence": {"Disputed": "T"}},
+        ]
+        for batch in (False, True):
+            ranked = prioritize_cases(bn, cases, batch=batch)
+            self.assertEqual([r["case_id"] for r in ranked], ["OK", "IMPOSSIBLE"])
+            self.assertIsNone(ranked[1]["p_fraud"])
+            self.assertEqual(ranked[1]["priority_score"], 0.0)
+            self.assertEqual(ranked[1]["error"], "evidence has probability zero")
+            self.assertNotIn("error", ranked[0])
+
+    def test_cli_rejects_log_space_without_ve(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            net_path = os.path.join(tmp, "fraud_review.json")
+            for method in ("jt", "enumerate"):
+                argv = ["fraud_review_prioritization.py", "--net", net_path, "--log-space", "--inference", method]
+                err = io.StringIO()
+                with mock.patch.object(sys, "argv", argv), redirect_stderr(err), self.assertRaises(SystemExit):
+                    frp.main()
+                self.assertIn("--log-space", err.getvalue())
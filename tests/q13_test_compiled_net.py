@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from BayesNet import BayesNet, ZeroProbabilityEvidence
+from fraud_review_prioritization import build_default_fraud_net_json, load_net, prioritize_cases
+from tests.q4_test_variable_elimination import all_evidence
+
+
+def compiled_copy(bn, directory):
+    path = os.path.join(directory, "net.bnc")
+    bn.save_compiled(path)
+    return BayesNet.load_compiled(path)
+
+class TestCompiledNet(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_queries(self):
+        for path in ("./nets/sprinkler.json", "./nets/books.json"):
+            bn = BayesNet(path)
+            compiled = compiled_copy(bn, self.tmp.name)
+            self.assertEqual(compiled.nodes, bn.nodes)
+            self.assertEqual(compiled.parents, bn.parents)
+            for query in bn.nodes:
+                for evidence in all_evidence(bn, query):
+                    for method in ("ve", "jt", "enumerate"):
+                        try:
+                            expected = bn.infer(query, evidence, method=method)
+                        except ZeroProbabilityEvidence:
+                            with self.assertRaises(ZeroProbabilityEvidence):
+                                compiled.infer(query, evidence, method=method)
+                            continue
+                        self.assertEqual(compiled.infer(query, evidence, method=method), expected)
+
+    def test_to_dict_rebuilds_tables(self):
+        bn = BayesNet.from_dict(build_default_fraud_net_json())
+        compiled = compiled_copy(bn, self.tmp.name)
+        self.assertIsNone(compiled.tables)
+        self.assertEqual(BayesNet.from_dict(compiled.to_dict()).to_dict(), bn.to_dict())
+
+    def test_update_tables(self):
+        bn = BayesNet("./nets/sprinkler.json")
+        compiled = compiled_copy(bn, self.tmp.name)
+        table = [[[], [0.2, 0.8]]]
+        bn.update_tables({"Cloudy": table})
+        compiled.update_tables({"Cloudy": table})
+        self.assertEqual(compiled.infer("Rain", {"WetGrass": "T"}), bn.infer("Rain", {"WetGrass": "T"}))
+
+    def test_load_net_by_suffix(self):
+        bn = BayesNet.from_dict(build_default_fraud_net_json())
+        path = os.path.join(self.tmp.name, "fraud.bnc")
+        bn.save_compiled(path)
+        compiled = load_net(path)
+        cases = [{"case_id": "A", "amount_usd": 900.0, "evidence": {"NewDevice": "T", "PastChargeback": "T"}},
+                 {"case_id": "B", "amount_usd": 20.0, "evidence": {"IPMismatch": "F"}}]
+        self.assertEqual(prioritize_cases(compiled, cases), prioritize_cases(bn, cases))
+
+    def test_rejects_other_files(self):
+        with self.assertRaises(ValueError):
+            BayesNet.load_compiled("./nets/sprinkler.json")
+
+    def test_rejects_corrupt_files(self):
+        bn = BayesNet("./nets/books.json")
+        path = os.path.join(self.tmp.name, "net.bnc")
+        bn.save_compiled(path)
+        with open(path, "rb") as file:
+            good = file.read()
+        length = int.from_bytes(good[4:8], "little")
+
+        corrupt = {
+            "empty": b"",
+            "magic only": good[:6],
+            "truncated header": good[:8 + length // 2],
+            "truncated data": good[:-12],
+            "missing tables": good[:-8 * 3],
+            "header length": good[:4] + (len(good) * 2).to_bytes(4, "little") + good[8:],
+            "header": good[:8] + b"x" * length + good[8 + length:],
+        }
+        for problem, content in corrupt.items():
+            with self.subTest(problem=problem):
+                with open(path, "wb") as file:
+                    file.write(content)
+                with self.assertRaisesRegex(ValueError, "corrupt .bnc file"):
+                    BayesNet.load_compiled(path)
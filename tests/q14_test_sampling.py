@@ -0,0 +1,85 @@
+import unittest
+from BayesNet import BayesNet, ZeroProbabilityEvidence
+from fraud_review_prioritization import build_default_fraud_net_json, fraud_probability
+
+# every sampled probability must be this close to the exact one (about 5 standard errors)
+TOLERANCE = 0.02
+
+class TestSampling(unittest.TestCase):
+    def assert_close_to_exact(self, bn, query, evidence, method):
+        exact = bn.infer(query, evidence)
+        estimate = bn.approximate_ask(query, evidence, method, samples=20_000, seed=7)
+        self.assertEqual(set(estimate["posterior"]), set(exact))
+        self.assertAlmostEqual(sum(estimate["posterior"].values()), 1.0, places=10)
+        for value in exact:
+            self.assertAlmostEqual(estimate["posterior"][value], exact[value], delta=TOLERANCE)
+            low, high = estimate["interval"][value]
+            self.assertLessEqual(low, estimate["posterior"][value])
+            self.assertGreaterEqual(high, estimate["posterior"][value])
+
+    def test_likelihood_weighting(self):
+        bn = BayesNet("./nets/sprinkler.json")
+        self.assert_close_to_exact(bn, "Rain", {"WetGrass": "T"}, "lw")
+        self.assert_close_to_exact(bn, "Cloudy", {"Sprinkler": "F", "WetGrass": "T"}, "lw")
+        books = BayesNet("./nets/books.json")
+        self.assert_close_to_exact(books, "Quality", {"Recommendation": "5"}, "lw")
+
+    def test_gibbs_sampling(self):
+        bn = BayesNet("./nets/sprinkler.json")
+        self.assert_close_to_exact(bn, "Rain", {"WetGrass": "T"}, "gibbs")
+        self.assert_close_to_exact(bn, "Cloudy", {"Sprinkler": "F", "WetGrass": "T"}, "gibbs")
+        books = BayesNet("./nets/books.json")
+        self.assert_close_to_exact(books, "Quality", {"Recommendation": "5"}, "gibbs")
+
+    def test_target_se_stops_early(self):
+        bn = BayesNet("./nets/sprinkler.json")
+        for method in ("lw", "gibbs"):
+            estimate = bn.approximate_ask("Rain", {"WetGrass": "T"}, method, samples=1_000_000,
+                                          target_se=0.01, seed=3)
+            self.assertLess(estimate["samples"], 1_000_000)
+            self.assertLessEqual(max(estimate["stderr"].values()), 0.01)
+
+    def test_seed_is_reproducible(self):
+        bn = BayesNet("./nets/sprinkler.json")
+        for method in ("lw", "gibbs"):
+            first = bn.approximate_ask("Rain", {"WetGrass": "T"}, method, samples=2000, seed=11)
+            second = bn.approximate_ask("Rain", {"WetGrass": "T"}, method, samples=2000, seed=11)
+            self.assertEqual(first, second)
+
+    def test_zero_probability_evidence(self):
+        data = build_default_fraud_net_json()
+        data["nodes"]["Disputed"] = ["F", "T"]
+        data["parents"]["Disputed"] = ["Fraud"]
+        data["tables"]["Disputed"] = [[["F"], [1.0, 0.0]], [["T"], [0.5, 0.5]]]
+        bn = BayesNet.from_dict(data)
+        evidence = {"AmountHigh": "F", "NewDevice": "F", "IPMismatch": "F", "PastChargeback": "F",
+                    "Disputed": "T"}
+        # with every signal "F" Fraud is always "F", and legitimate cases are never disputed
+        bn.update_tables({"Fraud": [[["F", "F", "F", "F"], [1.0, 0.0]]] + bn.tables["Fraud"][1:]})
+        for method in ("lw", "gibbs"):
+            with self.assertRaises(ZeroProbabilityEvidence):
+                bn.approximate_ask("Fraud", evidence, method, samples=2000, seed=0)
+
+    def test_non_positive_samples(self):
+        bn = BayesNet("./nets/sprinkler.json")
+        for method in ("lw", "gibbs"):
+            for samples in (0, -5):
+                with self.assertRaises(ValueError):
+                    bn.approximate_ask("Rain", {"WetGrass": "T"}, method, samples=samples, seed=0)
+
+    def test_net_config_selects_method(self):
+        data = build_default_fraud_net_json()
+        data["inference"] = {"method": "lw", "samples": 4000, "seed": 5}
+        bn = BayesNet.from_dict(data)
+        self.assertEqual(bn.default_method(), "lw")
+        self.assertEqual(BayesNet.from_dict(bn.to_dict()).inference, data["inference"])
+
+        evidence = {"NewDevice": "T"}
+        expected = bn.approximate_ask("Fraud", evidence, "lw", samples=4000, seed=5)["posterior"]["T"]
+        self.assertEqual(fraud_probability(bn, evidence), expected)
+        self.assertAlmostEqual(fraud_probability(bn, evidence), bn.infer("Fraud", evidence, method="ve")["T"],
+                               delta=TOLERANCE)
+
+        # the constructor option wins over the net definition
+        exact = BayesNet.from_dict(data, inference={"method": "ve"})
+        self.assertEqual(fraud_probability(exact, evidence), exact.infer("Fraud", evidence, method="ve")["T"])
@@ -0,0 +1,102 @@
+import asyncio
+import unittest
+from BayesNet import BayesNet
+from fraud_review_prioritization import build_default_fraud_net_json, load_cases, score_cases
+from scoring_service import ScoringService, request_json
+
+
+def run_with_server(service, client):
+    """
+    Starts service on a free local port, runs client(port) and shuts everything down.
+    """
+    async def main():
+        server = await service.serve("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await client(port)
+        finally:
+            server.close()
+            await server.wait_closed()
+            await service.close()
+    return asyncio.run(main())
+
+class TestScoringService(unittest.TestCase):
+    def setUp(self):
+        self.bn = BayesNet.from_dict(build_default_fraud_net_json())
+        self.cases = load_cases(None)
+        self.expected = score_cases(BayesNet.from_dict(build_default_fraud_net_json()), self.cases)
+
+    def test_single_case_and_list(self):
+        service = ScoringService(self.bn)
+
+        async def client(port):
+            single = await request_json("127.0.0.1", port, "POST", "/score", self.cases[0])
+            many = await request_json("127.0.0.1", port, "POST", "/score", self.cases)
+            return single, many
+
+        (status, row), (status_many, rows) = run_with_server(service, client)
+        self.assertEqual(status, 200)
+        self.assertEqual(row, self.expected[0])
+        self.assertEqual(status_many, 200)
+        self.assertEqual(rows, self.expected)
+
+    def test_concurrent_requests_are_batched(self):
+        service = ScoringService(self.bn, max_wait_ms=200)
+
+        async def client(port):
+            results = await asyncio.gather(*[
+                request_json("127.0.0.1", port, "POST", "/score", case) for case in self.cases
+            ])
+            stats = await request_json("127.0.0.1", port, "GET", "/stats")
+            return results, stats
+
+        results, (status, stats) = run_with_server(service, client)
+        self.assertEqual([row for _, row in results], self.expected)
+        self.assertEqual(status, 200)
+        self.assertEqual(stats["requests"], len(self.cases))
+        self.assertEqual(stats["cases"], len(self.cases))
+        self.assertLess(stats["batches"], len(self.cases))
+        self.assertGreater(stats["latency_p99_ms"], 0.0)
+
+    def test_max_batch_splits_batches(self):
+        service = ScoringService(self.bn, max_batch=2, max_wait_ms=200)
+
+        async def client(port):
+            await asyncio.gather(*[
+                request_json("127.0.0.1", port, "POST", "/score", case) for case in self.cases
+            ])
+
+        run_with_server(service, client)
+        self.assertEqual(service.stats()["batches"], 3)
+
+    def test_bad_requests(self):
+        service = ScoringService(self.bn)
+
+        async def client(port):
+            return [
+                await request_json("127.0.0.1", port, "POST", "/score", "not a case"),
+                await request_json("127.0.0.1", port, "GET", "/score"),
+                await request_json("127.0.0.1", port, "GET", "/missing"),
+                await request_json("127.0.0.1", port, "GET", "/health"),
+            ]
+
+        statuses = [status for status, _ in run_with_server(service, client)]
+        self.assertEqual(statuses, [400, 405, 404, 200])
+
+    def test_bad_case_only_fails_its_own_request(self):
+        service = ScoringService(self.bn, max_wait_ms=200)
+
+        async def client(port):
+            # both requests land in the same micro-batch window
+            return await asyncio.gather(
+                request_json("127.0.0.1", port, "POST", "/score", self.cases),
+                request_json("127.0.0.1", port, "POST", "/score", [{"case_id": "BAD", "amount_usd": "abc"}]),
+            )
+
+        (status, rows), (bad_status, error) = run_with_server(service, client)
+        self.assertEqual(status, 200)
+        self.assertEqual(rows, self.expected)
+        self.assertEqual(bad_status, 500)
+        self.assertIn("error", error)
+        self.assertEqual(service.stats()["errors"], 1)
+        self.assertEqual(service.stats()["cases"], len(self.cases))
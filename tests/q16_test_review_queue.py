@@ -0,0 +1,72 @@
+import random
+import unittest
+from BayesNet import BayesNet
+from fraud_review_prioritization import ReviewQueue, build_default_fraud_net_json, load_cases, prioritize_cases
+
+class TestReviewQueue(unittest.TestCase):
+    def setUp(self):
+        self.bn = BayesNet.from_dict(build_default_fraud_net_json())
+
+    def test_matches_prioritize_cases(self):
+        queue = ReviewQueue(self.bn)
+        cases = load_cases(None)
+        for case in cases:
+            queue.add_case(case)
+        expected = prioritize_cases(self.bn, cases)
+        self.assertEqual(queue.ranked(), expected)
+        self.assertEqual([queue.pop_top() for _ in cases], expected)
+        self.assertIsNone(queue.pop_top())
+        self.assertEqual(len(queue), 0)
+
+    def test_evidence_trickles_in(self):
+        rng = random.Random(4)
+        signals = [var for var in self.bn.nodes if var != "Fraud"]
+        cases = [{"case_id": f"TXN-{i:03d}", "amount_usd": float(rng.choice([20, 45, 300, 900])), "evidence": {}}
+                 for i in range(60)]
+        queue = ReviewQueue(self.bn)
+        for case in cases:
+            queue.add_case(case)
+
+        # reveal one signal at a time and compare against a full re-rank every step
+        for step in range(200):
+            case = rng.choice(cases)
+            var = rng.choice(signals)
+            case["evidence"][var] = rng.choice(self.bn.nodes[var])
+            row = queue.update_evidence(case["case_id"], {var: case["evidence"][var]})
+            self.assertEqual(row["evidence"], case["evidence"])
+            if step % 20 == 0:
+                self.assertEqual(queue.ranked(), prioritize_cases(self.bn, cases))
+                self.assertEqual(queue.peek_top(), queue.ranked()[0])
+
+        # stale entries are compacted away
+        self.assertLessEqual(len(queue.heap), 2 * len(queue) + 16)
+        self.assertEqual([queue.pop_top() for _ in cases], prioritize_cases(self.bn, cases))
+
+    def test_replace_and_remove(self):
+        queue = ReviewQueue(self.bn)
+        for case in load_cases(None):
+            queue.add_case(case)
+        with self.assertRaises(ValueError):
+            queue.add_case({"case_id": "TXN-001", "amount_usd": 1.0, "evidence": {}})
+
+        row = queue.update_evidence("TXN-004", {"NewDevice": "F"}, replace=True)
+        self.assertEqual(row["evidence"], {"NewDevice": "F"})
+        self.assertEqual(queue.remove("TXN-005")["case_id"], "TXN-005")
+        self.assertNotIn("TXN-005", queue)
+        self.assertNotIn("TXN-005", [queue.pop_top()["case_id"] for _ in range(len(queue))])
+        with self.assertRaises(KeyError):
+            queue.update_evidence("TXN-005", {})
+
+    def test_integer_case_ids(self):
+        queue = ReviewQueue(self.bn)
+        for i, case in enumerate(load_cases(None)):
+            queue.add_case({**case, "case_id": i})
+        self.assertIn(1, queue)
+        self.assertIn("1", queue)
+        with self.assertRaises(ValueError):
+            queue.add_case({"case_id": "1", "amount_usd": 1.0, "evidence": {}})
+        row = queue.update_evidence(1, {"NewDevice": "F"}, replace=True)
+        self.assertEqual((row["case_id"], row["evidence"]), ("1", {"NewDevice": "F"}))
+        self.assertEqual(queue.remove(2)["case_id"], "2")
+        self.assertNotIn(2, queue)
+        self.assertEqual(len(queue), 4)
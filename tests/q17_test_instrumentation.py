@@ -0,0 +1,61 @@
+import unittest
+import fraud_review_prioritization as frp
+from BayesNet import BayesNet
+from instrumentation import Profiler, instrument_net, net_counters
+
+class TestInstrumentation(unittest.TestCase):
+    def test_counts_nodes_visited(self):
+        bn = BayesNet("./nets/sprinkler.json")
+        profiler = Profiler()
+        instrument_net(profiler, bn)
+        # no evidence: 2 + 4 + 8 + 16 CPT lookups over the four binary nodes
+        self.assertAlmostEqual(bn.enumerate_all(list(bn.nodes), {}), 1.0, places=10)
+        self.assertEqual(profiler.counters["enumerate_nodes_visited"], 30)
+        bn.query_prob("Cloudy", "T", {})
+        bn.query_prob("Rain", "T", {"Cloudy": "T"})
+        self.assertEqual(profiler.counters["query_prob_calls"], 2)
+        self.assertEqual(profiler.stages["query_prob"].count, 2)
+
+    def test_pipeline_stages(self):
+        bn = BayesNet.from_dict(frp.build_default_fraud_net_json())
+        cases = frp.load_cases(None)
+        expected = frp.prioritize_cases(BayesNet.from_dict(frp.build_default_fraud_net_json()), cases)
+
+        profiler = Profiler()
+        frp.instrument_pipeline(profiler)
+        instrument_net(profiler, bn)
+        try:
+            ranked = frp.prioritize_cases(bn, cases)
+            frp.prioritize_cases(bn, cases)
+        finally:
+            profiler.uninstrument()
+        net_counters(profiler, bn)
+
+        self.assertEqual(ranked, expected)
+        self.assertEqual(profiler.stages["encode_evidence"].count, 2 * len(cases))
+        self.assertEqual(profiler.stages["fraud_probability_encoded"].count, 2 * len(cases))
+        self.assertEqual(profiler.stages["rank_columns"].count, 2)
+        self.assertEqual(profiler.counters["posterior_cache_misses"], len(cases))
+        self.assertEqual(profiler.counters["posterior_cache_hits"], len(cases))
+        # every case asks the cache, only the first pass runs inference
+        self.assertEqual(profiler.counters["cached_infer_encoded_calls"], 2 * len(cases))
+        self.assertEqual(profiler.counters["infer_codes_calls"], len(cases))
+        self.assertEqual(profiler.stages["infer_codes"].count, len(cases))
+
+        # everything is back to the plain functions and methods
+        self.assertNotIn("infer", vars(bn))
+        self.assertNotIn("infer_codes", vars(bn))
+        self.assertFalse(hasattr(frp.score_cases, "__wrapped__"))
+        self.assertFalse(hasattr(frp.EvidenceEncoder.encode, "__wrapped__"))
+
+    def test_prometheus_format(self):
+        profiler = Profiler()
+        profiler.count("cases", 3)
+        profiler.observe("score_cases", 0.002)
+        profiler.observe("score_cases", 5.0)
+        lines = profiler.to_prometheus().splitlines()
+        self.assertIn("bayesnet_cases_total 3", lines)
+        self.assertIn('bayesnet_stage_seconds_bucket{stage="score_cases",le="0.01"} 1', lines)
+        self.assertIn('bayesnet_stage_seconds_bucket{stage="score_cases",le="+Inf"} 2', lines)
+        self.assertIn('bayesnet_stage_seconds_count{stage="score_cases"} 2', lines)
+        self.assertEqual(profiler.to_dict()["stages"]["score_cases"]["buckets"]["1.0"], 1)
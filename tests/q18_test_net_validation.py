@@ -0,0 +1,79 @@
+import copy
+import json
+import unittest
+from BayesNet import BayesNet, InvalidNetError
+
+class TestNetValidation(unittest.TestCase):
+    def setUp(self):
+        with open("./nets/sprinkler.json") as file:
+            self.data = json.load(file)
+
+    def test_structure(self):
+        bn = BayesNet.from_dict(self.data)
+        self.assertEqual(bn.order, ["Cloudy", "Sprinkler", "Rain", "WetGrass"])
+        self.assertEqual(bn.ancestors["WetGrass"], {"Cloudy", "Sprinkler", "Rain"})
+        self.assertEqual(bn.ancestors["Cloudy"], set())
+        self.assertEqual(bn.markov_blanket["Sprinkler"], {"Cloudy", "Rain", "WetGrass"})
+        self.assertEqual(bn.markov_blanket["WetGrass"], {"Sprinkler", "Rain"})
+
+    def test_nodes_in_any_order(self):
+        expected = BayesNet.from_dict(self.data)
+        data = copy.deepcopy(self.data)
+        data["nodes"] = dict(reversed(list(data["nodes"].items())))
+        bn = BayesNet.from_dict(data)
+        # ties between ready nodes keep the order of the file
+        self.assertEqual(bn.order, ["Cloudy", "Rain", "Sprinkler", "WetGrass"])
+        evidence = {"WetGrass": "T"}
+        for method in ("enumerate", "ve", "jt"):
+            for value, p in expected.infer("Rain", evidence, method=method).items():
+                self.assertAlmostEqual(bn.infer("Rain", evidence, method=method)[value], p, places=10)
+            for value, p in expected.infer("Rain", evidence, method=method, prune=False).items():
+                self.assertAlmostEqual(bn.infer("Rain", evidence, method=method, prune=False)[value], p, places=10)
+
+    def test_cycle(self):
+        self.data["parents"]["Cloudy"] = ["WetGrass"]
+        self.data["tables"]["Cloudy"] = [[["T"], [0.5, 0.5]], [["F"], [0.5, 0.5]]]
+        with self.assertRaisesRegex(InvalidNetError, "cycle"):
+            BayesNet.from_dict(self.data)
+
+    def test_unknown_parent(self):
+        self.data["parents"]["Rain"] = ["Clouds"]
+        with self.assertRaisesRegex(InvalidNetError, "Clouds"):
+            BayesNet.from_dict(self.data)
+
+    def test_missing_table(self):
+        del self.data["tables"]["Rain"]
+        with self.assertRaisesRegex(InvalidNetError, "'Rain' has no entry in tables"):
+            BayesNet.from_dict(self.data)
+
+    def test_missing_row(self):
+        self.data["tables"]["WetGrass"].pop()
+        with self.assertRaisesRegex(InvalidNetError, r"'WetGrass': row \['F', 'F'\] is missing"):
+            BayesNet.from_dict(self.data)
+
+    def test_duplicate_row(self):
+        self.data["tables"]["Rain"].append([["T"], [0.8, 0.2]])
+        with self.assertRaisesRegex(InvalidNetError, "duplicate"):
+            BayesNet.from_dict(self.data)
+
+    def test_bad_rows(self):
+        bad = {
+            "arity": [[["T", "T"], [0.8, 0.2]], [["F"], [0.2, 0.8]]],
+            "value": [[["Maybe"], [0.8, 0.2]], [["F"], [0.2, 0.8]]],
+            "width": [[["T"], [0.8, 0.1, 0.1]], [["F"], [0.2, 0.8]]],
+            "sum": [[["T"], [0.8, 0.3]], [["F"], [0.2, 0.8]]],
+            "negative": [[["T"], [1.2, -0.2]], [["F"], [0.2, 0.8]]],
+        }
+        for problem, rows in bad.items():
+            with self.subTest(problem=problem):
+                data = copy.deepcopy(self.data)
+                data["tables"]["Rain"] = rows
+                with self.assertRaises(InvalidNetError):
+                    BayesNet.from_dict(data)
+
+    def test_compiled_tables_are_checked(self):
+        bn = BayesNet.from_dict(self.data)
+        cpt = dict(bn.cpt)
+        cpt["Rain"] = cpt["Rain"][:2] + cpt["Rain"][:1] + cpt["Rain"][:1]
+        with self.assertRaisesRegex(InvalidNetError, r"'Rain': row \['F'\] sums to"):
+            bn._compile(cpt=cpt)
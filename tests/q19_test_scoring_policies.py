@@ -0,0 +1,95 @@
+import json
+import math
+import os
+import tempfile
+import unittest
+from unittest import mock
+import scoring_policies
+from BayesNet import BayesNet
+from fraud_review_prioritization import (build_default_fraud_net_json, load_ranked_columns, prioritize_cases,
+                                         priority_score, rank_columns, rescore_columns)
+from scoring_policies import SCORING_POLICIES, ScoringPolicy
+from tests.q9_test_streaming import tied_cases
+
+class TestScoringPolicies(unittest.TestCase):
+    def setUp(self):
+        self.bn = BayesNet.from_dict(build_default_fraud_net_json())
+        self.p = [0.1, 0.52, 0.0, 0.9, 0.33]
+        self.amounts = [45.0, 2200, None, -5.0, 1e6]
+        self.merchants = ["m1", None, "m2", "m1", "m3"]
+
+    def test_default_policy_formula(self):
+        self.assertEqual(priority_score(0.4, None), 0.4)
+        self.assertEqual(priority_score(0.4, -10.0), 0.4)
+        self.assertAlmostEqual(priority_score(0.4, 980.0), 0.4 * (1 + 0.15 * math.log1p(980.0)), places=12)
+
+    def test_batch_matches_single_case(self):
+        weights = {"m1": 2.0, "m3": 0.5}
+        for name in SCORING_POLICIES:
+            policy = ScoringPolicy(name, weights)
+            expected = [policy.score(p, a, m) for p, a, m in zip(self.p, self.amounts, self.merchants)]
+            for numpy in (scoring_policies.np, None):
+                if numpy is None and scoring_policies.np is None:
+                    continue
+                with self.subTest(policy=name, numpy=numpy is not None), mock.patch.object(scoring_policies, "np", numpy):
+                    scores = policy.score_batch(self.p, self.amounts, self.merchants)
+                    for score, want in zip(scores, expected):
+                        self.assertAlmostEqual(score, want, places=12)
+
+    def test_policies(self):
+        self.assertEqual(ScoringPolicy("expected_loss").score(0.5, 200.0), 100.0)
+        capped = ScoringPolicy("capped_impact", cap=100.0)
+        self.assertEqual(capped.score(0.5, 1e6), capped.score(0.5, 100.0))
+        weighted = ScoringPolicy("merchant_weighted", {"m1": 3.0})
+        self.assertAlmostEqual(weighted.score(0.5, 10.0, "m1"), 3 * priority_score(0.5, 10.0), places=12)
+        self.assertAlmostEqual(weighted.score(0.5, 10.0, "other"), priority_score(0.5, 10.0), places=12)
+        with self.assertRaises(ValueError):
+            ScoringPolicy("nope")
+
+    def test_prioritize_with_policy(self):
+        cases = tied_cases(200)
+        for i, case in enumerate(cases):
+            case["merchant_id"] = f"m{i % 4}"
+        policy = ScoringPolicy("merchant_weighted", {"m1": 10.0})
+        ranked = prioritize_cases(self.bn, cases, policy=policy)
+        expected = sorted(ranked, key=lambda row: policy.score(row["p_fraud"], row["amount_usd"], row["merchant_id"]),
+                          reverse=True)
+        self.assertEqual([row["case_id"] for row in ranked[:20]], [row["case_id"] for row in expected[:20]])
+        self.assertEqual(ranked[0]["merchant_id"], "m1")
+
+    def test_integer_merchant_ids(self):
+        # a JSON weights file always has string keys
+        policy = ScoringPolicy("merchant_weighted", {"17": 4.0})
+        base = priority_score(0.5, 10.0)
+        self.assertAlmostEqual(policy.score(0.5, 10.0, 17), 4 * base, places=12)
+        self.assertAlmostEqual(ScoringPolicy("merchant_weighted", {17: 4.0}).score(0.5, 10.0, "17"), 4 * base, places=12)
+        self.assertAlmostEqual(policy.score(0.5, 10.0, None), base, places=12)
+        scores = policy.score_batch([0.5, 0.5, 0.5], [10.0, 10.0, 10.0], [17, "17", None])
+        for score, weight in zip(scores, (4, 4, 1)):
+            self.assertAlmostEqual(score, weight * base, places=12)
+
+        cases = tied_cases(8)
+        for i, case in enumerate(cases):
+            case["merchant_id"] = 17 if i == 5 else i
+        self.assertEqual(prioritize_cases(self.bn, cases, policy=policy)[0]["case_id"], cases[5]["case_id"])
+
+    def test_rescore_saved_ranking(self):
+        cases = tied_cases(120)
+        ranked = prioritize_cases(self.bn, cases)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ranked.json")
+            with open(path, "w") as file:
+                json.dump(ranked, file)
+            columns = load_ranked_columns(self.bn, path)
+
+        # same policy: same ranking
+        rescore_columns(columns, ScoringPolicy())
+        self.assertEqual(list(columns.rows(self.bn, rank_columns(columns))), ranked)
+
+        # another policy: the scores of scoring from scratch under it (ties keep the saved order)
+        policy = ScoringPolicy("expected_loss")
+        rescored = list(columns.rows(self.bn, rank_columns(rescore_columns(columns, policy))))
+        fresh = {row["case_id"]: row["priority_score"] for row in prioritize_cases(self.bn, cases, policy=policy)}
+        self.assertEqual({row["case_id"]: row["priority_score"] for row in rescored}, fresh)
+        scores = [row["priority_score"] for row in rescored]
+        self.assertEqual(scores, sorted(scores, reverse=True))
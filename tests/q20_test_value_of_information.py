@@ -0,0 +1,71 @@
+import math
+import unittest
+from BayesNet import BayesNet
+from fraud_review_prioritization import (EvidenceEncoder, build_default_fraud_net_json, prioritize_columns,
+                                         recommend_signals)
+from scoring_policies import ScoringPolicy
+
+def entropy(dist):
+    return -sum(p * math.log2(p) for p in dist.values() if p > 0)
+
+class TestValueOfInformation(unittest.TestCase):
+    def setUp(self):
+        self.bn = BayesNet.from_dict(build_default_fraud_net_json())
+
+    def test_information_value_by_hand(self):
+        evidence = {"AmountHigh": "T"}
+        values = self.bn.information_value("Fraud", evidence)
+        self.assertEqual(list(values), ["NewDevice", "IPMismatch", "PastChargeback"])
+
+        prior = self.bn.infer("Fraud", evidence)
+        for var, value in values.items():
+            outcome = self.bn.infer(var, evidence)
+            gain = entropy(prior)
+            change = 0.0
+            for x, weight in outcome.items():
+                posterior = self.bn.infer("Fraud", {**evidence, var: x})
+                gain -= weight * entropy(posterior)
+                change += weight * abs(posterior["T"] - prior["T"])
+            self.assertAlmostEqual(value["entropy_reduction"], gain, places=10)
+            self.assertAlmostEqual(value["expected_change"], change, places=10)
+
+    def test_observed_and_independent_signals(self):
+        self.assertEqual(self.bn.information_value("Fraud", {"AmountHigh": "T", "NewDevice": "F", "IPMismatch": "F",
+                                                              "PastChargeback": "F"}), {})
+        # the parents of Fraud are independent a priori, so knowing Fraud is needed to learn about them
+        values = self.bn.information_value("AmountHigh", {}, candidates=["NewDevice"])
+        self.assertAlmostEqual(values["NewDevice"]["entropy_reduction"], 0.0, places=10)
+        self.assertAlmostEqual(values["NewDevice"]["expected_change"], 0.0, places=10)
+
+    def test_recommend_signals(self):
+        cases = [
+            {"case_id": "a", "amount_usd": 100.0, "evidence": {"AmountHigh": "T"}},
+            {"case_id": "b", "amount_usd": 5000.0, "evidence": {"AmountHigh": "T"}},
+            {"case_id": "c", "amount_usd": 100.0, "evidence": {"AmountHigh": "T", "NewDevice": "T", "IPMismatch": "T",
+                                                               "PastChargeback": "T"}},
+        ]
+        policy = ScoringPolicy()
+        columns, _ = prioritize_columns(self.bn, cases, encoder=EvidenceEncoder(self.bn))
+        recommend_signals(self.bn, columns, policy=policy)
+        rows = {row["case_id"]: row for row in columns.rows(self.bn)}
+
+        # same evidence, same information; the score change grows with the amount
+        values = self.bn.information_value("Fraud", {"AmountHigh": "T"})
+        best = max(values, key=lambda var: values[var]["expected_change"])
+        self.assertEqual(rows["a"]["next_signal"], best)
+        self.assertEqual(rows["b"]["next_signal"], best)
+        self.assertAlmostEqual(rows["a"]["signal_values"][best]["p_fraud_change"],
+                               values[best]["expected_change"], places=4)
+        self.assertAlmostEqual(rows["b"]["signal_values"][best]["score_change"],
+                               policy.score(values[best]["expected_change"], 5000.0), places=4)
+        self.assertGreater(rows["b"]["signal_values"][best]["score_change"],
+                           rows["a"]["signal_values"][best]["score_change"])
+        self.assertIsNone(rows["c"]["next_signal"])
+        self.assertEqual(rows["c"]["signal_values"], {})
+
+        # an expensive best signal loses to a cheaper one, and a threshold turns small cases off
+        recommend_signals(self.bn, columns, policy=policy, costs={best: 1000.0})
+        self.assertNotEqual(columns.next_signals[0], best)
+        threshold = (columns.score_changes[best][0] + columns.score_changes[best][1]) / 2
+        recommend_signals(self.bn, columns, policy=policy, min_change=threshold)
+        self.assertEqual([var is None for var in columns.next_signals], [True, False, True])
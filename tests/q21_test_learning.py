@@ -0,0 +1,136 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+import learning
+from BayesNet import BayesNet
+from fraud_review_prioritization import build_default_fraud_net_json, iter_cases
+from learning import CPTCounts, learn_net
+
+def sample_cases(bn, count, missing=0.0, seed=0):
+    """
+    Forward samples of bn as labelled cases, each signal hidden with probability missing.
+    """
+    rng = random.Random(seed)
+    cases = []
+    for i in range(count):
+        values = {}
+        for var in bn.order:
+            row = sum(bn.value_index[parent][values[parent]] * stride
+                      for parent, stride in zip(bn.parents[var], bn.strides[var]))
+            card = bn.cardinality[var]
+            values[var] = rng.choices(bn.nodes[var], bn.cpt[var][row * card:(row + 1) * card])[0]
+        label = values.pop("Fraud")
+        evidence = {var: value for var, value in values.items() if rng.random() >= missing}
+        cases.append({"case_id": i, "label": label == "T", "evidence": evidence})
+    return cases
+
+class TestLearning(unittest.TestCase):
+    def setUp(self):
+        self.structure = build_default_fraud_net_json()
+        self.bn = BayesNet.from_dict(self.structure)
+
+    def test_counts_and_smoothing(self):
+        cases = [
+            {"label": True, "evidence": {"AmountHigh": "T", "NewDevice": "F", "IPMismatch": "F", "PastChargeback": "F"}},
+            {"label": "F", "evidence": {"AmountHigh": "T", "NewDevice": "F", "IPMismatch": "F", "PastChargeback": "F"}},
+            {"evidence": {"AmountHigh": "F", "NewDevice": "F", "IPMismatch": "F", "PastChargeback": "F",
+                          "Fraud": "F", "Bogus": "T"}},
+        ]
+        counts = CPTCounts.from_net(self.structure)
+        counts.update(cases, chunk_size=2)
+        self.assertEqual(counts.rows, 3)
+        self.assertEqual(counts.counts["AmountHigh"], [1.0, 2.0])
+        self.assertEqual(counts.dropped, {"Bogus": 1})
+        self.assertFalse(counts.patterns)
+
+        tables = counts.tables(alpha=1.0)
+        self.assertEqual(tables["AmountHigh"], [[[], [2 / 5, 3 / 5]]])
+        rows = {tuple(assignment): probabilities for assignment, probabilities in tables["Fraud"]}
+        self.assertEqual(rows[("T", "F", "F", "F")], [0.5, 0.5])
+        self.assertEqual(rows[("F", "F", "F", "F")], [2 / 3, 1 / 3])
+        self.assertEqual(rows[("T", "T", "T", "T")], [0.5, 0.5])
+        # the learned net loads
+        BayesNet.from_dict(learn_net(self.structure, counts))
+
+    def test_csv_labels(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "history.csv")
+            with open(path, "w") as file:
+                file.write("case_id,amount_usd,AmountHigh,NewDevice,IPMismatch,PastChargeback,label\n")
+                for i, label in enumerate(["true", "FALSE", "1", "0", "T", ""]):
+                    file.write(f"C{i},10,T,F,F,F,{label}\n")
+            counts = CPTCounts.from_net(self.structure)
+            counts.update(iter_cases(path))
+
+        # every labelled row is counted as complete, only the unlabelled one is left to EM
+        self.assertEqual(counts.rows, 6)
+        self.assertEqual(sum(counts.counts["Fraud"]), 5)
+        self.assertEqual(list(counts.patterns.values()), [1])
+        self.assertFalse(counts.dropped)
+
+        with self.assertRaises(ValueError):
+            counts.encode({"label": "maybe", "evidence": {}})
+        with self.assertRaises(ValueError):
+            counts.encode({"label": ["T"], "evidence": {}})
+
+    def test_vectorized_matches_plain_counting(self):
+        if learning.np is None:
+            self.skipTest("numpy not installed")
+        cases = sample_cases(self.bn, 500, missing=0.2, seed=1)
+        vectorized = CPTCounts.from_net(self.structure)
+        vectorized.update(cases, chunk_size=64)
+        plain = CPTCounts.from_net(self.structure)
+        with mock.patch.object(learning, "np", None):
+            plain.update(cases)
+        self.assertEqual(vectorized.counts, plain.counts)
+        self.assertEqual(vectorized.patterns, plain.patterns)
+
+    def test_incremental_updates(self):
+        cases = sample_cases(self.bn, 600, missing=0.2, seed=2)
+        once = CPTCounts.from_net(self.structure)
+        once.update(cases)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "counts.json")
+            first = CPTCounts.from_net(self.structure)
+            first.update(cases[:250])
+            first.save(path)
+            later = CPTCounts.load(path)
+            later.update(cases[250:])
+
+        self.assertEqual(later.rows, once.rows)
+        self.assertEqual(later.counts, once.counts)
+        self.assertEqual(later.patterns, once.patterns)
+
+    def test_save_keeps_dropped_and_label_var(self):
+        counts = CPTCounts(self.structure["nodes"], self.structure["parents"], label_var="AmountHigh")
+        counts.update([{"label": "T", "evidence": {"Bogus": "T", "NewDevice": "maybe"}}])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "counts.json")
+            counts.save(path)
+            self.assertEqual(CPTCounts.load(path).dropped, {"Bogus": 1, "NewDevice": 1})
+            self.assertEqual(CPTCounts.load(path, "AmountHigh").label_var, "AmountHigh")
+            with self.assertRaisesRegex(ValueError, "AmountHigh"):
+                CPTCounts.load(path, "Fraud")
+
+    def test_em_matches_rows_by_assignment(self):
+        counts = CPTCounts.from_net(self.structure)
+        counts.update(sample_cases(self.bn, 2000, missing=0.3, seed=5))
+        converged, _ = counts.fit(tolerance=1e-10, max_iterations=500)
+        # starting at the fixed point stops after one iteration, whatever the row order
+        shuffled = {var: list(reversed(rows)) for var, rows in converged.items()}
+        self.assertEqual(counts.fit(initial=converged)[1], 1)
+        self.assertEqual(counts.fit(initial=shuffled)[1], 1)
+
+    def test_recovers_parameters(self):
+        for missing in (0.0, 0.3):
+            counts = CPTCounts.from_net(self.structure)
+            counts.update(sample_cases(self.bn, 20_000, missing=missing, seed=3))
+            learned = BayesNet.from_dict(learn_net(self.structure, counts))
+            for var in ("AmountHigh", "NewDevice", "IPMismatch", "PastChargeback"):
+                self.assertAlmostEqual(learned.cpt[var][1], self.bn.cpt[var][1], delta=0.01)
+            # the most common parent assignment (all signals "F") has plenty of data
+            self.assertAlmostEqual(learned.cpt["Fraud"][1], self.bn.cpt["Fraud"][1], delta=0.01)
+            self.assertAlmostEqual(learned.infer("Fraud", {})["T"], self.bn.infer("Fraud", {})["T"], delta=0.01)
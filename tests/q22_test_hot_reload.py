@@ -0,0 +1,171 @@
+import json
+import os
+import tempfile
+import unittest
+from BayesNet import BayesNet
+from instrumentation import Profiler, instrument_net, net_counters
+from fraud_review_prioritization import (NetHandle, build_default_fraud_net_json, load_cases, score_cases,
+                                         stream_prioritize)
+
+def with_fraud_prior(p_fraud):
+    # every Fraud row scaled, so all the posteriors of Fraud change
+    data = build_default_fraud_net_json()
+    for row in data["tables"]["Fraud"]:
+        p = min(row[1][1] * p_fraud, 0.99)
+        row[1] = [1.0 - p, p]
+    return data
+
+class TestHotReload(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "net.json")
+        self.mtime = 1_000_000_000 * 10**9
+        self.write(build_default_fraud_net_json())
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write(self, data):
+        # atomic replace, with a distinct mtime so the change is seen even within one clock tick
+        text = data if isinstance(data, str) else json.dumps(data)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as file:
+            file.write(text)
+        self.mtime += 10**9
+        os.utime(tmp, ns=(self.mtime, self.mtime))
+        os.replace(tmp, self.path)
+
+    def test_inherit_cache_keeps_unaffected_posteriors(self):
+        old = BayesNet.from_dict(build_default_fraud_net_json())
+        observed = old.encode_pairs({"NewDevice": "T", "IPMismatch": "F"})
+        unobserved = old.encode_pairs({"IPMismatch": "F"})
+        old.cached_infer_encoded("Fraud", observed)
+        old.cached_infer_encoded("Fraud", unobserved)
+        old.cached_infer("AmountHigh", {"NewDevice": "T"})
+
+        data = build_default_fraud_net_json()
+        data["tables"]["NewDevice"] = [[[], [0.5, 0.5]]]
+        new = BayesNet.from_dict(data)
+        self.assertEqual(new.changed_tables(old), {"NewDevice"})
+        # with NewDevice observed, its prior cannot change P(Fraud); AmountHigh is d-separated from it
+        self.assertEqual(new.inherit_cache(old), 2)
+        self.assertEqual(new.cache.stats()["size"], 2)
+
+        fresh = BayesNet.from_dict(data, cache_size=0)
+        for query, pairs in (("Fraud", observed), ("Fraud", unobserved)):
+            self.assertEqual(new.cached_infer_encoded(query, pairs), fresh.infer_codes(query, fresh.codes_from_pairs(pairs)))
+        self.assertEqual(new.cached_infer("AmountHigh", {"NewDevice": "T"}), fresh.infer("AmountHigh", {"NewDevice": "T"}))
+        self.assertEqual(new.cache.stats()["hits"], 2)
+
+        # a new structure keeps nothing
+        data["parents"]["NewDevice"] = ["AmountHigh"]
+        data["tables"]["NewDevice"] = [[["F"], [0.8, 0.2]], [["T"], [0.7, 0.3]]]
+        self.assertEqual(BayesNet.from_dict(data).inherit_cache(old), 0)
+
+    def test_swap_between_batches(self):
+        cases = load_cases(None)
+        handle = NetHandle(self.path)
+        bn, version = handle.acquire()
+        rows = score_cases(bn, cases, net_version=version)
+        self.assertTrue(all(row["net_version"] == version for row in rows))
+        self.assertFalse(handle.check())
+
+        self.write(with_fraud_prior(2.0))
+        self.assertTrue(handle.check())
+        # staged only: the batch in flight keeps its version until the next acquire
+        self.assertEqual(handle.version, version)
+        self.assertEqual(score_cases(bn, cases, net_version=version), rows)
+
+        new_bn, new_version = handle.acquire()
+        self.assertNotEqual(new_version, version)
+        self.assertEqual(handle.reloads, 1)
+        expected = score_cases(BayesNet.from_dict(with_fraud_prior(2.0)), cases)
+        new_rows = score_cases(new_bn, cases, net_version=new_version)
+        self.assertEqual([row["p_fraud"] for row in new_rows], [row["p_fraud"] for row in expected])
+        self.assertNotEqual([row["p_fraud"] for row in new_rows], [row["p_fraud"] for row in rows])
+
+    def test_every_version_is_profiled(self):
+        cases = load_cases(None)
+        profiler = Profiler()
+
+        def on_swap(previous, current):
+            net_counters(profiler, previous)
+            instrument_net(profiler, current)
+
+        handle = NetHandle(self.path, on_swap=on_swap)
+        instrument_net(profiler, handle.bn)
+        try:
+            score_cases(handle.acquire()[0], cases)
+            self.write(with_fraud_prior(2.0))
+            self.assertTrue(handle.check())
+            score_cases(handle.acquire()[0], cases)
+        finally:
+            profiler.uninstrument()
+        net_counters(profiler, handle.bn)
+
+        # every case is a miss on both versions: Fraud posteriors do not survive a new Fraud table
+        self.assertEqual(profiler.counters["cached_infer_encoded_calls"], 2 * len(cases))
+        self.assertEqual(profiler.counters["posterior_cache_misses"], 2 * len(cases))
+        self.assertEqual(profiler.stages["infer_codes"].count, 2 * len(cases))
+
+    def test_bad_versions_are_not_swapped_in(self):
+        handle = NetHandle(self.path)
+        version = handle.version
+
+        self.write("{not json")
+        self.assertFalse(handle.check())
+        self.assertIsNotNone(handle.error)
+
+        broken = build_default_fraud_net_json()
+        broken["tables"]["Fraud"][0][1] = [0.5, 0.6]
+        self.write(broken)
+        self.assertFalse(handle.check())
+        self.assertIn("Fraud", handle.error)
+
+        renamed = build_default_fraud_net_json()
+        renamed["nodes"]["NewDevice"] = ["no", "yes"]
+        for assignment, _ in renamed["tables"]["Fraud"]:
+            assignment[1] = {"F": "no", "T": "yes"}[assignment[1]]
+        self.write(renamed)
+        self.assertFalse(handle.check())
+        self.assertIn("restart", handle.error)
+
+        self.assertEqual(handle.acquire()[1], version)
+        self.assertEqual((handle.reloads, handle.failed_reloads), (0, 3))
+
+        # a good version afterwards clears the error
+        self.write(with_fraud_prior(0.5))
+        self.assertTrue(handle.check())
+        self.assertIsNone(handle.error)
+        self.assertNotEqual(handle.acquire()[1], version)
+
+    def test_stream_records_version_per_chunk(self):
+        cases = load_cases(None)
+        handle = NetHandle(self.path)
+        first = handle.version
+        seen = []
+
+        def on_scored(row):
+            seen.append(row)
+            if len(seen) == 3:
+                # the net changes while the first chunk is being written out
+                self.write(with_fraud_prior(2.0))
+                handle.check()
+
+        stream_prioritize(handle.bn, cases, top=3, chunk_size=3, on_scored=on_scored, net_handle=handle)
+        versions = [row["net_version"] for row in seen]
+        self.assertEqual(versions[:3], [first] * 3)
+        self.assertEqual(set(versions[3:]), {handle.version})
+        self.assertNotEqual(handle.version, first)
+        self.assertEqual(seen[3:], score_cases(handle.bn, cases[3:], net_version=handle.version))
+
+    def test_background_thread(self):
+        with NetHandle(self.path, check_interval=0.01) as handle:
+            version = handle.version
+            self.write(with_fraud_prior(2.0))
+            for _ in range(500):
+                if handle.acquire()[1] != version:
+                    break
+                handle._stop.wait(0.01)
+            self.assertNotEqual(handle.version, version)
+        self.assertIsNone(handle._thread)
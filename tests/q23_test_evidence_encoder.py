@@ -0,0 +1,71 @@
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+import fraud_review_prioritization as frp
+from BayesNet import BayesNet
+from fraud_review_prioritization import EvidenceEncoder, decode_evidence, ensure_net_file
+
+class TestEvidenceEncoder(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.net_path = ensure_net_file(os.path.join(self.tmp.name, "fraud_review.json"))
+        self.bn = BayesNet(self.net_path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_compact_case_round_trip(self):
+        encoder = EvidenceEncoder(self.bn)
+        case = {"case_id": 7, "amount_usd": 12.5,
+                "evidence": {"PastChargeback": "T", "Bogus": "T", "AmountHigh": "F", "NewDevice": "maybe"}}
+
+        record = encoder.encode_case(case)
+        self.assertEqual(record, ("7", 12.5, ((3, 1), (0, 0))))
+        # evidence keeps its order, so written output is identical
+        self.assertEqual(list(decode_evidence(self.bn, record[2]).items()),
+                         [("PastChargeback", "T"), ("AmountHigh", "F")])
+        self.assertEqual(encoder.stats(), {"cases": 1, "dropped_keys": {"Bogus": 1},
+                                           "dropped_values": {"NewDevice": 1}})
+
+    def test_unhashable_values_and_bad_evidence(self):
+        encoder = EvidenceEncoder(self.bn)
+        self.assertEqual(encoder.encode({"NewDevice": ["T"], "IPMismatch": "T"}), ((2, 1),))
+        self.assertEqual(encoder.encode_case({"case_id": "X", "evidence": "not a dict"}), ("X", None, ()))
+        self.assertEqual(encoder.stats()["dropped_values"], {"NewDevice": 1})
+
+    def test_patterns_are_shared(self):
+        encoder = EvidenceEncoder(self.bn)
+        first = encoder.encode({"NewDevice": "T", "Bogus": "x"})
+        second = encoder.encode({"NewDevice": "T"})
+        self.assertEqual(first, second)
+        self.assertIs(first, second)
+
+        with mock.patch.object(frp, "MAX_SHARED_PATTERNS", 1):
+            capped = EvidenceEncoder(self.bn)
+            kept = capped.encode({"NewDevice": "T"})
+            self.assertIs(capped.encode({"NewDevice": "T"}), kept)
+            # past the cap equal patterns are still equal, just no longer shared
+            other = capped.encode({"NewDevice": "F"})
+            self.assertEqual(capped.encode({"NewDevice": "F"}), other)
+            self.assertIsNot(capped.encode({"NewDevice": "F"}), other)
+            self.assertEqual(len(capped.patterns), 1)
+
+    def test_cli_reports_dropped_evidence(self):
+        cases_path = os.path.join(self.tmp.name, "cases.json")
+        with open(cases_path, "w") as file:
+            json.dump([
+                {"case_id": "A", "amount_usd": 10.0, "evidence": {"NewDevice": "T", "Bogus": "T"}},
+                {"case_id": "B", "amount_usd": 20.0, "evidence": {"IPMismatch": "maybe", "Bogus": "F"}},
+            ], file)
+
+        out = io.StringIO()
+        argv = ["fraud_review_prioritization.py", "--net", self.net_path, "--cases", cases_path]
+        with mock.patch.object(sys, "argv", argv), redirect_stdout(out):
+            frp.main()
+        self.assertIn("Dropped evidence: unknown variables {'Bogus': 2}, "
+                      "unknown values per variable {'IPMismatch': 1}", out.getvalue())
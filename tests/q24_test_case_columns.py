@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+from array import array
+from BayesNet import BayesNet
+from fraud_review_prioritization import (CaseColumns, EvidenceEncoder, build_default_fraud_net_json, load_cases,
+                                         load_ranked_columns, rank_cases, rank_columns, rescore_columns,
+                                         score_cases, score_columns, write_ranked_json)
+from scoring_policies import ScoringPolicy
+
+def impossible_net():
+    # a downstream signal that can never be observed as "T"
+    data = build_default_fraud_net_json()
+    data["nodes"]["Disputed"] = ["F", "T"]
+    data["parents"]["Disputed"] = ["Fraud"]
+    data["tables"]["Disputed"] = [[["F"], [1.0, 0.0]], [["T"], [1.0, 0.0]]]
+    return BayesNet.from_dict(data)
+
+class TestCaseColumns(unittest.TestCase):
+    def setUp(self):
+        self.bn = impossible_net()
+        self.cases = load_cases(None) + [
+            {"case_id": "IMPOSSIBLE", "amount_usd": 5000.0, "evidence": {"Disputed": "T"}},
+            {"case_id": "SHOP", "amount_usd": None, "merchant_id": "m-1", "evidence": {"NewDevice": "T"}},
+        ]
+
+    def test_rows_match_score_cases(self):
+        for options in ({}, {"explain": True}, {"batch": True}):
+            columns = score_columns(self.bn, EvidenceEncoder(self.bn).encode_columns(self.cases), **options)
+            expected = score_cases(self.bn, self.cases, **options)
+            self.assertEqual(len(columns), len(self.cases))
+            self.assertEqual(list(columns.rows(self.bn)), expected)
+            self.assertEqual(list(columns.rows(self.bn, [2, 0])), [expected[2], expected[0]])
+
+        rows = score_cases(self.bn, self.cases)
+        self.assertEqual(rows[-1]["merchant_id"], "m-1")
+        self.assertNotIn("merchant_id", rows[0])
+        # NaN p_fraud becomes None, with an error and a zero score
+        self.assertIsNone(rows[-2]["p_fraud"])
+        self.assertEqual(rows[-2]["priority_score"], 0.0)
+        self.assertEqual(rows[-2]["error"], "evidence has probability zero")
+
+    def test_rank_columns_ties_and_top(self):
+        columns = CaseColumns()
+        columns.scores = array('d', [0.5, 0.9, 0.5, 0.0, 0.9, 0.5])
+        # ties keep input order
+        self.assertEqual(list(rank_columns(columns)), [1, 4, 0, 2, 5, 3])
+        for top in range(8):
+            self.assertEqual(list(rank_columns(columns, top=top)), [1, 4, 0, 2, 5, 3][:top])
+
+        rows = [{"case_id": str(i), "priority_score": score} for i, score in enumerate(columns.scores)]
+        self.assertEqual([int(row["case_id"]) for row in rank_cases(list(rows))], list(rank_columns(columns)))
+        self.assertEqual([int(row["case_id"]) for row in rank_cases(list(rows), top=3)], list(rank_columns(columns, top=3)))
+
+    def test_load_ranked_columns_round_trip(self):
+        columns = score_columns(self.bn, EvidenceEncoder(self.bn).encode_columns(self.cases), explain=True)
+        order = rank_columns(columns)
+        ranked = list(columns.rows(self.bn, order))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ranked.json")
+            write_ranked_json(ranked, path)
+            loaded = load_ranked_columns(self.bn, path)
+
+        self.assertEqual(list(loaded.rows(self.bn)), ranked)
+        impossible = loaded.case_ids.index("IMPOSSIBLE")
+        self.assertNotEqual(loaded.p_fraud[impossible], loaded.p_fraud[impossible])
+
+        # rescoring keeps the impossible case at zero and the others ranked by the new policy
+        rescore_columns(loaded, ScoringPolicy("expected_loss"))
+        rows = list(loaded.rows(self.bn, rank_columns(loaded)))
+        self.assertEqual(rows[-1]["priority_score"], 0.0)
+        self.assertIn(rows[-1]["case_id"], ("IMPOSSIBLE", "SHOP"))
+        self.assertEqual([row["priority_score"] for row in rows],
+                         sorted((row["priority_score"] for row in rows), reverse=True))
+        self.assertEqual(loaded.row(self.bn, impossible)["error"], "evidence has probability zero")
@@ -53,6 +53,25 @@ class TestEnumerateAll(unittest.TestCase):
                                0.009, 
                                places=PLACES)
     
+    def test_enumerate_all_ignores_unknown_variables(self):
+        bn = BayesNet("./nets/sprinkler.json")
+        vars = list(bn.nodes)
+        self.assertEqual(bn.enumerate_all(vars, {"WetGrass": "T", "Hail": "T"}),
+                         bn.enumerate_all(vars, {"WetGrass": "T"}))
+
+    def test_enumerate_all_needs_parents_assigned(self):
+        bn = BayesNet("./nets/sprinkler.json")
+        # Cloudy, the parent of Rain, is neither observed nor walked
+        with self.assertRaisesRegex(ValueError, "'Cloudy' of 'Rain'"):
+            bn.enumerate_all(["Rain", "WetGrass"], {"WetGrass": "T", "Sprinkler": "F"})
+        # not in topological order
+        with self.assertRaisesRegex(ValueError, "'Cloudy' of 'Sprinkler'"):
+            bn.enumerate_all(["Sprinkler", "Cloudy", "Rain", "WetGrass"], {"WetGrass": "T"})
+        # the priors of the observed Cloudy and Sprinkler are left out: P(Cloudy=T) * P(Sprinkler=F | Cloudy=T)
+        self.assertAlmostEqual(bn.enumerate_all(["Rain", "WetGrass"], {"WetGrass": "T", "Sprinkler": "F", "Cloudy": "T"}),
+                               bn.enumerate_all(list(bn.nodes), {"WetGrass": "T", "Sprinkler": "F", "Cloudy": "T"}) / 0.5 / 0.5,
+                               places=12)
+
     def test_enumerate_all_books(self):
         bn = BayesNet("./nets/books.json")
         vars = list(bn.nodes)
@@ -94,6 +113,19 @@ class TestEnumerateAll(unittest.TestCase):
             bn.enumerate_all(vars, {"Honesty": "F", "Recommendation": "1", "Quality": "1"}), 
                                0.001, 
                                places=PLACES)
-        
 
+    def test_enumerate_all_deep_chain(self):
+        # far deeper than the recursion limit
+        depth = 3000
+        names = [f"X{i}" for i in range(depth)]
+        nodes = {name: ["T", "F"] for name in names}
+        parents = {name: ([names[i - 1]] if i else []) for i, name in enumerate(names)}
+        tables = {names[0]: [[[], [0.5, 0.5]]]}
+        for name in names[1:]:
+            tables[name] = [[["T"], [0.9, 0.1]], [["F"], [0.2, 0.8]]]
+        bn = BayesNet.from_dict({"nodes": nodes, "parents": parents, "tables": tables})
 
+        evidence = {name: "T" for name in names[:-1]}
+        self.assertAlmostEqual(bn.enumerate_all(names, evidence) / 0.5 / 0.9 ** (depth - 2), 1.0, places=PLACES)
+        res = bn.enumerate_ask(names[-1], evidence)
+        self.assertAlmostEqual(res["T"], 0.9, places=PLACES)
@@ -0,0 +1,70 @@
+import unittest
+from itertools import combinations, product
+from BayesNet import BayesNet
+from factors import Factor, elimination_order
+
+PLACES = 10
+
+def all_evidence(bn, query):
+    """
+    Yields every partial assignment of the non-query variables (all variables if query is None).
+    """
+    others = [var for var in bn.nodes if var != query]
+    for size in range(len(others) + 1):
+        for chosen in combinations(others, size):
+            for values in product(*[bn.nodes[var] for var in chosen]):
+                yield dict(zip(chosen, values))
+
+class TestVariableElimination(unittest.TestCase):
+    def assert_matches_enumeration(self, bn):
+        for query in bn.nodes:
+            for evidence in all_evidence(bn, query):
+                try:
+                    expected = bn.enumerate_ask(query, evidence)
+                except ZeroDivisionError:
+                    # evidence with probability zero, must fail the same way
+                    with self.assertRaises(ZeroDivisionError):
+                        bn.infer(query, evidence, method="ve")
+                    continue
+                actual = bn.infer(query, evidence, method="ve")
+                self.assertEqual(list(actual), list(expected))
+                for value in expected:
+                    self.assertAlmostEqual(actual[value], expected[value], places=PLACES)
+
+    def test_ve_matches_enumeration_sprinkler(self):
+        self.assert_matches_enumeration(BayesNet("./nets/sprinkler.json"))
+
+    def test_ve_matches_enumeration_books(self):
+        self.assert_matches_enumeration(BayesNet("./nets/books.json"))
+
+    def test_factor_operations(self):
+        bn = BayesNet("./nets/sprinkler.json")
+        wet = Factor.from_cpt(bn, "WetGrass")
+
+        # P(WetGrass | Sprinkler=T, Rain=F)
+        reduced = wet.reduce({"Sprinkler": 0, "Rain": 1})
+        self.assertEqual(reduced.variables, ["WetGrass"])
+        self.assertEqual(reduced.values, [0.1, 0.9])
+
+        # summing the child out of a CPT leaves 1 for every parent assignment
+        summed = wet.sum_out("WetGrass")
+        self.assertEqual(summed.variables, ["Sprinkler", "Rain"])
+        for value in summed.values:
+            self.assertAlmostEqual(value, 1.0, places=PLACES)
+
+        joint = Factor.from_cpt(bn, "Cloudy").multiply(Factor.from_cpt(bn, "Rain"))
+        self.assertEqual(joint.variables, ["Cloudy", "Rain"])
+        self.assertAlmostEqual(sum(joint.values), 1.0, places=PLACES)
+
+    def test_elimination_order(self):
+        bn = BayesNet("./nets/sprinkler.json")
+        factors = [Factor.from_cpt(bn, var) for var in bn.nodes]
+
+        for heuristic in ("min_fill", "min_degree"):
+            order = elimination_order(factors, ["Cloudy", "Sprinkler", "Rain"], heuristic)
+            self.assertEqual(sorted(order), ["Cloudy", "Rain", "Sprinkler"])
+
+        with self.assertRaises(ValueError):
+            elimination_order(factors, ["Cloudy"], "bogus")
+        with self.assertRaises(ValueError):
+            bn.infer("Cloudy", {}, method="bogus")
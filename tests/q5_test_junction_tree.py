@@ -0,0 +1,59 @@
+import unittest
+from BayesNet import BayesNet
+from fraud_review_prioritization import build_default_fraud_net_json, score_cases
+from tests.q4_test_variable_elimination import all_evidence
+
+PLACES = 10
+
+class TestJunctionTree(unittest.TestCase):
+    def assert_matches_enumeration(self, bn):
+        tree = bn.compile_junction_tree()
+        for evidence in all_evidence(bn, None):
+            try:
+                marginals = bn.marginals(evidence)
+            except ZeroDivisionError:
+                continue
+            for query in bn.nodes:
+                if query in evidence:
+                    # observed nodes put all mass on their value
+                    self.assertEqual(marginals[query][evidence[query]], 1.0)
+                    continue
+                expected = bn.enumerate_ask(query, evidence)
+                for value in expected:
+                    self.assertAlmostEqual(marginals[query][value], expected[value], places=PLACES)
+        # compiled once, reused for every query
+        self.assertIs(bn.compile_junction_tree(), tree)
+
+    def test_marginals_sprinkler(self):
+        self.assert_matches_enumeration(BayesNet("./nets/sprinkler.json"))
+
+    def test_marginals_books(self):
+        self.assert_matches_enumeration(BayesNet("./nets/books.json"))
+
+    def test_cliques_sprinkler(self):
+        bn = BayesNet("./nets/sprinkler.json")
+        tree = bn.compile_junction_tree()
+
+        self.assertEqual(sorted(map(sorted, tree.cliques)),
+                         [["Cloudy", "Rain", "Sprinkler"], ["Rain", "Sprinkler", "WetGrass"]])
+        self.assertEqual(sorted(tree.separators[(0, 1)]), ["Rain", "Sprinkler"])
+
+    def test_infer_jt(self):
+        bn = BayesNet("./nets/sprinkler.json")
+        res = bn.infer("Rain", {"WetGrass": "T", "Rain": "F"}, method="jt")
+        expected = bn.enumerate_ask("Rain", {"WetGrass": "T", "Rain": "F"})
+        for value in expected:
+            self.assertAlmostEqual(res[value], expected[value], places=PLACES)
+
+    def test_explain_ignores_evidence_on_fraud(self):
+        bn = BayesNet.from_dict(build_default_fraud_net_json())
+        cases = [{"case_id": "L1", "amount_usd": 300.0, "evidence": {"NewDevice": "T", "Fraud": "T"}},
+                 {"case_id": "L2", "amount_usd": 20.0, "evidence": {"Fraud": "F"}}]
+        explained = score_cases(bn, cases, explain=True)
+        plain = score_cases(bn, cases)
+        for row, expected in zip(explained, plain):
+            self.assertEqual(row["p_fraud"], expected["p_fraud"])
+            self.assertEqual(row["priority_score"], expected["priority_score"])
+            self.assertEqual(row["posteriors"]["Fraud"]["T"], row["p_fraud"])
+        self.assertNotIn("NewDevice", explained[0]["posteriors"])
+        self.assertIn("NewDevice", explained[1]["posteriors"])
@@ -0,0 +1,78 @@
+import random
+import unittest
+from unittest import mock
+import BayesNet as bayes_net
+from BayesNet import MAX_JOINT_SIZE, BayesNet, UNOBSERVED
+from fraud_review_prioritization import build_default_fraud_net_json, load_cases, prioritize_cases
+from tests.q4_test_variable_elimination import all_evidence
+
+PLACES = 10
+
+class TestBatchQuery(unittest.TestCase):
+    def assert_matches_infer(self, bn):
+        for query in bn.nodes:
+            evidence_list = list(all_evidence(bn, query))
+            posteriors = bn.batch_query(query, bn.encode_evidence_matrix(evidence_list))
+            self.assertEqual(posteriors.shape, (len(evidence_list), len(bn.nodes[query])))
+
+            for evidence, row in zip(evidence_list, posteriors):
+                try:
+                    expected = bn.infer(query, evidence, prune=False)
+                except ZeroDivisionError:
+                    # zero-probability evidence comes back as NaN
+                    self.assertTrue(all(value != value for value in row))
+                    continue
+                for i, value in enumerate(bn.nodes[query]):
+                    self.assertAlmostEqual(row[i], expected[value], places=PLACES)
+
+    def test_batch_query_sprinkler(self):
+        self.assert_matches_infer(BayesNet("./nets/sprinkler.json"))
+
+    def test_batch_query_books(self):
+        self.assert_matches_infer(BayesNet("./nets/books.json"))
+
+    def test_batch_query_columns(self):
+        bn = BayesNet("./nets/sprinkler.json")
+        res = bn.batch_query("Cloudy", [[0], [UNOBSERVED]], columns=["WetGrass"])
+        expected = bn.enumerate_ask("Cloudy", {"WetGrass": "T"})
+        self.assertAlmostEqual(res[0][0], expected["T"], places=PLACES)
+        self.assertAlmostEqual(res[1][0], 0.5, places=PLACES)
+
+        with self.assertRaises(ValueError):
+            bn.batch_query("Cloudy", [[0, 0]], columns=["WetGrass"])
+        with self.assertRaises(ValueError):
+            bn.batch_query("Cloudy", [[5]], columns=["WetGrass"])
+
+    def test_prioritize_cases_batch(self):
+        bn = BayesNet.from_dict(build_default_fraud_net_json())
+
+        cases = load_cases(None)
+        self.assertEqual(prioritize_cases(bn, cases, batch=True), prioritize_cases(bn, cases))
+
+    def test_small_blocks_match(self):
+        # one evidence pattern per block
+        with mock.patch.object(bayes_net, "BATCH_BLOCK_ENTRIES", 1):
+            self.assert_matches_infer(BayesNet("./nets/books.json"))
+
+    def test_joint_too_large_to_build(self):
+        # a chain of 30 binary nodes: 2 ** 30 joint entries, but every CPT has at most 4
+        names = [f"X{i}" for i in range(30)]
+        rng = random.Random(2)
+        data = {"nodes": {name: ["F", "T"] for name in names},
+                "parents": {name: names[i - 1:i] for i, name in enumerate(names)},
+                "tables": {}}
+        for i, name in enumerate(names):
+            rows = [[[], None]] if i == 0 else [[["F"], None], [["T"], None]]
+            for row in rows:
+                p = rng.uniform(0.1, 0.9)
+                row[1] = [1.0 - p, p]
+            data["tables"][name] = rows
+        bn = BayesNet.from_dict(data)
+        self.assertGreater(2 ** len(names), MAX_JOINT_SIZE)
+
+        evidence_list = [{}, {"X29": "T"}, {"X3": "F", "X20": "T"}, {"X0": "T", "X29": "F"}]
+        posteriors = bn.batch_query("X10", bn.encode_evidence_matrix(evidence_list))
+        for evidence, row in zip(evidence_list, posteriors):
+            expected = bn.infer("X10", evidence)
+            self.assertAlmostEqual(row[0], expected["F"], places=PLACES)
+            self.assertAlmostEqual(row[1], expected["T"], places=PLACES)
@@ -0,0 +1,50 @@
+import unittest
+from BayesNet import BayesNet
+from posterior_cache import PosteriorCache
+
+class TestPosteriorCache(unittest.TestCase):
+    def test_cached_infer_hits(self):
+        bn = BayesNet("./nets/sprinkler.json")
+
+        first = bn.cached_infer("Cloudy", {"WetGrass": "T", "Rain": "F"})
+        # same evidence given in another order is the same key
+        second = bn.cached_infer("Cloudy", {"Rain": "F", "WetGrass": "T"})
+        self.assertEqual(first, second)
+        self.assertEqual(first, bn.infer("Cloudy", {"WetGrass": "T", "Rain": "F"}))
+
+        stats = bn.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (1, 1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+        # callers get a copy, so mutating it leaves the cache intact
+        second["T"] = 42
+        self.assertEqual(bn.cached_infer("Cloudy", {"WetGrass": "T", "Rain": "F"}), first)
+
+    def test_lru_eviction(self):
+        cache = PosteriorCache(maxsize=2)
+        cache.put("a", {"T": 1.0})
+        cache.put("b", {"T": 2.0})
+        cache.get("a")
+        cache.put("c", {"T": 3.0})
+
+        # "b" was least recently used
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {"T": 1.0})
+        self.assertEqual(cache.get("c"), {"T": 3.0})
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_disabled_cache(self):
+        bn = BayesNet("./nets/sprinkler.json", cache_size=0)
+        bn.cached_infer("Cloudy", {})
+        bn.cached_infer("Cloudy", {})
+        self.assertEqual(bn.cache.stats()["hits"], 0)
+        self.assertEqual(bn.cache.stats()["size"], 0)
+
+    def test_invalidated_when_tables_change(self):
+        bn = BayesNet("./nets/sprinkler.json")
+        self.assertAlmostEqual(bn.cached_infer("Cloudy", {})["T"], 0.5)
+
+        bn.update_tables({"Cloudy": [[[], [0.3, 0.7]]]})
+        self.assertEqual(bn.cache.stats()["size"], 0)
+        self.assertAlmostEqual(bn.cached_infer("Cloudy", {})["T"], 0.3)
+        self.assertEqual(bn.query_prob("Cloudy", "F", {}), 0.7)
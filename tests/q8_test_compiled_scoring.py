@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+import unittest
+from BayesNet import BayesNet
+from fraud_review_prioritization import (build_default_fraud_net_json, ensure_net_file, fraud_probability,
+                                         load_cases, load_net, load_or_compile_posterior_table, posterior_table_path,
+                                         prioritize_cases)
+from tests.q4_test_variable_elimination import all_evidence
+
+class TestCompiledScoring(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.net_path = ensure_net_file(os.path.join(self.tmp.name, "fraud_review.json"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_table_matches_live_inference(self):
+        bn = BayesNet(self.net_path)
+        table = load_or_compile_posterior_table(bn, self.net_path)
+
+        self.assertEqual(len(table.probabilities), 81)
+        self.assertTrue(os.path.exists(posterior_table_path(self.net_path)))
+        for evidence in all_evidence(bn, "Fraud"):
+            self.assertEqual(table.fraud_probability(bn, evidence), fraud_probability(bn, evidence))
+
+        cases = load_cases(None)
+        self.assertEqual(prioritize_cases(bn, cases, posterior_table=table), prioritize_cases(bn, cases))
+
+    def test_stale_table_is_recompiled(self):
+        bn = BayesNet(self.net_path)
+        table = load_or_compile_posterior_table(bn, self.net_path)
+        self.assertEqual(load_or_compile_posterior_table(bn, self.net_path).digest, table.digest)
+
+        data = build_default_fraud_net_json()
+        data["tables"]["PastChargeback"] = [[[], [0.5, 0.5]]]
+        with open(self.net_path, "w") as file:
+            json.dump(data, file)
+        bn = BayesNet(self.net_path)
+
+        fresh = load_or_compile_posterior_table(bn, self.net_path)
+        self.assertNotEqual(fresh.digest, table.digest)
+        self.assertAlmostEqual(fresh.fraud_probability(bn, {}), fraud_probability(bn, {}), places=12)
+
+    def test_table_of_other_inference_settings_is_recompiled(self):
+        sampled = load_net(self.net_path, inference={"method": "lw", "samples": 500, "seed": 0})
+        table = load_or_compile_posterior_table(sampled, self.net_path)
+        log_space = load_net(self.net_path, log_space=True)
+        self.assertNotEqual(load_or_compile_posterior_table(log_space, self.net_path).digest, table.digest)
+
+        bn = BayesNet(self.net_path)
+        exact = load_or_compile_posterior_table(bn, self.net_path)
+        self.assertNotEqual(exact.digest, table.digest)
+        for evidence in all_evidence(bn, "Fraud"):
+            self.assertEqual(exact.fraud_probability(bn, evidence), fraud_probability(bn, evidence))
+
+    def test_too_large_falls_back(self):
+        bn = BayesNet(self.net_path)
+        self.assertIsNone(load_or_compile_posterior_table(bn, self.net_path, limit=80))
+        self.assertFalse(os.path.exists(posterior_table_path(self.net_path)))
@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import unittest
+from BayesNet import BayesNet
+from fraud_review_prioritization import (ExternalRanking, build_default_fraud_net_json, iter_cases, load_cases,
+                                         prioritize_cases, stream_prioritize, write_ranked_json)
+
+def tied_cases(count):
+    """
+    Cases with only a few distinct scores, so rankings depend on tie order.
+    """
+    signals = ["AmountHigh", "NewDevice", "IPMismatch", "PastChargeback"]
+    cases = []
+    for i in range(count):
+        evidence = {var: "T" if (i >> bit) % 3 == 0 else "F" for bit, var in enumerate(signals)}
+        cases.append({"case_id": f"TXN-{i:04d}", "amount_usd": float(i % 3) * 100, "evidence": evidence})
+    return cases
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        self.bn = BayesNet.from_dict(build_default_fraud_net_json())
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_stream_matches_full_ranking(self):
+        cases = tied_cases(500)
+        ranked = prioritize_cases(self.bn, cases)
+
+        for top in (0, 1, 10, 499, 500, 600):
+            for chunk_size in (1, 7, 1000):
+                streamed = stream_prioritize(self.bn, iter(cases), top=top, chunk_size=chunk_size)
+                self.assertEqual(streamed, ranked[:top])
+
+    def test_on_scored_sees_every_case_in_order(self):
+        cases = tied_cases(50)
+        seen = []
+        stream_prioritize(self.bn, iter(cases), top=3, chunk_size=8, on_scored=seen.append)
+        self.assertEqual([row["case_id"] for row in seen], [c["case_id"] for c in cases])
+
+    def test_iter_cases_formats(self):
+        cases = load_cases(None)
+
+        ndjson_path = os.path.join(self.tmp.name, "cases.ndjson")
+        with open(ndjson_path, "w") as file:
+            for case in cases:
+                file.write(json.dumps(case) + "\n")
+        self.assertEqual(list(iter_cases(ndjson_path)), cases)
+
+        csv_path = os.path.join(self.tmp.name, "cases.csv")
+        with open(csv_path, "w") as file:
+            file.write("case_id,amount_usd,AmountHigh,NewDevice\n")
+            file.write("TXN-1,45.5,T,\n")
+            file.write("TXN-2,,F,T\n")
+        self.assertEqual(list(iter_cases(csv_path)), [
+            {"case_id": "TXN-1", "amount_usd": 45.5, "evidence": {"AmountHigh": "T"}},
+            {"case_id": "TXN-2", "amount_usd": None, "evidence": {"AmountHigh": "F", "NewDevice": "T"}},
+        ])
+
+    def test_prioritize_cases_top(self):
+        cases = tied_cases(300)
+        ranked = prioritize_cases(self.bn, cases)
+        for top in (0, 1, 25, 300, 400):
+            self.assertEqual(prioritize_cases(self.bn, cases, top=top), ranked[:top])
+
+    def test_external_ranking_matches_sort(self):
+        cases = tied_cases(300)
+        ranked = prioritize_cases(self.bn, cases)
+
+        for run_size in (1, 16, 1000):
+            with ExternalRanking(run_size=run_size, tmp_dir=self.tmp.name) as ranking:
+                stream_prioritize(self.bn, iter(cases), top=0, on_scored=ranking.add)
+                self.assertEqual(len(ranking.runs), 300 // run_size)
+                self.assertEqual(list(ranking.ranked()), ranked)
+            # spilled runs are removed
+            self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_write_ranked_json_matches_json_dumps(self):
+        path = os.path.join(self.tmp.name, "ranked.json")
+        for rows in ([], prioritize_cases(self.bn, load_cases(None))):
+            write_ranked_json(iter(rows), path)
+            with open(path) as file:
+                self.assertEqual(file.read(), json.dumps(rows, indent=2))